@@ -1,11 +1,29 @@
 # 처음 실행하면 Qwen2 모델 15기가분량 다운로드부터 진행...
 # 까먹고 캐시에 있는 모델 삭제 안 하면 영원히 15기가 잡아먹음
+#
+# 사용법:
+#   python run_qwen2.py                        # ../targetFiles/test9.mp3
+#   python run_qwen2.py path/to/audio.mp3
+#
+# 다른 스크립트(stt/whisper/transcribers.py)에서 get_model() / transcribe() 를 가져다 쓸 수 있도록
+# 모듈 import 시에는 모델을 로딩하지 않는다. get_model() 은 모델 레지스트리(stt/whisper/model_registry.py)에
+# 보관해 같은 프로세스에서는 한 번만 로딩한다.
 
+import argparse
 import os
+import sys
 import torch
 import librosa
 from transformers import Qwen2AudioForConditionalGeneration, AutoProcessor
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "whisper"))
+from model_registry import get_registry
+
+MODEL_NAME = "Qwen/Qwen2-Audio-7B-Instruct"
+
+# 한국어 음성 인식을 위한 영어 프롬프트 구성
+PROMPT = "<|im_start|>user\n<|AUDIO|>This is a Korean speech audio file. Please transcribe it in Korean. If there are any foreign words (English, Japanese, Chinese, etc.) mixed in, transcribe them in their original language. For example, English words should be written in English, Japanese words in Japanese. Please provide the transcription in Korean for Korean parts and in the original language for foreign words.<|im_end|>\n<|im_start|>assistant\n"
+
 # M1 Pro 맥북을 위한 디바이스 설정
 def get_device():
     if torch.backends.mps.is_available():
@@ -15,69 +33,138 @@ def get_device():
     else:
         return "cpu"  # CPU fallback
 
-device = get_device()
-print(f"사용 중인 디바이스: {device}")
+def load_model(model_name=MODEL_NAME, device=None):
+    """
+    Qwen2-Audio 프로세서와 모델 로드 (M1 Pro 최적화)
 
-# 모델 로드 (M1 Pro 최적화)
-processor = AutoProcessor.from_pretrained("Qwen/Qwen2-Audio-7B-Instruct")
-model = Qwen2AudioForConditionalGeneration.from_pretrained(
-    "Qwen/Qwen2-Audio-7B-Instruct", 
-    device_map="auto",
-    torch_dtype=torch.float16 if device == "mps" else torch.float32  # MPS에서는 float16 권장
-)
+    Args:
+        model_name (str): Hugging Face 모델 이름
+        device (str): mps | cuda | cpu (None 이면 자동 선택)
 
-# 오디오 파일 경로 설정 (절대 경로로 변환)
-script_dir = os.path.dirname(os.path.abspath(__file__))
-audio_path = os.path.join(script_dir, "..", "targetFiles", "test9.mp3")
+    Returns:
+        tuple: (processor, model)
+    """
+    device = device or get_device()
+    processor = AutoProcessor.from_pretrained(model_name)
+    model = Qwen2AudioForConditionalGeneration.from_pretrained(
+        model_name,
+        device_map="auto",
+        torch_dtype=torch.float16 if device == "mps" else torch.float32  # MPS에서는 float16 권장
+    )
+    return processor, model
 
-# 오디오 파일 존재 확인
-if not os.path.exists(audio_path):
-    raise FileNotFoundError(f"오디오 파일을 찾을 수 없습니다: {audio_path}")
+def get_model(model_name=MODEL_NAME, device=None, hold=False):
+    """
+    모델 레지스트리에서 (processor, model) 가져오기 (처음 호출 시 load_model 로 로딩)
 
-print(f"오디오 파일 경로: {audio_path}")
+    Args:
+        model_name (str): Hugging Face 모델 이름
+        device (str): mps | cuda | cpu (None 이면 자동 선택)
+        hold (bool): True 면 release_model() 까지 메모리 상한으로 해제되지 않도록 사용 중 표시
 
-# 오디오 로드
-audio, sr = librosa.load(audio_path, sr=processor.feature_extractor.sampling_rate)
+    Returns:
+        tuple: (processor, model)
+    """
+    device = device or get_device()
+    compute_type = "float16" if device == "mps" else "float32"
+    get = get_registry().acquire if hold else get_registry().get
+    return get(model_name, lambda: load_model(model_name, device), device=device, compute_type=compute_type)
 
-# 한국어 음성 인식을 위한 영어 프롬프트 구성
-text = "<|im_start|>user\n<|AUDIO|>This is a Korean speech audio file. Please transcribe it in Korean. If there are any foreign words (English, Japanese, Chinese, etc.) mixed in, transcribe them in their original language. For example, English words should be written in English, Japanese words in Japanese. Please provide the transcription in Korean for Korean parts and in the original language for foreign words.<|im_end|>\n<|im_start|>assistant\n"
-
-# 입력 처리 (audios 대신 audio 사용)
-inputs = processor(
-    text=text, 
-    audio=audio, 
-    return_tensors="pt", 
-    padding=True,
-    sampling_rate=processor.feature_extractor.sampling_rate  # sampling_rate 명시적 전달
-)
-
-# 디바이스로 이동 - 모든 텐서를 명시적으로 이동
-if device == "mps":
-    # MPS에서는 모든 텐서를 명시적으로 이동
-    for key, value in inputs.items():
-        if torch.is_tensor(value):
-            inputs[key] = value.to(device)
-else:
-    # CUDA나 CPU에서는 모든 입력을 이동
-    inputs = {k: v.to(device) if torch.is_tensor(v) else v for k, v in inputs.items()}
-
-# 생성
-print("음성 인식 및 응답 생성 중...")
-with torch.no_grad():
-    generate_ids = model.generate(
-        **inputs, 
-        max_new_tokens=256,
-        do_sample=True,
-        temperature=0.7,
-        pad_token_id=processor.tokenizer.eos_token_id
+def release_model(model_name=MODEL_NAME, device=None):
+    """get_model(hold=True) 의 사용 중 표시 해제"""
+    device = device or get_device()
+    compute_type = "float16" if device == "mps" else "float32"
+    get_registry().release(model_name, device=device, compute_type=compute_type)
+
+def load_audio_file(processor, audio_path):
+    """오디오 파일을 프로세서 샘플링 레이트의 배열로 로드"""
+    # 오디오 파일 존재 확인
+    if not os.path.exists(audio_path):
+        raise FileNotFoundError(f"오디오 파일을 찾을 수 없습니다: {audio_path}")
+    audio, sr = librosa.load(audio_path, sr=processor.feature_extractor.sampling_rate)
+    return audio
+
+def transcribe(processor, model, audio, device=None, prompt=PROMPT, max_new_tokens=256,
+               do_sample=True, temperature=0.7):
+    """
+    오디오 배열 하나를 텍스트로 변환
+
+    Args:
+        processor: load_model() 의 프로세서
+        model: load_model() 의 모델
+        audio (numpy.ndarray): 프로세서 샘플링 레이트(16kHz)의 float32 배열
+        device (str): 입력 텐서를 올릴 디바이스 (None 이면 자동 선택)
+        prompt (str): 채팅 형식 프롬프트 (<|AUDIO|> 포함)
+        max_new_tokens (int): 최대 생성 토큰 수
+        do_sample (bool): 샘플링 여부 (False 면 greedy, 재현 가능한 결과)
+        temperature (float): 샘플링 온도
+
+    Returns:
+        str: 모델 응답 텍스트
+    """
+    device = device or get_device()
+
+    # 입력 처리 (audios 대신 audio 사용)
+    inputs = processor(
+        text=prompt,
+        audio=audio,
+        return_tensors="pt",
+        padding=True,
+        sampling_rate=processor.feature_extractor.sampling_rate  # sampling_rate 명시적 전달
     )
 
-# 응답 디코딩
-generate_ids = generate_ids[:, inputs.input_ids.size(1):]
-response = processor.batch_decode(
-    generate_ids, 
-    skip_special_tokens=True, 
-    clean_up_tokenization_spaces=False
-)[0]
+    # 디바이스로 이동 - 모든 텐서를 명시적으로 이동
+    if device == "mps":
+        # MPS에서는 모든 텐서를 명시적으로 이동
+        for key, value in inputs.items():
+            if torch.is_tensor(value):
+                inputs[key] = value.to(device)
+    else:
+        # CUDA나 CPU에서는 모든 입력을 이동
+        inputs = {k: v.to(device) if torch.is_tensor(v) else v for k, v in inputs.items()}
+
+    generate_options = dict(max_new_tokens=max_new_tokens, do_sample=do_sample,
+                            pad_token_id=processor.tokenizer.eos_token_id)
+    if do_sample:
+        generate_options['temperature'] = temperature
+
+    # 생성
+    with torch.no_grad():
+        generate_ids = model.generate(**inputs, **generate_options)
+
+    # 응답 디코딩
+    generate_ids = generate_ids[:, inputs['input_ids'].size(1):]
+    response = processor.batch_decode(
+        generate_ids,
+        skip_special_tokens=True,
+        clean_up_tokenization_spaces=False
+    )[0]
+    return response
+
+def main():
+    # 오디오 파일 경로 설정 (절대 경로로 변환)
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    default_audio_path = os.path.join(script_dir, "..", "targetFiles", "test9.mp3")
+
+    parser = argparse.ArgumentParser(description="Qwen2-Audio 한국어 음성 인식")
+    parser.add_argument("audio_path", nargs="?", default=default_audio_path, help="변환할 오디오 파일 경로")
+    args = parser.parse_args()
+
+    device = get_device()
+    print(f"사용 중인 디바이스: {device}")
+
+    processor, model = get_model(device=device, hold=True)
+    try:
+        print(f"오디오 파일 경로: {args.audio_path}")
+        audio = load_audio_file(processor, args.audio_path)
+
+        print("음성 인식 및 응답 생성 중...")
+        response = transcribe(processor, model, audio, device)
+    finally:
+        release_model(device=device)
+
+    print(f"모델 응답: {response}")
+    get_registry().print_report()
 
-print(f"모델 응답: {response}")
+if __name__ == "__main__":
+    main()
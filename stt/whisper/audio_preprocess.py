@@ -0,0 +1,308 @@
+# 공용 오디오 전처리 (float32 numpy 배열 기반)
+#
+# 기존 pydub 체인(파일 저장 → AudioSegment 로드 → low_pass_filter → +5dB → 다시 저장)을
+# 메모리상의 float32 배열에서 벡터화된 연산으로 대체한다.
+# - 디코딩/모노 변환/리샘플링: ffmpeg 파이프 한 번 (중간 파일 없음)
+# - Low-pass: pydub 과 같은 1차 RC 필터를 scipy.signal.lfilter(IIR)로 계산
+# - 피크 정규화, 음량 증폭: numpy 연산
+
+import json
+import subprocess
+
+import numpy as np
+from scipy.signal import lfilter, resample_poly
+
+TARGET_SAMPLE_RATE = 16000
+
+
+def _ffmpeg_decode_cmd(path, sample_rate):
+    """입력 파일을 모노 float32 PCM 으로 stdout 에 출력하는 ffmpeg 명령"""
+    return [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-i", path,
+        "-f", "f32le", "-acodec", "pcm_f32le",
+        "-ac", "1", "-ar", str(sample_rate),
+        "-"
+    ]
+
+
+def load_audio(path, sample_rate=TARGET_SAMPLE_RATE):
+    """
+    오디오/비디오 파일을 모노 float32 배열로 디코딩 (ffmpeg 파이프)
+
+    Args:
+        path (str): 입력 파일 경로
+        sample_rate (int): 출력 샘플링 레이트
+
+    Returns:
+        numpy.ndarray: -1.0~1.0 범위의 (샘플,) float32 배열
+    """
+    result = subprocess.run(_ffmpeg_decode_cmd(path, sample_rate), capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg 디코딩 실패: {result.stderr.decode('utf-8', errors='replace')}")
+    return np.frombuffer(result.stdout, dtype=np.float32).copy()
+
+
+def probe_duration(path):
+    """
+    ffprobe 로 파일 길이(초) 조회 (디코딩 없이 헤더/컨테이너 정보만 읽음)
+
+    Returns:
+        float: 길이 (초), 알 수 없으면 0.0
+    """
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return 0.0
+
+
+def probe_audio_info(path):
+    """
+    ffprobe 로 오디오 스트림 정보 조회 (헤더/컨테이너만 읽고 디코딩하지 않음)
+
+    Returns:
+        dict: {'duration', 'sample_rate', 'channels', 'codec'} (알 수 없는 값은 0 또는 "")
+    """
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "format=duration:stream=sample_rate,channels,codec_name",
+        "-of", "json",
+        path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe 실패: {result.stderr.strip()}")
+    info = json.loads(result.stdout or "{}")
+    stream = (info.get("streams") or [{}])[0]
+    try:
+        duration = float(info.get("format", {}).get("duration", 0.0))
+    except ValueError:
+        duration = 0.0
+    return {
+        'duration': duration,
+        'sample_rate': int(stream.get("sample_rate") or 0),
+        'channels': int(stream.get("channels") or 0),
+        'codec': stream.get("codec_name", ""),
+    }
+
+
+def stream_audio(path, window_seconds, sample_rate=TARGET_SAMPLE_RATE):
+    """
+    파일 전체를 메모리에 올리지 않고 고정 길이 윈도우 단위로 디코딩
+
+    Args:
+        path (str): 입력 파일 경로
+        window_seconds (float): 윈도우 길이 (초)
+        sample_rate (int): 출력 샘플링 레이트
+
+    Yields:
+        numpy.ndarray: (샘플,) float32 배열 (마지막 윈도우는 더 짧을 수 있음)
+    """
+    window_bytes = int(window_seconds * sample_rate) * 4
+    process = subprocess.Popen(_ffmpeg_decode_cmd(path, sample_rate),
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    try:
+        while True:
+            data = process.stdout.read(window_bytes)
+            if not data:
+                break
+            data = data[:len(data) - len(data) % 4]
+            yield np.frombuffer(data, dtype=np.float32)
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg 디코딩 실패: {process.stderr.read().decode('utf-8', errors='replace')}")
+    finally:
+        # 소비자가 중간에 멈춘 경우에도 ffmpeg 정리
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def find_quiet_point(audio, sample_rate=TARGET_SAMPLE_RATE, search_seconds=10.0, frame_ms=30):
+    """
+    윈도우 끝부분에서 가장 조용한 프레임 위치 찾기 (단어 중간에서 자르지 않도록)
+
+    Args:
+        audio (numpy.ndarray): (샘플,) float32 배열
+        sample_rate (int): 샘플링 레이트
+        search_seconds (float): 끝에서부터 탐색할 길이 (초)
+        frame_ms (int): 에너지 계산 프레임 길이 (ms)
+
+    Returns:
+        int: 자를 샘플 위치
+    """
+    frame_size = int(sample_rate * frame_ms / 1000)
+    search_start = max(0, audio.size - int(search_seconds * sample_rate))
+    region = audio[search_start:]
+    frame_count = region.size // frame_size
+    if frame_count < 2:
+        return audio.size
+    frames = region[:frame_count * frame_size].reshape(frame_count, frame_size).astype(np.float64)
+    energy = np.mean(frames ** 2, axis=1)
+    quietest = int(np.argmin(energy))
+    return search_start + quietest * frame_size + frame_size // 2
+
+
+def to_mono(audio):
+    """(채널, 샘플) 배열을 (샘플,) 모노 배열로 변환"""
+    audio = np.asarray(audio, dtype=np.float32)
+    if audio.ndim == 2:
+        audio = audio.mean(axis=0)
+    return audio
+
+
+def resample(audio, orig_sample_rate, target_sample_rate=TARGET_SAMPLE_RATE):
+    """다상(polyphase) FIR 리샘플링"""
+    if orig_sample_rate == target_sample_rate:
+        return audio
+    divisor = np.gcd(int(orig_sample_rate), int(target_sample_rate))
+    up = target_sample_rate // divisor
+    down = orig_sample_rate // divisor
+    return resample_poly(audio, up, down).astype(np.float32)
+
+
+def low_pass_coefficients(cutoff, sample_rate):
+    """pydub low_pass_filter 와 같은 1차 RC 필터 계수 (b, a)"""
+    rc = 1.0 / (cutoff * 2 * np.pi)
+    dt = 1.0 / sample_rate
+    alpha = dt / (rc + dt)
+    return np.array([alpha]), np.array([1.0, alpha - 1.0])
+
+
+def low_pass(audio, cutoff, sample_rate=TARGET_SAMPLE_RATE):
+    """
+    1차 IIR Low-pass filter (pydub.effects.low_pass_filter 와 동일한 응답)
+
+    Args:
+        audio (numpy.ndarray): (샘플,) float32 배열
+        cutoff (float): 차단 주파수 (Hz)
+        sample_rate (int): 샘플링 레이트
+
+    Returns:
+        numpy.ndarray: 필터링된 배열
+    """
+    if audio.size == 0:
+        return audio
+    b, a = low_pass_coefficients(cutoff, sample_rate)
+    # pydub 처럼 첫 출력 샘플이 첫 입력 샘플과 같도록 초기 상태 설정
+    zi = np.array([(1.0 - b[0]) * audio[0]])
+    filtered, _ = lfilter(b, a, audio, zi=zi)
+    return filtered.astype(np.float32)
+
+
+def peak_normalize(audio, headroom_db=0.1):
+    """피크가 -headroom_db dBFS 가 되도록 정규화 (pydub.effects.normalize 와 동일)"""
+    peak = float(np.max(np.abs(audio))) if audio.size else 0.0
+    if peak == 0.0:
+        return audio
+    target = 10 ** (-headroom_db / 20)
+    return (audio * (target / peak)).astype(np.float32)
+
+
+def apply_gain(audio, gain_db):
+    """음량 증폭 (dB), -1.0~1.0 범위로 클리핑"""
+    gain = 10 ** (gain_db / 20)
+    return np.clip(audio * gain, -1.0, 1.0).astype(np.float32)
+
+
+def preprocess(audio, sample_rate=TARGET_SAMPLE_RATE, normalize=False, cutoff=3000, gain_db=5.0):
+    """
+    음성 인식용 전처리 (정규화 → Low-pass → 음량 증폭)
+
+    Args:
+        audio (numpy.ndarray): (샘플,) 또는 (채널, 샘플) float 배열
+        sample_rate (int): 샘플링 레이트
+        normalize (bool): 피크 정규화 여부
+        cutoff (float | None): Low-pass 차단 주파수 (None 이면 생략)
+        gain_db (float): 음량 증폭 (dB)
+
+    Returns:
+        numpy.ndarray: (샘플,) float32 배열
+    """
+    audio = to_mono(audio)
+    if normalize:
+        audio = peak_normalize(audio)
+    if cutoff:
+        audio = low_pass(audio, cutoff, sample_rate)
+    if gain_db:
+        audio = apply_gain(audio, gain_db)
+    return audio
+
+
+def scan_audio(path, sample_rate=TARGET_SAMPLE_RATE, window_seconds=30.0):
+    """
+    스트리밍 디코딩으로 전체 샘플 수와 피크 계산 (preprocess_stream 의 첫 번째 패스)
+
+    Returns:
+        tuple: (샘플 수, 최대 절대값)
+    """
+    num_samples = 0
+    peak = 0.0
+    for chunk in stream_audio(path, window_seconds, sample_rate):
+        num_samples += chunk.size
+        if chunk.size:
+            peak = max(peak, float(np.max(np.abs(chunk))))
+    return num_samples, peak
+
+
+def preprocess_stream(path, sample_rate=TARGET_SAMPLE_RATE, normalize=False, cutoff=3000, gain_db=5.0,
+                      window_seconds=30.0, peak=None):
+    """
+    preprocess() 와 같은 결과를 윈도우 단위로 생성 (파일 길이와 무관하게 메모리 일정)
+
+    피크 정규화에는 전체 피크가 필요하므로 normalize=True 이고 peak 가 없으면
+    scan_audio() 로 한 번 더 디코딩한다. Low-pass 필터 상태는 윈도우 사이에 이어진다.
+
+    Args:
+        path (str): 입력 파일 경로
+        sample_rate (int): 출력 샘플링 레이트
+        normalize (bool): 피크 정규화 여부
+        cutoff (float | None): Low-pass 차단 주파수 (None 이면 생략)
+        gain_db (float): 음량 증폭 (dB)
+        window_seconds (float): 윈도우 길이 (초)
+        peak (float): scan_audio() 로 미리 구한 피크
+
+    Yields:
+        numpy.ndarray: 전처리된 (샘플,) float32 배열
+    """
+    scale = 1.0
+    if normalize:
+        if peak is None:
+            _, peak = scan_audio(path, sample_rate, window_seconds)
+        if peak > 0.0:
+            scale = 10 ** (-0.1 / 20) / peak
+
+    b, a = low_pass_coefficients(cutoff, sample_rate) if cutoff else (None, None)
+    zi = None
+    for chunk in stream_audio(path, window_seconds, sample_rate):
+        if chunk.size == 0:
+            continue
+        audio = chunk * scale if scale != 1.0 else chunk
+        if cutoff:
+            if zi is None:
+                # low_pass() 와 같은 초기 상태 (첫 출력 샘플 = 첫 입력 샘플)
+                zi = np.array([(1.0 - b[0]) * audio[0]])
+            audio, zi = lfilter(b, a, audio, zi=zi)
+        if gain_db:
+            audio = apply_gain(audio, gain_db)
+        yield audio.astype(np.float32)
+
+
+def to_pyannote_input(audio, sample_rate=TARGET_SAMPLE_RATE):
+    """pyannote Pipeline 이 받는 메모리 입력 형식 {'waveform': (1, 샘플) Tensor, 'sample_rate'}"""
+    import torch
+
+    return {
+        "waveform": torch.from_numpy(np.ascontiguousarray(to_mono(audio))).unsqueeze(0),
+        "sample_rate": sample_rate,
+    }
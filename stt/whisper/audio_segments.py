@@ -0,0 +1,129 @@
+# 화자 분리 구간(turn) 추출
+#
+# 전체 길이 무음 버퍼(torch.zeros_like)에 구간을 복사해 파일로 저장하는 대신,
+# 메모리상의 파형에서 [start_sample:end_sample] 뷰만 잘라 WAV 바이트로 인식기에 넘긴다.
+
+import io
+import struct
+import wave
+
+import numpy as np
+
+
+def time_to_sample_range(start_time, end_time, sample_rate, total_samples, pad_seconds=0.0):
+    """
+    구간 시간(초)을 파형 범위 안의 샘플 인덱스로 변환
+
+    Args:
+        start_time (float): 시작 시간 (초)
+        end_time (float): 종료 시간 (초)
+        sample_rate (int): 샘플링 레이트
+        total_samples (int): 전체 샘플 수
+        pad_seconds (float): 구간 앞뒤에 붙일 여유 시간 (초)
+
+    Returns:
+        tuple: (start_sample, end_sample)
+    """
+    start_sample = int((start_time - pad_seconds) * sample_rate)
+    end_sample = int((end_time + pad_seconds) * sample_rate)
+
+    # 오디오 길이를 벗어나지 않도록 조정
+    start_sample = max(0, min(start_sample, total_samples - 1))
+    end_sample = max(start_sample + 1, min(end_sample, total_samples))
+    return start_sample, end_sample
+
+
+def extract_segment(waveform, start_time, end_time, sample_rate, pad_seconds=0.0):
+    """
+    파형에서 구간 하나를 복사 없이 잘라냄
+
+    Args:
+        waveform: (채널, 샘플) 형태의 torch.Tensor 또는 numpy 배열
+        start_time (float): 시작 시간 (초)
+        end_time (float): 종료 시간 (초)
+        sample_rate (int): 샘플링 레이트
+        pad_seconds (float): 구간 앞뒤 패딩 (초)
+
+    Returns:
+        (채널, 구간 샘플) 형태의 뷰
+    """
+    start_sample, end_sample = time_to_sample_range(
+        start_time, end_time, sample_rate, waveform.shape[-1], pad_seconds
+    )
+    return waveform[..., start_sample:end_sample]
+
+
+def concat_segments(waveform, segments, sample_rate, pad_seconds=0.0, gap_seconds=0.0):
+    """
+    여러 구간만 이어붙인 짧은 트랙 생성 (전체 길이 버퍼를 만들지 않음)
+
+    Args:
+        waveform: (채널, 샘플) 형태의 파형
+        segments (list): (start_time, end_time) 목록
+        sample_rate (int): 샘플링 레이트
+        pad_seconds (float): 구간별 앞뒤 패딩 (초)
+        gap_seconds (float): 구간 사이에 넣을 무음 길이 (초)
+
+    Returns:
+        numpy.ndarray: (채널, 샘플) 형태의 float32 배열
+    """
+    channels = waveform.shape[0] if len(waveform.shape) > 1 else 1
+    gap = np.zeros((channels, int(gap_seconds * sample_rate)), dtype=np.float32)
+
+    pieces = []
+    for i, (start_time, end_time) in enumerate(segments):
+        if i > 0 and gap.shape[1] > 0:
+            pieces.append(gap)
+        piece = extract_segment(waveform, start_time, end_time, sample_rate, pad_seconds)
+        pieces.append(np.asarray(piece, dtype=np.float32).reshape(channels, -1))
+
+    if not pieces:
+        return np.zeros((channels, 0), dtype=np.float32)
+    return np.concatenate(pieces, axis=1)
+
+
+def to_pcm16(audio):
+    """-1.0~1.0 float 파형을 16bit PCM 바이트로 변환 (스테레오는 모노로)"""
+    audio = np.asarray(audio, dtype=np.float32)
+    if audio.ndim == 2:
+        # 스테레오는 모노로 변환 (whisper 입력 형식)
+        audio = audio.mean(axis=0)
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+
+
+def wav_header(num_samples, sample_rate):
+    """
+    16bit 모노 WAV 헤더 (44바이트)
+
+    전체 파형을 메모리에 두지 않고 헤더 뒤에 to_pcm16() 청크를 이어 써서
+    WAV 스트림을 만들 때 사용한다. 샘플 수는 미리 알고 있어야 한다.
+    """
+    data_size = num_samples * 2
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b"data", data_size,
+    )
+
+
+def to_wav_bytes(audio, sample_rate):
+    """
+    float 파형을 16bit 모노 WAV 바이트로 변환 (임시 파일 없이 인식기에 전달용)
+
+    Args:
+        audio: (채널, 샘플) 또는 (샘플,) 형태의 -1.0~1.0 범위 파형
+        sample_rate (int): 샘플링 레이트
+
+    Returns:
+        bytes: WAV 파일 내용
+    """
+    pcm = to_pcm16(audio)
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm)
+    return buffer.getvalue()
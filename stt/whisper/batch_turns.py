@@ -0,0 +1,122 @@
+# 한 파일의 화자 구간(turn)을 하나의 버퍼로 묶어 한 번에 변환
+#
+# 구간들을 짧은 무음으로 이어붙여 whisper 를 한 번만 호출하고,
+# 출력 세그먼트(또는 단어)의 타임스탬프를 원래 구간/화자로 되돌려 매핑한다.
+# 호출별 시작 비용이 없어지고 whisper 가 구간 간 문맥을 활용할 수 있다.
+
+import numpy as np
+
+from audio_segments import extract_segment
+
+
+def build_batch(waveform, turns, sample_rate, gap_seconds=0.5, pad_seconds=0.0):
+    """
+    구간들을 무음 간격으로 이어붙인 버퍼와 오프셋 표 생성
+
+    Args:
+        waveform: (채널, 샘플) 형태의 파형
+        turns (list): 'speaker', 'start_time', 'end_time' 을 가진 구간 dict 목록 (시간 순서)
+        sample_rate (int): 샘플링 레이트
+        gap_seconds (float): 구간 사이 무음 길이 (초)
+        pad_seconds (float): 구간별 앞뒤 패딩 (초)
+
+    Returns:
+        tuple: (numpy.ndarray 모노 float32 버퍼, 오프셋 목록)
+            오프셋은 {'turn': 구간 인덱스, 'batch_start', 'batch_end'} (버퍼 기준 초)
+    """
+    gap = np.zeros(int(gap_seconds * sample_rate), dtype=np.float32)
+
+    pieces = []
+    offsets = []
+    cursor = 0
+    for i, turn in enumerate(turns):
+        if i > 0 and gap.size > 0:
+            pieces.append(gap)
+            cursor += gap.size
+        piece = np.asarray(
+            extract_segment(waveform, turn['start_time'], turn['end_time'], sample_rate, pad_seconds),
+            dtype=np.float32,
+        )
+        if piece.ndim == 2:
+            piece = piece.mean(axis=0)
+        pieces.append(piece)
+        offsets.append({
+            'turn': i,
+            'batch_start': cursor / sample_rate,
+            'batch_end': (cursor + piece.size) / sample_rate,
+        })
+        cursor += piece.size
+
+    audio = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+    return audio, offsets
+
+
+def find_turn(offsets, start, end):
+    """버퍼 기준 [start, end] 구간과 가장 많이 겹치는(없으면 가장 가까운) 구간 인덱스"""
+    best_turn = None
+    best_score = None
+    for offset in offsets:
+        overlap = min(end, offset['batch_end']) - max(start, offset['batch_start'])
+        if overlap > 0:
+            score = overlap
+        else:
+            # 겹치지 않으면 무음 간격 안에 있는 것 - 거리의 음수로 비교
+            score = -min(abs(start - offset['batch_end']), abs(offset['batch_start'] - end))
+        if best_score is None or score > best_score:
+            best_score = score
+            best_turn = offset['turn']
+    return best_turn
+
+
+def assign_segments(segments, offsets, turn_count):
+    """
+    버퍼 기준 whisper 출력 세그먼트를 원래 구간별 텍스트로 되돌림
+
+    단어 타임스탬프가 있으면 단어 단위로, 없으면 세그먼트 단위로 구간을 찾는다.
+
+    Args:
+        segments (list): {'start', 'end', 'text', 'words'} 세그먼트 목록
+        offsets (list): build_batch 가 반환한 오프셋 목록
+        turn_count (int): 구간 수
+
+    Returns:
+        list: 구간 인덱스별 텍스트
+    """
+    pieces = [[] for _ in range(turn_count)]
+    for segment in segments:
+        words = [w for w in segment.get('words', []) if 'start' in w and 'end' in w]
+        if words:
+            for word in words:
+                turn = find_turn(offsets, float(word['start']), float(word['end']))
+                pieces[turn].append(word.get('word', ''))
+        elif segment['text']:
+            turn = find_turn(offsets, segment['start'], segment['end'])
+            pieces[turn].append(" " + segment['text'])
+
+    return ["".join(piece).strip() for piece in pieces]
+
+
+def transcribe_batched(transcribe_segments_fn, waveform, turns, sample_rate, to_wav_fn,
+                       gap_seconds=0.5, pad_seconds=0.0):
+    """
+    구간 전체를 한 번의 호출로 변환
+
+    Args:
+        transcribe_segments_fn (callable): WAV 바이트(또는 버퍼)를 받아 타임스탬프 세그먼트 목록을 반환
+        waveform: (채널, 샘플) 형태의 파형
+        turns (list): 구간 dict 목록 (시간 순서)
+        sample_rate (int): 샘플링 레이트
+        to_wav_fn (callable): (버퍼, 샘플링 레이트) -> WAV 바이트 (None 이면 버퍼를 그대로 전달)
+        gap_seconds (float): 구간 사이 무음 길이 (초)
+        pad_seconds (float): 구간별 앞뒤 패딩 (초)
+
+    Returns:
+        list: 'text' 가 추가된 구간 dict 목록 (시간 순서)
+    """
+    if not turns:
+        return []
+    audio, offsets = build_batch(waveform, turns, sample_rate, gap_seconds, pad_seconds)
+    print(f"구간 {len(turns)}개를 {audio.size / sample_rate:.1f}초 버퍼 하나로 변환 중...")
+    segments = transcribe_segments_fn(to_wav_fn(audio, sample_rate) if to_wav_fn else audio)
+    texts = assign_segments(segments, offsets, len(turns))
+    return [dict(turn, text=text) for turn, text in zip(turns, texts)]
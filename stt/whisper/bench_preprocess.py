@@ -0,0 +1,73 @@
+# pydub 전처리 체인 vs numpy/scipy 전처리 속도 비교
+#
+# 사용법:
+#   python bench_preprocess.py                      # 30분 합성 음성으로 측정
+#   python bench_preprocess.py test.audio/test9.mp3 # 실제 파일로 측정
+#
+# 두 경로 모두 같은 16kHz 모노 입력에서 시작해 정규화 → Low-pass 3000Hz → +5dB 를 수행한다.
+# (pydub 의 low_pass_filter 는 샘플 단위 파이썬 루프라 30분 파일에서 수 분이 걸릴 수 있다)
+
+import argparse
+import time
+
+import numpy as np
+from pydub import AudioSegment
+from pydub.effects import normalize, low_pass_filter
+
+from audio_preprocess import TARGET_SAMPLE_RATE, load_audio, preprocess
+
+
+def synthetic_audio(minutes, sample_rate=TARGET_SAMPLE_RATE):
+    """음성 대역 톤 + 잡음으로 된 합성 오디오"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(minutes * 60 * sample_rate)) / sample_rate
+    audio = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.05 * rng.standard_normal(t.size)
+    return audio.astype(np.float32)
+
+
+def run_pydub(audio):
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+    segment = AudioSegment(pcm.tobytes(), frame_rate=TARGET_SAMPLE_RATE, sample_width=2, channels=1)
+    segment = normalize(segment)
+    segment = low_pass_filter(segment, 3000)
+    segment = segment + 5
+    return np.array(segment.get_array_of_samples(), dtype=np.float32) / 32768
+
+
+def run_numpy(audio):
+    return preprocess(audio, TARGET_SAMPLE_RATE, normalize=True, cutoff=3000, gain_db=5.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오디오 전처리 벤치마크 (pydub vs numpy)")
+    parser.add_argument("input_file", nargs="?", help="측정용 오디오 파일 (없으면 합성 오디오)")
+    parser.add_argument("--minutes", type=float, default=30.0, help="합성 오디오 길이 (기본값: 30분)")
+    parser.add_argument("--skip-pydub", action="store_true", help="pydub 경로 측정 생략")
+    args = parser.parse_args()
+
+    if args.input_file:
+        audio = load_audio(args.input_file, TARGET_SAMPLE_RATE)
+    else:
+        audio = synthetic_audio(args.minutes)
+    duration = audio.size / TARGET_SAMPLE_RATE
+    print(f"입력 길이: {duration / 60:.1f}분 ({audio.size} 샘플)")
+
+    start = time.time()
+    numpy_result = run_numpy(audio)
+    numpy_time = time.time() - start
+    print(f"numpy/scipy: {numpy_time:.2f}초 (실시간 대비 {duration / numpy_time:.0f}배)")
+
+    if not args.skip_pydub:
+        start = time.time()
+        pydub_result = run_pydub(audio)
+        pydub_time = time.time() - start
+        print(f"pydub      : {pydub_time:.2f}초 (실시간 대비 {duration / pydub_time:.0f}배)")
+        print(f"속도 향상  : {pydub_time / numpy_time:.1f}배")
+
+        # 두 결과의 차이 (int16 양자화 오차 수준이어야 함)
+        diff = np.abs(numpy_result[:pydub_result.size] - pydub_result)
+        print(f"최대 차이: {diff.max():.5f}, 평균 차이: {diff.mean():.6f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# 음성 인식 엔진별 정확도(WER/CER)·속도(RTF)·메모리(peak RSS)·모델 로딩 시간 비교
+#
+# 사용법:
+#   python bench_transcribers.py ./samples
+#   python bench_transcribers.py ./samples --engines whisper.cpp faster-whisper --whisper-cpp-backend server
+#   python bench_transcribers.py ./samples --json bench_result.json
+#
+# 샘플 폴더에는 오디오 파일과 같은 이름의 정답 텍스트(.txt)를 둔다 (text_metrics.load_samples).
+# 엔진마다 별도 프로세스에서 실행해 peak RSS 가 서로 섞이지 않게 하고, 설치되지 않았거나
+# 모델이 없는 엔진은 사유를 출력하고 건너뛴다.
+# RTF 는 디코딩 시간 / 오디오 길이 (오디오 파일 디코딩과 모델 로딩 시간은 제외).
+# peak RSS 는 엔진 프로세스와 그 자식 프로세스(whisper-cli / whisper-server) 중 큰 값이다.
+
+import argparse
+import json
+import multiprocessing
+import queue
+import sys
+import time
+
+from audio_preprocess import TARGET_SAMPLE_RATE, load_audio
+from text_metrics import wer, cer, load_samples
+from transcribers import TRANSCRIBERS, create_transcriber
+from whisper_backend import BACKENDS, segments_to_text
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """현재 프로세스와 종료된 자식 프로세스 중 가장 큰 최대 RSS (MB, 측정 불가면 None)"""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss 단위: Linux 는 KB, macOS 는 바이트
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_engine(name, options, audio_paths, warmup, result_queue):
+    """
+    엔진 하나를 로딩해 전체 샘플 변환 (벤치마크 하위 프로세스에서 실행)
+
+    Args:
+        name (str): 엔진 이름 (TRANSCRIBERS 키)
+        options (dict): 엔진 생성자 인자
+        audio_paths (list): 샘플 오디오 경로 목록
+        warmup (bool): 측정 전에 첫 샘플을 한 번 변환 (첫 호출 초기화 비용 제외)
+        result_queue: 결과 dict 를 넣을 큐
+    """
+    try:
+        transcriber = create_transcriber(name, **options)
+        transcriber.load()
+        try:
+            audios = [load_audio(path, TARGET_SAMPLE_RATE) for path in audio_paths]
+            if warmup and audios:
+                transcriber.transcribe(audios[0])
+
+            texts = []
+            decode_seconds = 0.0
+            for path, audio in zip(audio_paths, audios):
+                start = time.perf_counter()
+                segments = transcriber.transcribe(audio)
+                decode_seconds += time.perf_counter() - start
+                texts.append(segments_to_text(segments))
+                print(f"  [{name}] {path}: {time.perf_counter() - start:.1f}초")
+        finally:
+            transcriber.close()
+
+        result_queue.put({
+            'load_seconds': transcriber.load_seconds,
+            'decode_seconds': decode_seconds,
+            'audio_seconds': sum(audio.size for audio in audios) / TARGET_SAMPLE_RATE,
+            'texts': texts,
+            'peak_rss_mb': peak_rss_mb(),
+        })
+    except Exception as e:
+        result_queue.put({'error': f"{type(e).__name__}: {e}"})
+
+
+def benchmark_engine(name, options, samples, warmup):
+    """엔진 하나를 새 프로세스에서 실행하고 WER/CER/RTF 계산"""
+    # fork 로 부모의 메모리를 물려받으면 RSS 가 부풀려지므로 spawn 사용
+    context = multiprocessing.get_context("spawn")
+    result_queue = context.Queue()
+    process = context.Process(target=run_engine,
+                              args=(name, options, [path for path, _ in samples], warmup, result_queue))
+    process.start()
+    while True:
+        try:
+            result = result_queue.get(timeout=1.0)
+            break
+        except queue.Empty:
+            # 메모리 부족 등으로 결과 없이 죽은 경우
+            if not process.is_alive():
+                result = {'error': f"프로세스 비정상 종료 (종료 코드 {process.exitcode})"}
+                break
+    process.join()
+
+    if 'error' in result:
+        return result
+    reference_all = " ".join(reference for _, reference in samples)
+    hypothesis_all = " ".join(result['texts'])
+    result.update({
+        'wer': wer(reference_all, hypothesis_all),
+        'cer': cer(reference_all, hypothesis_all),
+        'rtf': result['decode_seconds'] / result['audio_seconds'] if result['audio_seconds'] > 0 else 0.0,
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="음성 인식 엔진별 WER/CER/RTF/메모리/로딩 시간 벤치마크")
+    parser.add_argument("sample_dir", help="오디오 + 정답 텍스트(.txt) 샘플 폴더")
+    parser.add_argument("--engines", nargs="+", default=list(TRANSCRIBERS), choices=list(TRANSCRIBERS),
+                        help=f"측정할 엔진 (기본값: 전체 - {' '.join(TRANSCRIBERS)})")
+    parser.add_argument("--language", default="ko", help="인식 언어 (기본값: ko)")
+    parser.add_argument("--whisper-cpp-backend", choices=BACKENDS, default="cli",
+                        help="whisper.cpp 백엔드 (기본값: cli)")
+    parser.add_argument("--preset", default="accurate", help="faster-whisper 디코딩 프리셋 (기본값: accurate)")
+    parser.add_argument("--batch-size", type=int, default=0, help="faster-whisper 배치 크기 (0 = 순차 디코딩)")
+    parser.add_argument("--warmup", action="store_true", help="측정 전에 첫 샘플을 한 번 변환")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+
+    samples = load_samples(args.sample_dir)
+    if not samples:
+        print(f"샘플이 없습니다: {args.sample_dir}")
+        return
+
+    engine_options = {
+        'whisper.cpp': dict(backend=args.whisper_cpp_backend),
+        'faster-whisper': dict(preset=args.preset, batch_size=args.batch_size),
+    }
+
+    results = {}
+    for name in args.engines:
+        print(f"\n=== {name} ===")
+        options = dict(engine_options.get(name, {}), language=args.language)
+        result = benchmark_engine(name, options, samples, args.warmup)
+        if 'error' in result:
+            print(f"  사용할 수 없어 건너뜀: {result['error']}")
+        results[name] = result
+
+    print(f"\n=== 결과 (샘플 {len(samples)}개) ===")
+    print(f"{'엔진':<16}{'WER':>8}{'CER':>8}{'RTF':>8}{'로딩(초)':>10}{'peak RSS(MB)':>14}")
+    for name, result in results.items():
+        if 'error' in result:
+            print(f"{name:<16}{'-':>8}{'-':>8}{'-':>8}{'-':>10}{'-':>14}")
+            continue
+        rss = f"{result['peak_rss_mb']:.0f}" if result['peak_rss_mb'] is not None else "-"
+        print(f"{name:<16}{result['wer']:>8.3f}{result['cer']:>8.3f}{result['rtf']:>8.3f}"
+              f"{result['load_seconds']:>10.1f}{rss:>14}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({'samples': [path for path, _ in samples], 'results': results}, f,
+                      ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# KoreanSpeechToText fp32 vs CPU 최적화(SDPA + int8 동적 양자화) 비교 및 CER 회귀 검사
+#
+# 사용법:
+#   python bench_transformers_cpu.py ./samples
+#   python bench_transformers_cpu.py ./samples --threads 8 --cpu-affinity 0 1 2 3 4 5 6 7 --max-cer-increase 0.01
+#
+# 샘플 폴더 형식과 측정 방식(엔진마다 별도 프로세스, RTF/peak RSS/로딩 시간)은 bench_transcribers.py 와 같다.
+# int8 모드의 CER 이 fp32 보다 --max-cer-increase 넘게 나빠지면 종료 코드 1 을 반환한다.
+
+import argparse
+import sys
+
+from bench_transcribers import benchmark_engine
+from text_metrics import load_samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="transformers Whisper fp32 vs CPU int8 벤치마크")
+    parser.add_argument("sample_dir", help="오디오 + 정답 텍스트(.txt) 샘플 폴더")
+    parser.add_argument("--model", default="openai/whisper-large-v3", help="모델 이름")
+    parser.add_argument("--threads", type=int, default=None, help="torch 스레드 수 (기본값: torch 기본값)")
+    parser.add_argument("--cpu-affinity", nargs="+", type=int, default=None, help="고정할 CPU 코어 번호 (Linux)")
+    parser.add_argument("--batch-size", type=int, default=8, help="generate 배치 크기 (기본값: 8)")
+    parser.add_argument("--max-cer-increase", type=float, default=0.02,
+                        help="int8 모드의 허용 CER 증가량 (기본값: 0.02)")
+    parser.add_argument("--warmup", action="store_true", help="측정 전에 첫 샘플을 한 번 변환")
+    args = parser.parse_args()
+
+    samples = load_samples(args.sample_dir)
+    if not samples:
+        print(f"샘플이 없습니다: {args.sample_dir}")
+        return
+
+    common = dict(model_name=args.model, batch_size=args.batch_size,
+                  num_threads=args.threads, cpu_affinity=args.cpu_affinity)
+    modes = {
+        'fp32': dict(common, cpu_optimized=False),
+        'int8': dict(common, cpu_optimized=True),
+    }
+
+    results = {}
+    for mode, options in modes.items():
+        print(f"\n=== {mode} ===")
+        results[mode] = benchmark_engine("transformers", options, samples, args.warmup)
+        if 'error' in results[mode]:
+            print(f"실행 실패: {results[mode]['error']}")
+            sys.exit(1)
+
+    print(f"\n=== 결과 (샘플 {len(samples)}개, {args.model}) ===")
+    print(f"{'모드':<8}{'로딩(초)':>10}{'RTF':>8}{'CER':>8}{'WER':>8}{'peak RSS(MB)':>14}")
+    for mode, result in results.items():
+        rss = f"{result['peak_rss_mb']:.0f}" if result['peak_rss_mb'] is not None else "-"
+        print(f"{mode:<8}{result['load_seconds']:>10.1f}{result['rtf']:>8.3f}{result['cer']:>8.3f}"
+              f"{result['wer']:>8.3f}{rss:>14}")
+
+    fp32, int8 = results['fp32'], results['int8']
+    if int8['rtf'] > 0:
+        print(f"\n속도 향상: {fp32['rtf'] / int8['rtf']:.2f}배, 로딩 시간 {fp32['load_seconds']:.1f}초 → "
+              f"{int8['load_seconds']:.1f}초")
+    cer_increase = int8['cer'] - fp32['cer']
+    print(f"CER 변화: {fp32['cer']:.3f} → {int8['cer']:.3f} ({cer_increase:+.3f}, 허용 {args.max_cer_increase:+.3f})")
+    if cer_increase > args.max_cer_increase:
+        print("❌ int8 모드의 정확도 저하가 허용 범위를 넘었습니다.")
+        sys.exit(1)
+    print("✅ 정확도 저하가 허용 범위 안입니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# 기존 has_speech 프레임 루프 vs VoiceActivityDetector 처리 속도 비교
+#
+# 사용법:
+#   python bench_vad.py                       # 1시간 합성 오디오 (말소리 구간 + 무음)
+#   python bench_vad.py test.audio/test9.mp3  # 실제 파일
+#
+# 두 경로 모두 16kHz int16 버퍼 전체를 30ms 프레임으로 판정하고 frames/sec 를 출력한다.
+
+import argparse
+import time
+
+import numpy as np
+
+from audio_preprocess import TARGET_SAMPLE_RATE, load_audio
+from vad import VoiceActivityDetector, to_int16, webrtcvad
+
+
+def synthetic_audio(minutes, sample_rate=TARGET_SAMPLE_RATE):
+    """2~6초 발화(잡음 변조 톤)와 1~4초 무음이 번갈아 나오는 합성 오디오"""
+    rng = np.random.default_rng(0)
+    total = int(minutes * 60 * sample_rate)
+    audio = np.zeros(total, dtype=np.float32)
+    position = 0
+    while position < total:
+        position += int(rng.uniform(1, 4) * sample_rate)
+        length = min(total - position, int(rng.uniform(2, 6) * sample_rate))
+        if length <= 0:
+            break
+        t = np.arange(length) / sample_rate
+        voice = np.sin(2 * np.pi * 180 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 4 * t))
+        audio[position:position + length] = 0.3 * voice + 0.02 * rng.standard_normal(length)
+        position += length
+    return audio
+
+
+def run_legacy(pcm, sample_rate=TARGET_SAMPLE_RATE):
+    """기존 has_speech 와 같은 방식 (프레임마다 슬라이스 + tobytes, 파이썬 루프)"""
+    vad = webrtcvad.Vad(2)
+    frame_size = int(sample_rate * 30 / 1000)
+    speech_frames = 0
+    for i in range(0, len(pcm) - frame_size, frame_size):
+        frame = pcm[i:i + frame_size]
+        if len(frame) == frame_size and vad.is_speech(frame.tobytes(), sample_rate):
+            speech_frames += 1
+    return speech_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VAD 처리 속도 벤치마크 (frames/sec)")
+    parser.add_argument("input_file", nargs="?", help="측정용 오디오 파일 (없으면 합성 오디오)")
+    parser.add_argument("--minutes", type=float, default=60.0, help="합성 오디오 길이 (기본값: 60분)")
+    args = parser.parse_args()
+
+    audio = load_audio(args.input_file) if args.input_file else synthetic_audio(args.minutes)
+    pcm = to_int16(audio)
+    duration = pcm.size / TARGET_SAMPLE_RATE
+    detector = VoiceActivityDetector(sample_rate=TARGET_SAMPLE_RATE)
+    frame_count = pcm.size // detector.frame_size
+    print(f"입력 길이: {duration / 60:.1f}분, 30ms 프레임 {frame_count}개")
+
+    start = time.time()
+    flags = detector.speech_flags(pcm)
+    # segments() 는 speech_flags() 를 다시 실행하므로 이미 구한 판정 결과에서 구간을 만듦
+    segments = detector.flags_to_segments(flags)
+    new_time = time.time() - start
+    gated = frame_count - int(np.count_nonzero(detector.frame_energy_db(detector.frame_view(pcm))
+                                               > detector.energy_threshold_db))
+    print(f"VoiceActivityDetector: {new_time:.2f}초, {frame_count / new_time:,.0f} frames/sec "
+          f"(음성 프레임 {int(flags.sum())}개, 구간 {len(segments)}개, 에너지 게이트로 제외 {gated}개)")
+
+    if webrtcvad is None:
+        print("webrtcvad 가 설치되지 않아 기존 방식 측정은 생략합니다 (에너지 게이트만 사용).")
+        return
+
+    start = time.time()
+    legacy_speech = run_legacy(pcm)
+    legacy_time = time.time() - start
+    print(f"기존 프레임 루프      : {legacy_time:.2f}초, {frame_count / legacy_time:,.0f} frames/sec "
+          f"(음성 프레임 {legacy_speech}개)")
+    print(f"속도 향상: {legacy_time / new_time:.1f}배")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# whisper-cli 세그먼트별 실행 vs whisper-server 워커 풀 처리량 비교
+#
+# 사용법:
+#   python bench_whisper_pool.py test.audio/sample16k.wav --segments 20 --segment-seconds 8
+#
+# 입력 WAV(16kHz 권장)를 일정 길이 세그먼트로 잘라 두 경로로 변환하고 segments/sec 를 출력한다.
+
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+import wave
+
+from whisper_server_pool import WhisperServerPool, default_pool_size
+
+
+def split_wav(input_path, output_dir, segments, segment_seconds):
+    """
+    WAV 파일을 고정 길이 세그먼트 파일들로 분할
+
+    Returns:
+        list: 세그먼트 WAV 파일 경로 목록
+    """
+    paths = []
+    with wave.open(input_path, "rb") as src:
+        params = src.getparams()
+        frames_per_segment = int(segment_seconds * src.getframerate())
+        total_frames = src.getnframes()
+        for i in range(segments):
+            start = (i * frames_per_segment) % max(1, total_frames - frames_per_segment)
+            src.setpos(start)
+            data = src.readframes(frames_per_segment)
+            path = os.path.join(output_dir, f"bench_segment_{i}.wav")
+            with wave.open(path, "wb") as dst:
+                dst.setparams(params)
+                dst.writeframes(data)
+            paths.append(path)
+    return paths
+
+
+def run_per_call(cli_path, model_path, paths, threads, cwd):
+    """현재 run.py 방식: 세그먼트마다 whisper-cli 실행 (매번 모델 로딩)"""
+    for path in paths:
+        subprocess.run([cli_path, "-l", "ko", "-m", model_path, "-t", str(threads), path],
+                       capture_output=True, text=True, cwd=cwd)
+
+
+def run_pool(pool, paths):
+    """상주 서버 풀 방식: 모든 세그먼트를 큐에 넣고 완료 대기"""
+    futures = [pool.submit(path) for path in paths]
+    for future in futures:
+        future.result()
+
+
+def main():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="whisper-cli vs whisper-server 풀 처리량 벤치마크")
+    parser.add_argument("input_wav", help="벤치마크용 16kHz WAV 파일")
+    parser.add_argument("--segments", type=int, default=20, help="세그먼트 개수 (기본값: 20)")
+    parser.add_argument("--segment-seconds", type=float, default=8.0, help="세그먼트 길이 (기본값: 8초)")
+    parser.add_argument("--threads", type=int, default=4, help="워커당 스레드 수 (기본값: 4)")
+    parser.add_argument("--pool-size", type=int, default=0, help="워커 수 (0이면 CPU 코어 기준)")
+    parser.add_argument("--cli", default="./whisper.cpp_local/whisper-cli")
+    parser.add_argument("--server", default="./whisper.cpp_local/whisper-server")
+    parser.add_argument("--model", default="./whisper.cpp_local/model/ggml-large-v2-q8_0.bin")
+    parser.add_argument("--skip-per-call", action="store_true", help="whisper-cli 경로 측정 생략")
+    args = parser.parse_args()
+
+    pool_size = args.pool_size or default_pool_size(args.threads)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = split_wav(args.input_wav, tmp_dir, args.segments, args.segment_seconds)
+        print(f"세그먼트 {len(paths)}개 x {args.segment_seconds}초 준비 완료")
+
+        results = {}
+
+        if not args.skip_per_call:
+            print("\n=== whisper-cli 세그먼트별 실행 ===")
+            start = time.time()
+            run_per_call(args.cli, args.model, paths, args.threads, current_dir)
+            results["per-call"] = time.time() - start
+
+        print(f"\n=== whisper-server 풀 (워커 {pool_size}개) ===")
+        pool = WhisperServerPool(args.server, args.model, pool_size=pool_size,
+                                 threads_per_worker=args.threads, cwd=current_dir)
+        load_start = time.time()
+        with pool:
+            load_time = time.time() - load_start
+            start = time.time()
+            run_pool(pool, paths)
+            results["pool"] = time.time() - start
+        results["pool+load"] = results["pool"] + load_time
+        print(f"  모델 로딩(1회): {load_time:.1f}초")
+
+    print("\n=== 결과 ===")
+    for name, elapsed in results.items():
+        print(f"{name:>10}: {elapsed:.1f}초, {len(paths) / elapsed:.2f} segments/sec")
+    if "per-call" in results:
+        print(f"  속도 향상: {results['per-call'] / results['pool']:.1f}배")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# run.py 대화 텍스트 결과 두 개 비교 (예: per_turn 모드 vs batched 모드)
+#
+# 사용법:
+#   TURN_TRANSCRIBE_MODE=per_turn python run.py
+#   TURN_TRANSCRIBE_MODE=batched python run.py
+#   python compare_transcripts.py speakers_output_text/<per_turn>.txt speakers_output_text/<batched>.txt
+#
+# 같은 (화자, 시작, 종료) 구간끼리 맞춰 구간별/전체 CER 을 출력한다.
+
+import argparse
+import re
+import sys
+
+from text_metrics import cer
+
+# 화자 인덱스 이름은 공백을 포함할 수 있으므로 화자는 " (시작s - 끝s)" 앞까지
+LINE_PATTERN = re.compile(r"^Speaker (.+?) \((\d+\.\d+)s - (\d+\.\d+)s\): (.*)$")
+
+
+def load_conversation(path):
+    """
+    run.py 대화 텍스트 파일 파싱
+
+    Returns:
+        dict: (speaker, start, end) -> text
+    """
+    turns = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            match = LINE_PATTERN.match(line.strip())
+            if match:
+                speaker, start, end, text = match.groups()
+                turns[(speaker, start, end)] = text
+    return turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="run.py 대화 텍스트 결과 비교")
+    parser.add_argument("reference", help="기준 결과 파일 (예: per_turn 모드)")
+    parser.add_argument("hypothesis", help="비교 대상 결과 파일 (예: batched 모드)")
+    parser.add_argument("--max-cer", type=float, default=None,
+                        help="전체 CER 이 이 값을 넘으면 종료 코드 1 반환")
+    args = parser.parse_args()
+
+    reference = load_conversation(args.reference)
+    hypothesis = load_conversation(args.hypothesis)
+
+    keys = sorted(set(reference) | set(hypothesis), key=lambda k: float(k[1]))
+    ref_all = []
+    hyp_all = []
+    for key in keys:
+        ref_text = reference.get(key, "")
+        hyp_text = hypothesis.get(key, "")
+        ref_all.append(ref_text)
+        hyp_all.append(hyp_text)
+        speaker, start, end = key
+        print(f"Speaker {speaker} ({start}s - {end}s) CER {cer(ref_text, hyp_text):.3f}")
+        if ref_text != hyp_text:
+            print(f"  기준: {ref_text}")
+            print(f"  비교: {hyp_text}")
+
+    total_cer = cer(" ".join(ref_all), " ".join(hyp_all))
+    print(f"\n구간 수: 기준 {len(reference)}, 비교 {len(hypothesis)}, 공통 {len(set(reference) & set(hypothesis))}")
+    print(f"전체 CER: {total_cer:.3f}")
+
+    if args.max_cer is not None and total_cer > args.max_cer:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
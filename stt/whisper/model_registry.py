@@ -0,0 +1,331 @@
+# 모델 레지스트리 (처음 사용할 때 로딩, 프로세스 안에서 재사용, 메모리 상한 초과 시 오래 안 쓴 모델 해제)
+#
+# 진입점마다 모델 보관 방식이 달랐다.
+#   speech_to_text_final.py : 모듈 전역 _whisper_model 싱글톤
+#   KoreanSpeechToText      : __init__ 에서 바로 로딩
+#   run_qwen2.py / run.py   : import 시점(스크립트 최상위)에서 로딩
+# 여기서는 (모델, 디바이스, 연산 타입) 키로 모델을 한 곳에 보관한다.
+#
+#   registry = get_registry()
+#   model = registry.get("large-v2", lambda: WhisperModel("large-v2"), device="cpu", compute_type="int8")
+#
+# - get() 은 처음 호출될 때만 loader 를 실행하고 이후에는 같은 객체를 돌려준다 (키별 잠금으로 중복 로딩 방지)
+# - 추론하는 동안은 using() 블록으로, 백엔드처럼 모델을 오래 들고 있는 객체는 acquire()/release() 로
+#   사용 중 표시를 해둔다. 사용 중인 모델은 메모리 상한으로 해제하지 않는다
+#   (해제 후 다음 get() 이 두 번째 사본을 올려 오히려 메모리를 더 쓰는 것을 막음)
+# - holds 로 지정한 모델(예: 배치 파이프라인 안의 WhisperModel)은 그 모델을 참조하는 항목이 있는 동안 사용 중으로 둔다
+# - warmup() 은 미리 로딩하고 선택적으로 더미 추론까지 실행한다 (pin=True 면 메모리 상한으로 해제하지 않음)
+# - 로딩 후 전체 크기가 상한(MODEL_REGISTRY_MAX_MB)을 넘으면 사용 중이 아닌 모델부터 LRU 순서로 해제한다
+# - print_report() 로 모델별 로딩 시간, 상주 크기, 사용 횟수, 유휴 시간을 출력한다
+#
+# 환경 변수:
+#   MODEL_REGISTRY_MAX_MB  모델 메모리 상한 MB (0 이면 제한 없음, 기본값: 0)
+
+import gc
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+_shared_registry = None
+_shared_lock = threading.Lock()
+
+
+def current_rss_bytes():
+    """현재 프로세스 상주 메모리 (Linux /proc 기준, 측정할 수 없으면 None)"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def parameter_bytes(model):
+    """
+    torch 모듈 파라미터/버퍼 크기 합 (torch 모델이 아니면 0)
+
+    (processor, model) 튜플처럼 여러 객체를 묶은 경우 각각의 합을 반환한다.
+    """
+    if isinstance(model, (tuple, list)):
+        return sum(parameter_bytes(item) for item in model)
+    if not callable(getattr(model, "parameters", None)) or not callable(getattr(model, "buffers", None)):
+        return 0
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+    except TypeError:
+        return 0
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+class ModelEntry:
+    """레지스트리에 올라간 모델 하나"""
+
+    def __init__(self, key, model, load_seconds, size_bytes, parameter_size):
+        self.key = key
+        self.model = model
+        self.load_seconds = load_seconds
+        self.size_bytes = size_bytes
+        self.parameter_bytes = parameter_size
+        self.warmup_seconds = None
+        self.pinned = False
+        self.uses = 0
+        self.in_use = 0
+        self.holds = ()
+        self.last_used = time.monotonic()
+
+
+class ModelRegistry:
+    """
+    (모델, 디바이스, 연산 타입) 키 기반 지연 로딩 모델 저장소
+
+    Args:
+        max_bytes (int): 모델 전체 메모리 상한 (0 이면 제한 없음)
+    """
+
+    def __init__(self, max_bytes=0):
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    @staticmethod
+    def make_key(model, device="cpu", compute_type="default"):
+        return (str(model), str(device), str(compute_type))
+
+    def get(self, model, loader, device="cpu", compute_type="default", holds=()):
+        """
+        모델 반환 (없으면 loader() 로 로딩)
+
+        Args:
+            model (str): 모델 이름 또는 경로
+            loader (callable): 인자 없이 모델 객체를 반환하는 함수
+            device (str): 디바이스 (cpu, cuda, mps)
+            compute_type (str): 연산 타입 (float32, float16, int8 등)
+            holds (tuple): 로딩된 모델이 참조하는 다른 모델의 make_key() 목록 (이 모델이 있는 동안 해제하지 않음)
+
+        Returns:
+            loader() 가 반환한 모델 객체
+        """
+        return self._get_entry(self.make_key(model, device, compute_type), loader, holds=holds).model
+
+    def acquire(self, model, loader, device="cpu", compute_type="default", holds=()):
+        """
+        get() 과 같지만 release() 를 부를 때까지 사용 중으로 표시 (메모리 상한으로 해제하지 않음)
+
+        백엔드/파이프라인처럼 모델을 블록 밖에서 오래 들고 있거나, 지연 제너레이터로 추론이 이어지는 경우에 쓴다.
+        """
+        return self._get_entry(self.make_key(model, device, compute_type), loader, hold=True, holds=holds).model
+
+    def release(self, model, device="cpu", compute_type="default"):
+        """acquire() / using() 의 사용 중 표시 해제"""
+        self._release_key(self.make_key(model, device, compute_type))
+
+    def _release_key(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.in_use > 0:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def _get_entry(self, key, loader, hold=False, holds=()):
+        # 찾은 항목의 사용 표시는 같은 잠금 안에서 해야 그 사이에 해제되지 않는다
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                load_lock = self._load_locks.setdefault(key, threading.Lock())
+            else:
+                self._touch(entry, hold)
+        if entry is None:
+            # 같은 모델을 여러 스레드가 동시에 요청해도 한 번만 로딩
+            with load_lock:
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        self._touch(entry, hold)
+                if entry is None:
+                    entry = self._load(key, loader, hold, holds)
+        return entry
+
+    @staticmethod
+    def _touch(entry, hold):
+        entry.uses += 1
+        entry.last_used = time.monotonic()
+        if hold:
+            entry.in_use += 1
+
+    def _load(self, key, loader, hold=False, holds=()):
+        model_name, device, compute_type = key
+        print(f"모델 로딩 중: {model_name} ({device}, {compute_type})")
+        rss_before = current_rss_bytes()
+        start = time.perf_counter()
+        model = loader()
+        load_seconds = time.perf_counter() - start
+        rss_after = current_rss_bytes()
+
+        # 상주 크기: 로딩 전후 RSS 차이 (측정 불가면 torch 파라미터 크기)
+        parameter_size = parameter_bytes(model)
+        if rss_before is not None and rss_after is not None and rss_after > rss_before:
+            size_bytes = rss_after - rss_before
+        else:
+            size_bytes = parameter_size
+        entry = ModelEntry(key, model, load_seconds, size_bytes, parameter_size)
+        print(f"모델 로딩 완료: {model_name} ({load_seconds:.1f}초, {size_bytes / (1024 * 1024):.0f}MB)")
+
+        with self._lock:
+            self._touch(entry, hold)
+            entry.holds = tuple(held for held in holds if held in self._entries)
+            for held in entry.holds:
+                self._entries[held].in_use += 1
+            self._entries[key] = entry
+        self._enforce_budget(exclude=key)
+        return entry
+
+    @contextmanager
+    def using(self, model, loader, device="cpu", compute_type="default"):
+        """
+        사용하는 동안 메모리 상한으로 해제되지 않도록 잡아두는 컨텍스트 매니저
+
+        사용 예:
+            with registry.using("large-v2", load_fn, "cpu", "int8") as model:
+                model.transcribe(...)
+        """
+        key = self.make_key(model, device, compute_type)
+        entry = self._get_entry(key, loader, hold=True)
+        try:
+            yield entry.model
+        finally:
+            self._release_key(key)
+
+    def warmup(self, model, loader, device="cpu", compute_type="default", warmup_fn=None, pin=False):
+        """
+        모델을 미리 로딩하고 warmup_fn(model) 로 첫 추론 초기화 비용을 미리 치름
+
+        Args:
+            warmup_fn (callable): 로딩된 모델을 받아 짧은 더미 추론을 실행하는 함수
+            pin (bool): True 면 메모리 상한을 넘어도 해제하지 않음 (상주 서비스용)
+
+        Returns:
+            로딩된 모델 객체
+        """
+        key = self.make_key(model, device, compute_type)
+        entry = self._get_entry(key, loader, hold=True)
+        try:
+            with self._lock:
+                entry.pinned = entry.pinned or pin
+            if warmup_fn is not None and entry.warmup_seconds is None:
+                start = time.perf_counter()
+                warmup_fn(entry.model)
+                entry.warmup_seconds = time.perf_counter() - start
+                print(f"워밍업 완료: {entry.key[0]} ({entry.warmup_seconds:.1f}초)")
+        finally:
+            self._release_key(key)
+        return entry.model
+
+    def unload(self, model, device="cpu", compute_type="default"):
+        """모델 해제 (없으면 무시)"""
+        key = self.make_key(model, device, compute_type)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._release(entry)
+
+    def evict_idle(self, max_idle_seconds):
+        """
+        max_idle_seconds 이상 사용하지 않은 모델 해제 (고정/사용 중인 모델 제외)
+
+        Returns:
+            int: 해제한 모델 수
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = [entry for entry in self._entries.values()
+                    if not entry.pinned and not entry.in_use and now - entry.last_used >= max_idle_seconds]
+            for entry in idle:
+                del self._entries[entry.key]
+        for entry in idle:
+            self._release(entry)
+        return len(idle)
+
+    def _enforce_budget(self, exclude=None):
+        if not self.max_bytes:
+            return
+        while True:
+            with self._lock:
+                total = sum(entry.size_bytes for entry in self._entries.values())
+                if total <= self.max_bytes:
+                    return
+                candidates = [entry for entry in self._entries.values()
+                              if entry.key != exclude and not entry.pinned and not entry.in_use]
+                if not candidates:
+                    print(f"⚠️ 모델 메모리 {total / (1024 * 1024):.0f}MB 가 상한 "
+                          f"{self.max_bytes / (1024 * 1024):.0f}MB 를 넘지만 해제할 수 있는 모델이 없습니다.")
+                    return
+                victim = min(candidates, key=lambda entry: entry.last_used)
+                del self._entries[victim.key]
+            self._release(victim)
+
+    def _release(self, entry):
+        model_name, device, compute_type = entry.key
+        print(f"모델 해제: {model_name} ({device}, {compute_type}, {entry.size_bytes / (1024 * 1024):.0f}MB)")
+        entry.model = None
+        # 이 모델이 참조하던 모델은 이제 해제될 수 있다
+        for held in entry.holds:
+            self._release_key(held)
+        self.evictions += 1
+        gc.collect()
+        # GPU 캐시는 torch 를 이미 쓰고 있을 때만 비움 (여기서 torch 를 새로 import 하지 않음)
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    @property
+    def total_bytes(self):
+        with self._lock:
+            return sum(entry.size_bytes for entry in self._entries.values())
+
+    def stats(self):
+        """모델별 로딩 시간/크기/사용 정보 목록"""
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                'model': entry.key[0],
+                'device': entry.key[1],
+                'compute_type': entry.key[2],
+                'load_seconds': entry.load_seconds,
+                'warmup_seconds': entry.warmup_seconds,
+                'size_bytes': entry.size_bytes,
+                'parameter_bytes': entry.parameter_bytes,
+                'uses': entry.uses,
+                'idle_seconds': now - entry.last_used,
+                'pinned': entry.pinned,
+            } for entry in self._entries.values()]
+
+    def print_report(self):
+        stats = self.stats()
+        limit = f"{self.max_bytes / (1024 * 1024):.0f}MB" if self.max_bytes else "제한 없음"
+        print(f"\n=== 모델 레지스트리 (상주 {len(stats)}개, {self.total_bytes / (1024 * 1024):.0f}MB / {limit}, "
+              f"해제 {self.evictions}회) ===")
+        for item in stats:
+            warmup = f", 워밍업 {item['warmup_seconds']:.1f}초" if item['warmup_seconds'] is not None else ""
+            print(f"{item['model']} ({item['device']}, {item['compute_type']}): "
+                  f"로딩 {item['load_seconds']:.1f}초{warmup}, 상주 {item['size_bytes'] / (1024 * 1024):.0f}MB "
+                  f"(파라미터 {item['parameter_bytes'] / (1024 * 1024):.0f}MB), 사용 {item['uses']}회, "
+                  f"유휴 {item['idle_seconds']:.0f}초{' [고정]' if item['pinned'] else ''}")
+
+
+def get_registry():
+    """
+    환경 변수 설정으로 만든 프로세스 공용 레지스트리
+
+    Returns:
+        ModelRegistry
+    """
+    global _shared_registry
+    with _shared_lock:
+        if _shared_registry is None:
+            max_mb = float(os.getenv("MODEL_REGISTRY_MAX_MB", "0"))
+            _shared_registry = ModelRegistry(int(max_mb * 1024 * 1024))
+    return _shared_registry
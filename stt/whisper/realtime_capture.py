@@ -0,0 +1,192 @@
+# 실시간 마이크 입력 발화 분리 (콜백 캡처 + VAD 기반 발화 경계)
+#
+# sd.rec()/sd.wait() 로 5초씩 끊어 녹음하면 변환하는 동안의 음성이 버려지고
+# 블록 경계에서 단어가 잘린다. 여기서는 입력 콜백이 블록을 큐에 넣기만 하고
+# (캡처는 멈추지 않음), UtteranceSegmenter 가 블록 단위 음성 판정으로
+# 무음 구간에서 발화를 잘라 인식기 큐로 넘긴다.
+# WavReplayStream 은 sd.InputStream 과 같은 방식으로 콜백을 호출하는 가짜 입력 장치로,
+# 마이크 없이 WAV 파일을 재생해 지연 시간을 측정할 때 사용한다.
+
+import collections
+import threading
+import time
+
+import numpy as np
+
+from audio_preprocess import TARGET_SAMPLE_RATE, load_audio
+
+
+class UtteranceSegmenter:
+    """
+    블록 단위 음성 판정으로 발화를 잘라내는 상태 기계
+
+    Args:
+        is_speech_fn (callable): (int16 블록, sample_rate) -> bool
+        sample_rate (int): 샘플링 레이트
+        pre_roll_seconds (float): 발화 시작 전에 함께 넘길 길이 (링 버퍼, 첫 음절 보존)
+        end_silence_seconds (float): 이만큼 무음이 이어지면 발화 종료
+        max_utterance_seconds (float): 발화 최대 길이 (넘으면 강제로 자름)
+        min_utterance_seconds (float): 이보다 짧은 발화는 잡음으로 보고 버림
+    """
+
+    def __init__(self, is_speech_fn, sample_rate=TARGET_SAMPLE_RATE, pre_roll_seconds=0.3,
+                 end_silence_seconds=0.6, max_utterance_seconds=15.0, min_utterance_seconds=0.3):
+        self.is_speech_fn = is_speech_fn
+        self.sample_rate = sample_rate
+        self.end_silence_samples = int(end_silence_seconds * sample_rate)
+        self.max_utterance_samples = int(max_utterance_seconds * sample_rate)
+        self.min_utterance_samples = int(min_utterance_seconds * sample_rate)
+        self.pre_roll_samples = int(pre_roll_seconds * sample_rate)
+
+        self._pre_roll = collections.deque()  # 발화 전 최근 블록 (링 버퍼)
+        self._pre_roll_size = 0
+        self._blocks = []                     # 진행 중인 발화 블록
+        self._start_sample = 0
+        self._silence_samples = 0
+        self._speech_end_time = None          # 마지막 음성 블록 도착 시각 (time.monotonic)
+        self._position = 0                    # 스트림 시작부터의 샘플 수
+
+    @property
+    def in_utterance(self):
+        return bool(self._blocks)
+
+    def feed(self, block, arrival_time=None):
+        """
+        입력 블록 하나 처리
+
+        Args:
+            block (numpy.ndarray): (샘플,) int16 블록
+            arrival_time (float): 블록 도착 시각 (time.monotonic, 기본값: 현재)
+
+        Returns:
+            list: 끝난 발화 목록 ({'audio', 'start', 'end', 'speech_end_time'})
+        """
+        arrival_time = time.monotonic() if arrival_time is None else arrival_time
+        finished = []
+        speech = self.is_speech_fn(block, self.sample_rate)
+
+        if not self._blocks:
+            if speech:
+                # 발화 시작 - 링 버퍼의 직전 블록부터 포함
+                self._blocks = list(self._pre_roll) + [block]
+                self._start_sample = self._position - self._pre_roll_size
+                self._pre_roll.clear()
+                self._pre_roll_size = 0
+                self._silence_samples = 0
+                self._speech_end_time = arrival_time
+            else:
+                self._pre_roll.append(block)
+                self._pre_roll_size += block.size
+                while self._pre_roll and self._pre_roll_size - self._pre_roll[0].size >= self.pre_roll_samples:
+                    self._pre_roll_size -= self._pre_roll.popleft().size
+        else:
+            self._blocks.append(block)
+            if speech:
+                self._silence_samples = 0
+                self._speech_end_time = arrival_time
+            else:
+                self._silence_samples += block.size
+
+            length = self._position + block.size - self._start_sample
+            if self._silence_samples >= self.end_silence_samples or length >= self.max_utterance_samples:
+                utterance = self._finish()
+                if utterance is not None:
+                    finished.append(utterance)
+
+        self._position += block.size
+        return finished
+
+    def flush(self):
+        """스트림 종료 시 진행 중인 발화 반환"""
+        utterance = self._finish() if self._blocks else None
+        return [utterance] if utterance is not None else []
+
+    def _finish(self):
+        audio = np.concatenate(self._blocks)
+        # 끝부분 무음은 인식에 필요 없으므로 대부분 잘라냄 (발화 끝 보호용으로 일부만 남김)
+        trim = max(0, self._silence_samples - self.pre_roll_samples)
+        if trim:
+            audio = audio[:audio.size - trim]
+        start = self._start_sample
+        self._blocks = []
+        self._silence_samples = 0
+        if audio.size < self.min_utterance_samples:
+            return None
+        return {
+            'audio': audio,
+            'start': start / self.sample_rate,
+            'end': (start + audio.size) / self.sample_rate,
+            'speech_end_time': self._speech_end_time,
+        }
+
+
+class WavReplayStream:
+    """
+    WAV(오디오) 파일을 실시간 속도로 재생하는 가짜 입력 장치 (sd.InputStream 대체)
+
+    sd.InputStream 과 같은 시그니처로 callback(indata, frames, time_info, status) 을 호출한다.
+    indata 는 (frames, 1) int16 배열이다. 끝에 무음을 붙여 마지막 발화도 종료되게 한다.
+
+    Args:
+        path (str): 재생할 파일 경로
+        samplerate (int): 출력 샘플링 레이트
+        blocksize (int): 콜백 한 번에 넘길 샘플 수
+        callback (callable): 입력 콜백
+        speed (float): 재생 속도 배수 (1.0 = 실시간, 0 이면 대기 없이 최대 속도)
+        tail_seconds (float): 파일 끝에 붙일 무음 길이 (초)
+    """
+
+    def __init__(self, path, samplerate=TARGET_SAMPLE_RATE, blocksize=4800, callback=None,
+                 speed=1.0, tail_seconds=1.0, **kwargs):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.callback = callback
+        self.speed = speed
+        audio = load_audio(path, samplerate)
+        tail = np.zeros(int(tail_seconds * samplerate), dtype=np.float32)
+        self._pcm = (np.clip(np.concatenate([audio, tail]), -1.0, 1.0) * 32767).astype(np.int16)
+        self.finished = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def duration(self):
+        return self._pcm.size / self.samplerate
+
+    @property
+    def active(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        start = time.monotonic()
+        for offset in range(0, self._pcm.size, self.blocksize):
+            if self._stop.is_set():
+                break
+            block = self._pcm[offset:offset + self.blocksize]
+            if self.speed > 0:
+                # 실제 마이크처럼 블록 길이만큼 채워진 뒤에 콜백 호출
+                due = start + (offset + block.size) / self.samplerate / self.speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            self.callback(block.reshape(-1, 1), block.size, None, None)
+        self.finished.set()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def close(self):
+        self.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
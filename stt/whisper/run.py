@@ -1,294 +1,680 @@
 # https://huggingface.co/pyannote/speaker-diarization-3.1
 
-from pyannote.audio import Pipeline
 import os
+import threading
+import numpy as np
 from dotenv import load_dotenv
-import torchaudio
-import torch
-import subprocess
-from pydub import AudioSegment
-from pydub.effects import low_pass_filter
+from audio_preprocess import TARGET_SAMPLE_RATE, load_audio, preprocess, stream_audio, to_pyannote_input
+from whisper_server_pool import default_pool_size
+from whisper_backend import (WORD_TIMESTAMP_BACKENDS, WhisperCliBackend, backend_from_env, create_backend,
+                             segments_to_text)
+from audio_segments import extract_segment, concat_segments
+from transcribe_scheduler import TranscriptionScheduler
+from batch_turns import transcribe_batched
+from stage_timer import StageTimer
+from streaming_diarization import StreamingDiarizer
+from vad import VoiceActivityDetector
+from model_registry import get_registry
+from transcript_cache import content_hash, get_cache
+from speaker_index import get_speaker_index, get_diarization_cache, diarization_from_cache, diarization_to_cache
 
 # .env 파일 로드
 load_dotenv()
 
-# Hugging Face 토큰 가져오기
-hf_token = os.getenv("HUGGINGFACE_PYANNOTE_TOKEN")
-
-print(f"토큰 확인: {hf_token[:10] if hf_token else 'None'}...")
-
-if not hf_token:
-    print("Hugging Face 토큰이 필요합니다.")
-    print("1. https://huggingface.co/settings/tokens 에서 토큰 생성")
-    print("2. 다음 모델들에 대한 접근 권한 받기:")
-    print("   - https://huggingface.co/pyannote/speaker-diarization-3.1")
-    print("   - https://huggingface.co/pyannote/segmentation-3.0")
-    print("   - https://huggingface.co/pyannote/clustering-3.0")
-    print("3. stt/pyannote/.env 파일에 HUGGINGFACE_PYANNOTE_TOKEN=your_token_here 추가")
-    exit(1)
-
-try:
-    # pipeline 로드 시 토큰 사용
-    print("모델 로딩 중... (시간이 걸릴 수 있습니다)")
-    pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.1", use_auth_token=hf_token)
-    print("모델 로딩 완료!")
-except Exception as e:
-    print(f"모델 로딩 실패: {e}")
-    print("\n해결 방법:")
-    print("1. 다음 모델들에 대한 접근 권한을 확인하세요:")
-    print("   - https://huggingface.co/pyannote/speaker-diarization-3.1")
-    print("   - https://huggingface.co/pyannote/segmentation-3.0")
-    print("   - https://huggingface.co/pyannote/clustering-3.0")
-    print("2. 각 페이지에서 'Accept' 버튼을 클릭하세요")
-    print("3. 토큰이 올바른지 확인하세요")
-    exit(1)
-
 # 현재 스크립트 파일의 디렉토리를 기준으로 절대 경로 생성
 current_dir = os.path.dirname(os.path.abspath(__file__))
-audio_file = os.path.join(current_dir, "test.audio", "test9.mp3")
-
-print(f"현재 디렉토리: {current_dir}")
-print(f"찾는 파일 경로: {audio_file}")
-
-# 파일 존재 확인
-if not os.path.exists(audio_file):
-    print(f"오디오 파일을 찾을 수 없습니다: {audio_file}")
-    print(f"test.audio 폴더 내용:")
-    test_audio_dir = os.path.join(current_dir, "test.audio")
-    if os.path.exists(test_audio_dir):
-        for file in os.listdir(test_audio_dir):
-            print(f"  - {file}")
-    else:
-        print(f"test.audio 폴더가 존재하지 않습니다: {test_audio_dir}")
-    exit(1)
 
-print(f"오디오 파일 처리 중: {audio_file}")
+# whisper-server 워커 풀 설정 (.env 로 조정 가능)
+whisper_threads_per_worker = int(os.getenv("WHISPER_THREADS_PER_WORKER", "4"))
+whisper_pool_size = int(os.getenv("WHISPER_POOL_SIZE", "0")) or default_pool_size(whisper_threads_per_worker)
 
-try:
-    # 오디오 파일 정보 확인
-    waveform, sample_rate = torchaudio.load(audio_file)
-    print(f"오디오 정보 - 샘플링 레이트: {sample_rate}Hz, 길이: {waveform.shape[1]} 샘플")
-    
-    # 모델이 기대하는 샘플링 레이트로 리샘플링 (16kHz)
-    target_sample_rate = 16000
-    if sample_rate != target_sample_rate:
-        print(f"샘플링 레이트를 {target_sample_rate}Hz로 변환 중...")
-        resampler = torchaudio.transforms.Resample(sample_rate, target_sample_rate)
-        waveform = resampler(waveform)
-        print(f"변환 완료 - 새로운 길이: {waveform.shape[1]} 샘플")
-    
-    # 임시 WAV 파일로 저장 (pydub 처리를 위해)
-    temp_wav_file = os.path.join(current_dir, "temp_audio.wav")
-    torchaudio.save(temp_wav_file, waveform, target_sample_rate)
-    
-    # pydub를 사용한 Low-pass filter 적용 (3000Hz) - 노이즈 제거
-    print("Low-pass filter 적용 중 (3000Hz)...")
-    audio_segment = AudioSegment.from_wav(temp_wav_file)
-    filtered_audio = low_pass_filter(audio_segment, 3000)
-    print("Low-pass filter 적용 완료")
-    
-    # 볼륨 증폭 (5dB)
-    print("볼륨을 5dB 증폭 중...")
-    filtered_audio = filtered_audio + 5
-    print("볼륨 증폭 완료")
-    
-    # 필터링된 오디오를 다시 WAV 파일로 저장
-    filtered_audio.export(temp_wav_file, format="wav")
-    print(f"필터링된 WAV 파일 저장: {temp_wav_file}")
-    
-    # 화자 분리 실행
-    diarization = pipeline(temp_wav_file)
-    
-    print("\n=== 화자 분리 결과 ===")
-    
-    # 출력 디렉토리 설정
-    speakers_output_dir = os.path.join(current_dir, "speakers_output")
-    speakers_output_text_dir = os.path.join(current_dir, "speakers_output_text")
-    
-    # 디렉토리가 없으면 생성
-    os.makedirs(speakers_output_dir, exist_ok=True)
-    os.makedirs(speakers_output_text_dir, exist_ok=True)
-    
-    # 화자별 오디오 분리 및 저장
-    print("\n=== 화자별 오디오 분리 중 ===")
-    
-    # 모든 발화 세그먼트를 시간 순서대로 저장할 리스트
-    all_segments = []
-    
-    # 화자별 세그먼트를 저장할 딕셔너리 초기화
-    speaker_segments = {}
-    
-    for turn, _, speaker in diarization.itertracks(yield_label=True):
-        print(f"Speaker {speaker} from {turn.start:.2f}s to {turn.end:.2f}s")
-        
-        # 화자별 세그먼트 수집
-        if speaker not in speaker_segments:
-            speaker_segments[speaker] = []
-        speaker_segments[speaker].append((turn.start, turn.end))
-        
-        # 각 세그먼트를 시간 순서대로 저장
-        all_segments.append({
-            'speaker': speaker,
-            'start_time': turn.start,
-            'end_time': turn.end,
-            'start_sample': int(turn.start * target_sample_rate),
-            'end_sample': int(turn.end * target_sample_rate)
-        })
-    
-    # 화자별로 오디오 분리 및 저장
-    print("\n=== 화자별 오디오 분리 중 ===")
-    
-    # 모든 화자의 텍스트를 저장할 딕셔너리
-    all_speaker_texts = {}
-    
-    for speaker, segments in speaker_segments.items():
-        print(f"Speaker {speaker} 처리 중...")
-        
-        # 해당 화자의 모든 세그먼트를 하나의 오디오로 합치기
-        speaker_audio = torch.zeros_like(waveform)
-        
-        for start_time, end_time in segments:
-            start_sample = int(start_time * target_sample_rate)
-            end_sample = int(end_time * target_sample_rate)
-            
-            # 오디오 길이를 벗어나지 않도록 조정
-            start_sample = max(0, min(start_sample, waveform.shape[1] - 1))
-            end_sample = max(start_sample + 1, min(end_sample, waveform.shape[1]))
-            
-            speaker_audio[:, start_sample:end_sample] = waveform[:, start_sample:end_sample]
-        
-        # 화자별 오디오 파일 저장
-        speaker_file = os.path.join(speakers_output_dir, f"speaker_{speaker}.wav")
-        torchaudio.save(speaker_file, speaker_audio, target_sample_rate)
-        print(f"  저장됨: {speaker_file}")
-        
-        # Whisper.cpp로 텍스트 변환
-        print(f"  Whisper.cpp로 텍스트 변환 중...")
-        whisper_cmd = [
-            "./whisper.cpp_local/whisper-cli",
-            "-l", "ko",
-            "-m", "./whisper.cpp_local/model/ggml-large-v2-q8_0.bin",
-            "-nt",
-            "--vad",
-            "--vad-model", "./whisper.cpp_local/model/ggml-silero-v5.1.2.bin",
-            "--vad-threshold", "0.3",                    # 더 민감한 음성 감지
-            "--vad-min-speech-duration-ms", "2000",      # 2초 이상 음성만 인식
-            "--vad-min-silence-duration-ms", "1000",     # 1초 이상 무음으로 구분
-            "--vad-speech-pad-ms", "500",                # 음성 구간 앞뒤 0.5초 패딩
-            "-f", speaker_file
-        ]
-        
-        try:
-            result = subprocess.run(whisper_cmd, 
-                                  capture_output=True, 
-                                  text=True, 
-                                  cwd=current_dir)
-            if result.returncode == 0:
-                content = result.stdout.strip()
-                # 화자별 전체 텍스트 저장
-                all_speaker_texts[speaker] = content
-                print(f"  텍스트 변환 완료")
-            else:
-                print(f"  Whisper.cpp 실행 실패: {result.stderr}")
-        except Exception as e:
-            print(f"  Whisper.cpp 실행 중 오류: {e}")
+# 화자 구간을 자를 때 앞뒤로 붙일 여유 시간 (초)
+segment_pad_seconds = float(os.getenv("SEGMENT_PAD_SECONDS", "0.0"))
+
+# 구간 변환 백엔드 (server: 상주 whisper-server 풀, resident: 프로세스 안 모델 상주, cli: 호출마다 whisper-cli)
+# 지정하지 않으면 공통 기본값(cli) - 구간이 많으면 모델을 한 번만 로딩하는 server 를 권장 (example.env)
+whisper_backend_kind = backend_from_env()
+
+# 구간 변환 방식
+#   per_turn: 구간마다 개별 호출 (워커 풀에서 병렬 처리)
+#   batched : 모든 구간을 무음 간격으로 이어붙여 한 번에 변환 후 타임스탬프로 재매핑
+turn_transcribe_mode = os.getenv("TURN_TRANSCRIBE_MODE", "per_turn")
+batch_gap_seconds = float(os.getenv("BATCH_GAP_SECONDS", "0.5"))
+
+# 구간 자르기 → 변환 → 대화 파일 추가 단계 사이에 동시에 처리 중일 수 있는 구간 수 (0 이면 워커 수 x 4)
+turn_queue_size = int(os.getenv("TURN_QUEUE_SIZE", "0"))
+
+# 파이프라인 모드
+#   per_turn   : 구간별 변환 → 시간 순서 대화 텍스트 (기본값)
+#   per_speaker: 화자별 전체 트랙 변환 → 화자별 텍스트
+#   both       : 둘 다 실행
+pipeline_mode = os.getenv("PIPELINE_MODE", "per_turn")
+
+# 화자 분리 방식
+#   full     : 파일 전체를 한 번에 화자 분리 (기본값)
+#   streaming: 겹치는 윈도우 단위로 화자 분리하고 확정된 구간부터 바로 변환 (몇 시간짜리 녹음용, per_turn 전용)
+diarization_mode = os.getenv("DIARIZATION_MODE", "full")
+diarization_window_seconds = float(os.getenv("DIARIZATION_WINDOW_SECONDS", "300"))
+diarization_overlap_seconds = float(os.getenv("DIARIZATION_OVERLAP_SECONDS", "30"))
+diarization_speaker_threshold = float(os.getenv("DIARIZATION_SPEAKER_THRESHOLD", "0.7"))
+
+# 화자 분리 모델
+PYANNOTE_MODEL = "pyannote/speaker-diarization-3.1"
+
+def get_diarization_pipeline(hf_token):
+    """
+    pyannote 화자 분리 파이프라인 (처음 호출할 때 로딩, 이후 모델 레지스트리에서 재사용)
     
-    # 시간 순서대로 세그먼트 정렬
-    all_segments.sort(key=lambda x: x['start_time'])
+    pyannote.audio 도 이때 import 하므로 스크립트를 import 하는 것만으로는 모델을 올리지 않는다.
+    호출한 쪽이 파이프라인을 들고 여러 파일을 처리하므로 release_diarization_pipeline() 까지
+    메모리 상한으로 해제되지 않도록 사용 중으로 표시한다.
     
-    # 각 세그먼트별로 개별 텍스트 변환
-    print("\n=== 세그먼트별 개별 텍스트 변환 중 ===")
-    segment_texts = []
+    Args:
+        hf_token (str): Hugging Face 토큰
     
-    for i, segment in enumerate(all_segments):
+    Returns:
+        pyannote.audio.Pipeline
+    """
+    def load():
+        from pyannote.audio import Pipeline
+        return Pipeline.from_pretrained(PYANNOTE_MODEL, use_auth_token=hf_token)
+    return get_registry().acquire(PYANNOTE_MODEL, load, device="cpu", compute_type="float32")
+
+
+def release_diarization_pipeline():
+    """get_diarization_pipeline() 의 사용 중 표시 해제"""
+    get_registry().release(PYANNOTE_MODEL, device="cpu", compute_type="float32")
+
+
+def diarize(pipeline, diarization_input, audio_hash):
+    """
+    화자 분리 실행 (같은 오디오는 캐시된 구간/임베딩을 사용해 임베딩 추출까지 건너뜀)
+
+    캐시는 TRANSCRIPT_CACHE_DIR 의 변환 결과 캐시, 없으면 화자 인덱스 폴더의 캐시를 쓴다.
+
+    Args:
+        pipeline: pyannote.audio Pipeline
+        diarization_input (dict): to_pyannote_input() 결과
+        audio_hash (str): content_hash() 결과
+
+    Returns:
+        tuple: (구간 [(시작, 끝, 화자)], 화자 목록, 화자별 임베딩 배열 또는 None)
+    """
+    cache = get_diarization_cache()
+    key = None
+    if cache is not None:
+        # 전처리 파라미터가 바뀌면 화자 분리 결과도 달라지므로 키에 포함
+        key = cache.make_key(audio_hash, None, PYANNOTE_MODEL, kind="diarization", cutoff=3000, gain_db=5.0)
+        cached = cache.get(key)
+        if cached is not None:
+            print("화자 분리 캐시 적중 (분할/임베딩 추출 생략)")
+            return diarization_from_cache(cached)
+
+    try:
+        diarization, embeddings = pipeline(diarization_input, return_embeddings=True)
+    except TypeError:
+        # return_embeddings 를 지원하지 않는 pyannote 버전 (화자 인덱스 매칭 없이 진행)
+        diarization, embeddings = pipeline(diarization_input), None
+    turns = [(turn.start, turn.end, speaker) for turn, _, speaker in diarization.itertracks(yield_label=True)]
+    labels = list(diarization.labels())
+    if cache is not None:
+        cache.put(key, diarization_to_cache(turns, labels, embeddings))
+    return turns, labels, embeddings
+
+
+def identify_speakers(labels, embeddings, durations, audio_hash):
+    """
+    화자 분리 번호(SPEAKER_00 ...)를 화자 인덱스의 ID/이름으로 변환
+
+    인덱스를 사용하지 않거나 임베딩이 없으면 번호를 그대로 쓴다.
+
+    Returns:
+        dict: 화자 분리 번호 → 표시 이름
+    """
+    mapping = {label: label for label in labels}
+    index = get_speaker_index()
+    if index is None or embeddings is None or not labels:
+        return mapping
+    speaker_ids = index.identify(embeddings[:len(labels)], [durations.get(label, 0.0) for label in labels],
+                                 source=audio_hash)
+    # 다른 실행이 같은 ID 로 먼저 저장한 새 화자는 저장하면서 ID 가 바뀜
+    renamed = index.save()
+    for label, speaker_id in zip(labels, speaker_ids):
+        speaker_id = renamed.get(speaker_id, speaker_id)
+        if speaker_id is not None:
+            mapping[label] = index.display_name(speaker_id)
+            print(f"{label} → {mapping[label]}")
+    index.print_report()
+    return mapping
+
+
+def create_turn_backend(pool_size=None):
+    """
+    구간 변환용 whisper 백엔드와 동시 처리 수 (세그먼트마다 whisper-cli 를 띄우지 않도록 모델을 한 번만 로딩)
+
+    Args:
+        pool_size (int): 워커 풀 크기 (None 이면 WHISPER_POOL_SIZE, 일괄 처리에서 CPU 예산으로 지정)
+    """
+    pool_size = pool_size or whisper_pool_size
+    # batched 모드와 resident 백엔드는 동시 호출이 하나뿐이므로 전체 스레드를 한 곳에 준다
+    if turn_transcribe_mode == "batched" or whisper_backend_kind == "resident":
+        pool_size, threads_per_worker = 1, pool_size * whisper_threads_per_worker
+    else:
+        threads_per_worker = whisper_threads_per_worker
+    backend = create_backend(
+        whisper_backend_kind,
+        model_path="./whisper.cpp_local/model/ggml-large-v2-q8_0.bin",
+        cli_path="./whisper.cpp_local/whisper-cli",
+        server_path="./whisper.cpp_local/whisper-server",
+        language="ko",
+        threads=threads_per_worker,
+        pool_size=pool_size,
+        cwd=current_dir
+    )
+    return backend, getattr(backend, "concurrency", pool_size)
+
+
+def make_turn_slicer(sample_rate, waveform=None):
+    """
+    구간 dict 에 변환할 오디오('audio')를 채우는 함수 생성
+
+    waveform 이 있으면 전체 파형에서 구간을 잘라 쓰고, 없으면 구간의 'audio' (스트리밍 화자 분리)를 쓴다.
+    구간 앞뒤 무음은 잘라내고, 음성이 없는 구간은 'audio' 를 None 으로 둬 인식기를 호출하지 않는다.
+    """
+    vad = VoiceActivityDetector(aggressiveness=2, sample_rate=sample_rate)
+
+    def slice_segment(segment):
+        if waveform is not None:
+            segment_audio = extract_segment(waveform, segment['start_time'], segment['end_time'],
+                                            sample_rate, pad_seconds=segment_pad_seconds)
+        else:
+            segment_audio = segment['audio']
+        speech_bounds = vad.speech_bounds(segment_audio)
+        segment['audio'] = None if speech_bounds is None else segment_audio[..., speech_bounds[0]:speech_bounds[1]]
+        return segment
+
+    return slice_segment
+
+
+def make_turn_transcriber(backend, sample_rate):
+    """make_turn_slicer() 로 준비된 구간 dict 하나를 텍스트로 바꾸는 함수 생성"""
+    def transcribe_segment(segment):
+        if segment['audio'] is None:
+            return ""
+        return segments_to_text(backend.transcribe(segment['audio'], sample_rate))
+
+    return transcribe_segment
+
+
+class ConversationWriter:
+    """
+    변환이 끝난 구간을 시간 순서 대화 텍스트 파일에 바로 추가
+
+    첫 줄을 쓸 때 파일을 만들고 줄마다 flush 하므로 긴 회의도 처리 중에 앞부분을 확인할 수 있다.
+    """
+
+    def __init__(self, conversation_file):
+        self.conversation_file = conversation_file
+        self.lines = 0
+        self._file = None
+
+    def append(self, segment):
+        # 빈 텍스트 구간은 건너뜀
+        if not segment['text']:
+            return
+        if self._file is None:
+            self._file = open(self.conversation_file, 'w', encoding='utf-8')
+            self._file.write("=== 시간 순서별 대화 내용 ===\n\n")
+
         speaker = segment['speaker']
         start_time = segment['start_time']
         end_time = segment['end_time']
-        
-        print(f"세그먼트 {i+1}/{len(all_segments)}: Speaker {speaker} ({start_time:.2f}s - {end_time:.2f}s)")
-        
-        # 해당 세그먼트의 오디오 추출
-        segment_audio = torch.zeros_like(waveform)
-        start_sample = segment['start_sample']
-        end_sample = segment['end_sample']
-        segment_audio[:, start_sample:end_sample] = waveform[:, start_sample:end_sample]
-        
-        # 세그먼트별 임시 WAV 파일 저장
-        temp_segment_file = os.path.join(speakers_output_dir, f"temp_segment_{i}.wav")
-        torchaudio.save(temp_segment_file, segment_audio, target_sample_rate)
-        
-        # Whisper.cpp로 세그먼트별 텍스트 변환
-        whisper_cmd = [
+        text = segment['text']
+
+        self._file.write(f"Speaker {speaker} ({start_time:.2f}s - {end_time:.2f}s): {text}\n\n")
+        self._file.flush()
+        print(f"Speaker {speaker}: {text}")
+        self.lines += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            print(f"대화 텍스트 파일 저장 완료: {self.conversation_file} ({self.lines}줄)")
+
+
+def write_conversation(transcribed_segments, conversation_file, timer):
+    """변환이 모두 끝난 구간 목록을 한 번에 대화 텍스트 파일로 저장 (batched 모드, 화자 이름 변경 후 다시 쓰기)"""
+    print("\n=== 시간 순서대로 대화 텍스트 생성 중 ===")
+    with timer.stage("결과 저장"):
+        writer = ConversationWriter(conversation_file)
+        for segment in transcribed_segments:
+            writer.append(segment)
+        writer.close()
+
+
+def run_turn_pipeline(whisper_backend, workers, segments, sample_rate, conversation_file, waveform=None):
+    """
+    구간 자르기 → 변환 → 대화 파일 추가를 크기 제한 큐로 겹쳐 실행
+
+    Args:
+        whisper_backend: create_turn_backend() 의 백엔드
+        workers (int): 동시 변환 수
+        segments: 시간 순서 구간 dict iterable (스트리밍 화자 분리 generator 가능)
+        sample_rate (int): 샘플링 레이트
+        conversation_file (str): 대화 텍스트 파일 경로
+        waveform: 전체 파형 (None 이면 구간의 'audio' 사용)
+
+    Returns:
+        tuple: (변환 결과 구간 dict 목록 (시간 순서), TranscriptionScheduler.stats)
+    """
+    scheduler = TranscriptionScheduler(make_turn_transcriber(whisper_backend, sample_rate), workers=workers)
+    writer = ConversationWriter(conversation_file)
+    try:
+        transcribed_segments = scheduler.run_pipelined(
+            segments,
+            prepare_fn=make_turn_slicer(sample_rate, waveform),
+            on_result=writer.append,
+            queue_size=turn_queue_size or None,
+        )
+    finally:
+        writer.close()
+    scheduler.print_report()
+    return transcribed_segments, scheduler.stats
+
+
+def transcribe_per_speaker(waveform, speaker_segments, sample_rate, speaker_text_file, timer):
+    """화자별로 구간을 이어붙인 트랙을 변환해 화자별 텍스트 파일로 저장"""
+    with timer.stage("화자별 전체 변환"):
+        # 화자별로 오디오 분리 및 텍스트 변환
+        print("\n=== 화자별 오디오 분리 중 ===")
+
+        # 모든 화자의 텍스트를 저장할 딕셔너리
+        all_speaker_texts = {}
+
+        # 화자 트랙은 whisper-cli 의 Silero VAD 로 긴 무음을 건너뛴다
+        speaker_backend = WhisperCliBackend(
             "./whisper.cpp_local/whisper-cli",
-            "-l", "ko",
-            "-m", "./whisper.cpp_local/model/ggml-large-v2-q8_0.bin",
-            temp_segment_file
-        ]
-        
-        try:
-            result = subprocess.run(whisper_cmd, 
-                                  capture_output=True, 
-                                  text=True, 
-                                  cwd=current_dir)
-            if result.returncode == 0:
-                segment_text = result.stdout.strip()
-                if segment_text:  # 빈 텍스트가 아닌 경우만
-                    segment_texts.append({
-                        'speaker': speaker,
-                        'start_time': start_time,
-                        'end_time': end_time,
-                        'text': segment_text
-                    })
-                    print(f"  텍스트: {segment_text}")
-            else:
-                print(f"  텍스트 변환 실패")
-        except Exception as e:
-            print(f"  텍스트 변환 중 오류: {e}")
-        
-        # 임시 파일 삭제
-        os.remove(temp_segment_file)
-    
-    # 시간 순서대로 대화 텍스트 생성
-    if segment_texts:
-        print("\n=== 시간 순서대로 대화 텍스트 생성 중 ===")
-        
-        # 현재 시간으로 파일명 생성
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S_%f")[:17]
-        conversation_file = os.path.join(speakers_output_text_dir, f"{timestamp}.txt")
-        
-        with open(conversation_file, 'w', encoding='utf-8') as f:
-            f.write("=== 시간 순서별 대화 내용 ===\n\n")
-            
-            for segment in segment_texts:
-                speaker = segment['speaker']
-                start_time = segment['start_time']
-                end_time = segment['end_time']
-                text = segment['text']
-                
-                f.write(f"Speaker {speaker} ({start_time:.2f}s - {end_time:.2f}s): {text}\n\n")
-                print(f"Speaker {speaker}: {text}")
-        
-        print(f"대화 텍스트 파일 저장 완료: {conversation_file}")
-    
-    # 임시 파일 삭제
-    os.remove(temp_wav_file)
-    print(f"\n임시 파일 삭제 완료")
-    
-    # speakers_output 폴더의 모든 음성 파일 삭제
-    print("speakers_output 폴더의 음성 파일들 삭제 중...")
-    for file in os.listdir(speakers_output_dir):
-        if file.endswith('.wav'):
-            file_path = os.path.join(speakers_output_dir, file)
-            os.remove(file_path)
-            print(f"  삭제됨: {file}")
-    
-    print(f"화자별 오디오 파일들 삭제 완료")
-    print(f"통합 텍스트는 {speakers_output_text_dir} 폴더에 저장되었습니다.")
-        
-except Exception as e:
-    print(f"화자 분리 처리 중 오류 발생: {e}")
-    # 임시 파일이 있다면 삭제
-    temp_wav_file = os.path.join(current_dir, "temp_audio.wav")
-    if os.path.exists(temp_wav_file):
-        os.remove(temp_wav_file)
\ No newline at end of file
+            "./whisper.cpp_local/model/ggml-large-v2-q8_0.bin",
+            language="ko",
+            extra_args=[
+                "--vad",
+                "--vad-model", "./whisper.cpp_local/model/ggml-silero-v5.1.2.bin",
+                "--vad-threshold", "0.3",                    # 더 민감한 음성 감지
+                "--vad-min-speech-duration-ms", "2000",      # 2초 이상 음성만 인식
+                "--vad-min-silence-duration-ms", "1000",     # 1초 이상 무음으로 구분
+                "--vad-speech-pad-ms", "500",                # 음성 구간 앞뒤 0.5초 패딩
+            ],
+            cwd=current_dir
+        )
+
+        for speaker, segments in speaker_segments.items():
+            print(f"Speaker {speaker} 처리 중...")
+
+            # 해당 화자의 구간만 이어붙인 짧은 트랙 생성 (전체 길이 무음 버퍼 없이)
+            # 구간 사이에 1초 무음을 넣어 VAD 가 발화를 구분할 수 있게 한다
+            speaker_audio = concat_segments(waveform, segments, sample_rate,
+                                            pad_seconds=segment_pad_seconds, gap_seconds=1.0)
+            print(f"  화자 트랙 길이: {speaker_audio.shape[1] / sample_rate:.1f}초")
+
+            # Whisper.cpp로 텍스트 변환 (WAV 를 stdin 으로 전달)
+            print(f"  Whisper.cpp로 텍스트 변환 중...")
+            try:
+                segments = speaker_backend.transcribe(speaker_audio, sample_rate)
+                # 화자별 전체 텍스트 저장 (세그먼트마다 한 줄)
+                all_speaker_texts[speaker] = segments_to_text(segments, "\n")
+                print(f"  텍스트 변환 완료")
+            except Exception as e:
+                print(f"  Whisper.cpp 실행 중 오류: {e}")
+
+    # 화자별 전체 텍스트 파일 저장
+    if all_speaker_texts:
+        with timer.stage("결과 저장"):
+            with open(speaker_text_file, 'w', encoding='utf-8') as f:
+                f.write("=== 화자별 전체 발화 내용 ===\n\n")
+                for speaker, content in all_speaker_texts.items():
+                    f.write(f"Speaker {speaker}:\n{content}\n\n")
+        print(f"화자별 텍스트 파일 저장 완료: {speaker_text_file}")
+
+
+def run_streaming(pipeline, audio_file, conversation_file, timer, whisper_backend=None, workers=None):
+    """
+    스트리밍 화자 분리 + 구간별 변환 (DIARIZATION_MODE=streaming)
+
+    파일을 윈도우 단위로 디코딩해 화자 분리하고, 확정된 구간은 뒤쪽 오디오를 화자 분리하는 동안
+    워커 풀에서 바로 변환한다. 파일 전체 파형을 메모리에 올리지 않는다.
+
+    Returns:
+        dict: process_file() 지표 중 길이/구간/화자/화자 분리/음성 인식 시간
+    """
+    target_sample_rate = TARGET_SAMPLE_RATE
+    diarizer = StreamingDiarizer(
+        pipeline,
+        sample_rate=target_sample_rate,
+        window_seconds=diarization_window_seconds,
+        overlap_seconds=diarization_overlap_seconds,
+        max_distance=diarization_speaker_threshold,
+        # Low-pass filter (3000Hz) 노이즈 제거 + 볼륨 5dB 증폭은 화자 분리 입력에만 적용
+        preprocess_fn=lambda audio: preprocess(audio, target_sample_rate, cutoff=3000, gain_db=5.0),
+        pad_seconds=segment_pad_seconds,
+    )
+    owns_backend = whisper_backend is None
+    if owns_backend:
+        whisper_backend, workers = create_turn_backend()
+    try:
+        with timer.stage("스트리밍 화자 분리 + 구간별 변환"):
+            print(f"\n=== 스트리밍 화자 분리 (윈도우 {diarization_window_seconds:.0f}초, "
+                  f"겹침 {diarization_overlap_seconds:.0f}초) + 구간별 변환 "
+                  f"(백엔드 {whisper_backend_kind}, 워커 {workers}개) ===")
+            turns = diarizer.run(stream_audio(audio_file, 30.0, target_sample_rate))
+            # 처리 중인 구간이 큐 크기를 넘으면 화자 분리도 멈추고 기다린다 (backpressure)
+            transcribed_segments, stats = run_turn_pipeline(whisper_backend, workers, turns, target_sample_rate,
+                                                            conversation_file)
+        diarizer.print_report()
+    finally:
+        if owns_backend:
+            whisper_backend.close()
+
+    # 전역 화자 중심으로 화자 인덱스 매칭 (재클러스터링으로 합쳐진 번호도 현재 번호로 변환)
+    # 대화 파일은 처리 중에 화자 분리 번호로 쓰였으므로 번호가 바뀐 경우에만 다시 쓴다
+    labels = list(diarizer.speakers)
+    if labels:
+        dimension = next((c.centroid.size for c in diarizer.speakers.values() if c.centroid is not None), 0)
+        embeddings = np.stack([cluster.centroid if cluster.centroid is not None else np.full(dimension, np.nan)
+                               for cluster in diarizer.speakers.values()]) if dimension else None
+        durations = {label: cluster.weight for label, cluster in diarizer.speakers.items()}
+        audio_hash = content_hash(audio_file) if get_speaker_index() is not None else None
+        speaker_names = identify_speakers(labels, embeddings, durations, audio_hash)
+        renamed = False
+        for segment in transcribed_segments:
+            label = diarizer.resolve(segment['speaker'])
+            name = speaker_names.get(label, label)
+            renamed = renamed or name != segment['speaker']
+            segment['speaker'] = name
+        if renamed:
+            write_conversation(transcribed_segments, conversation_file, timer)
+
+    return {
+        'duration': diarizer.stats['audio_seconds'],
+        'turns': len(transcribed_segments),
+        'speakers': len(diarizer.speakers),
+        'diarization_seconds': diarizer.stats['diarization_seconds'],
+        # 화자 분리와 겹쳐 실행되므로 워커 합을 워커 수로 나눈 변환 단계 시간
+        'stt_seconds': stats['stage_seconds']['transcribe'] / max(1, workers),
+    }
+
+
+def load_diarization_pipeline():
+    """HUGGINGFACE_PYANNOTE_TOKEN 확인 후 화자 분리 파이프라인 로딩 (실패하면 안내를 출력하고 종료)"""
+    # Hugging Face 토큰 가져오기
+    hf_token = os.getenv("HUGGINGFACE_PYANNOTE_TOKEN")
+
+    print(f"토큰 확인: {hf_token[:10] if hf_token else 'None'}...")
+
+    if not hf_token:
+        print("Hugging Face 토큰이 필요합니다.")
+        print("1. https://huggingface.co/settings/tokens 에서 토큰 생성")
+        print("2. 다음 모델들에 대한 접근 권한 받기:")
+        print("   - https://huggingface.co/pyannote/speaker-diarization-3.1")
+        print("   - https://huggingface.co/pyannote/segmentation-3.0")
+        print("   - https://huggingface.co/pyannote/clustering-3.0")
+        print("3. stt/pyannote/.env 파일에 HUGGINGFACE_PYANNOTE_TOKEN=your_token_here 추가")
+        exit(1)
+
+    timer = StageTimer()
+
+    try:
+        # pipeline 로드 시 토큰 사용 (모델 레지스트리에 보관해 같은 프로세스에서는 한 번만 로딩)
+        print("모델 로딩 중... (시간이 걸릴 수 있습니다)")
+        with timer.stage("화자 분리 모델 로딩"):
+            pipeline = get_diarization_pipeline(hf_token)
+        print("모델 로딩 완료!")
+    except Exception as e:
+        print(f"모델 로딩 실패: {e}")
+        print("\n해결 방법:")
+        print("1. 다음 모델들에 대한 접근 권한을 확인하세요:")
+        print("   - https://huggingface.co/pyannote/speaker-diarization-3.1")
+        print("   - https://huggingface.co/pyannote/segmentation-3.0")
+        print("   - https://huggingface.co/pyannote/clustering-3.0")
+        print("2. 각 페이지에서 'Accept' 버튼을 클릭하세요")
+        print("3. 토큰이 올바른지 확인하세요")
+        exit(1)
+
+    return pipeline
+
+
+def check_modes():
+    """PIPELINE_MODE / DIARIZATION_MODE / TURN_TRANSCRIBE_MODE 조합 확인 (잘못되면 종료)"""
+    if pipeline_mode not in ("per_turn", "per_speaker", "both"):
+        print(f"알 수 없는 PIPELINE_MODE: {pipeline_mode} (per_turn, per_speaker, both 중 선택)")
+        exit(1)
+
+    if diarization_mode not in ("full", "streaming"):
+        print(f"알 수 없는 DIARIZATION_MODE: {diarization_mode} (full, streaming 중 선택)")
+        exit(1)
+    if diarization_mode == "streaming" and (pipeline_mode != "per_turn" or turn_transcribe_mode != "per_turn"):
+        # 화자별 전체 트랙/일괄 변환은 모든 구간과 전체 파형이 있어야 하므로 스트리밍과 함께 쓸 수 없다
+        print("DIARIZATION_MODE=streaming 은 PIPELINE_MODE=per_turn, TURN_TRANSCRIBE_MODE=per_turn 에서만 사용할 수 있습니다.")
+        exit(1)
+    if turn_transcribe_mode == "batched" and whisper_backend_kind not in WORD_TIMESTAMP_BACKENDS:
+        # 세그먼트 단위로만 재매핑하면 구간 경계를 넘는 세그먼트의 텍스트가 한 화자에게 몰린다
+        print(f"TURN_TRANSCRIBE_MODE=batched 는 단어 타임스탬프를 주는 백엔드({', '.join(WORD_TIMESTAMP_BACKENDS)})"
+              f"에서만 사용할 수 있습니다. (WHISPER_BACKEND={whisper_backend_kind})")
+        exit(1)
+
+
+def process_file(pipeline, audio_file, output_prefix, whisper_backend=None, workers=None):
+    """
+    파일 하나 화자 분리 + 음성 인식
+
+    Args:
+        pipeline: get_diarization_pipeline() 의 화자 분리 파이프라인
+        audio_file (str): 입력 오디오 파일
+        output_prefix (str): 결과 파일 경로 앞부분 ("{prefix}.txt", "{prefix}_speakers.txt")
+        whisper_backend: 여러 파일이 함께 쓰는 구간 변환 백엔드 (None 이면 파일마다 만들고 닫음)
+        workers (int): whisper_backend 의 동시 변환 수
+
+    Returns:
+        dict: 파일별 지표 (file, duration, turns, speakers, diarization_seconds, stt_seconds, wall_seconds, rtf)
+
+    처리 중 오류는 호출한 쪽으로 그대로 전달된다.
+    """
+    timer = StageTimer()
+    conversation_file = f"{output_prefix}.txt"
+    speaker_text_file = f"{output_prefix}_speakers.txt"
+
+    if diarization_mode == "streaming":
+        metrics = run_streaming(pipeline, audio_file, conversation_file, timer, whisper_backend, workers)
+        metrics['wall_seconds'] = timer.total()
+        timer.print_report()
+        return finish_metrics(audio_file, metrics)
+
+    owns_backend = whisper_backend is None
+    speaker_thread = None
+
+    try:
+        with timer.stage("오디오 로딩/리샘플링"):
+            # ffmpeg 로 모노 16kHz float32 배열 디코딩 (모델이 기대하는 샘플링 레이트)
+            target_sample_rate = TARGET_SAMPLE_RATE
+            waveform = load_audio(audio_file, target_sample_rate)
+            print(f"오디오 정보 - 샘플링 레이트: {target_sample_rate}Hz, 길이: {len(waveform)} 샘플")
+            # 화자 분리 캐시/화자 인덱스 키 (파일 이름이 달라도 내용이 같으면 같은 값, 둘 다 안 쓰면 계산 생략)
+            audio_hash = None
+            if get_cache() is not None or get_speaker_index() is not None:
+                audio_hash = content_hash(audio_file)
+
+        with timer.stage("전처리"):
+            # Low-pass filter (3000Hz) 노이즈 제거 + 볼륨 5dB 증폭 (메모리상의 배열에서 처리)
+            print("Low-pass filter (3000Hz) 및 볼륨 5dB 증폭 적용 중...")
+            filtered_waveform = preprocess(waveform, target_sample_rate, cutoff=3000, gain_db=5.0)
+            # pyannote 입력 {'waveform': (1, 샘플) Tensor, 'sample_rate'} (배열을 복사 없이 감쌈)
+            # 임시 WAV 를 쓰고 다시 디코딩하지 않으므로 같은 폴더에서 여러 실행이 겹쳐도 충돌하지 않는다
+            diarization_input = to_pyannote_input(filtered_waveform, target_sample_rate)
+            print("전처리 완료")
+
+        with timer.stage("화자 분리"):
+            # 화자 분리 실행 (파일 대신 메모리상의 파형 전달, 같은 오디오는 캐시 사용)
+            turns, labels, embeddings = diarize(pipeline, diarization_input, audio_hash)
+        audio_seconds = len(waveform) / target_sample_rate
+        if audio_seconds > 0:
+            print(f"화자 분리 추론: {timer.timings['화자 분리']:.2f}초 "
+                  f"(오디오 {audio_seconds:.1f}초, RTF {timer.timings['화자 분리'] / audio_seconds:.3f})")
+
+        # 화자별 발화 길이 (화자 인덱스 중심 갱신 가중치)
+        durations = {}
+        for start, end, speaker in turns:
+            durations[speaker] = durations.get(speaker, 0.0) + end - start
+        speaker_names = identify_speakers(labels, embeddings, durations, audio_hash)
+
+        print("\n=== 화자 분리 결과 ===")
+
+        # 모든 발화 세그먼트를 시간 순서대로 저장할 리스트
+        all_segments = []
+
+        # 화자별 세그먼트를 저장할 딕셔너리 초기화
+        speaker_segments = {}
+
+        for start, end, speaker in turns:
+            speaker = speaker_names.get(speaker, speaker)
+            print(f"Speaker {speaker} from {start:.2f}s to {end:.2f}s")
+
+            # 화자별 세그먼트 수집
+            if speaker not in speaker_segments:
+                speaker_segments[speaker] = []
+            speaker_segments[speaker].append((start, end))
+
+            # 각 세그먼트를 시간 순서대로 저장
+            all_segments.append({
+                'speaker': speaker,
+                'start_time': start,
+                'end_time': end,
+                'start_sample': int(start * target_sample_rate),
+                'end_sample': int(end * target_sample_rate)
+            })
+
+        speaker_timer = timer
+        if pipeline_mode == "per_speaker":
+            transcribe_per_speaker(waveform, speaker_segments, target_sample_rate, speaker_text_file, timer)
+        elif pipeline_mode == "both":
+            # 화자별 전체 변환은 구간별 변환과 독립적이므로 별도 스레드에서 동시에 진행
+            # (타이머를 따로 둬 두 스레드의 단계 시간이 섞이지 않게 하고, 겹친 시간은 따로 출력)
+            speaker_timer = StageTimer()
+            speaker_thread = threading.Thread(
+                target=transcribe_per_speaker,
+                args=(waveform, speaker_segments, target_sample_rate, speaker_text_file, speaker_timer),
+                daemon=True,
+            )
+            speaker_thread.start()
+
+        if pipeline_mode in ("per_turn", "both"):
+            with timer.stage("구간별 변환"):
+                # 시간 순서대로 세그먼트 정렬
+                all_segments.sort(key=lambda x: x['start_time'])
+
+                # 세그먼트마다 whisper-cli 를 띄우지 않고 모델을 한 번만 로딩한 상주 백엔드 사용
+                # (일괄 처리에서는 여러 파일이 같은 백엔드를 함께 씀)
+                if owns_backend:
+                    whisper_backend, workers = create_turn_backend()
+
+                if turn_transcribe_mode == "batched":
+                    # 모든 세그먼트를 한 버퍼로 묶어 한 번에 변환 후 원래 구간으로 재매핑
+                    print("\n=== 세그먼트 일괄 텍스트 변환 중 ===")
+                    transcribed_segments = transcribe_batched(
+                        whisper_backend.transcribe, waveform, all_segments, target_sample_rate,
+                        None, gap_seconds=batch_gap_seconds, pad_seconds=segment_pad_seconds
+                    )
+                    write_conversation(transcribed_segments, conversation_file, timer)
+                else:
+                    # 구간 자르기 → 변환 (워커 풀, 실패 시 재시도) → 대화 파일 추가를 겹쳐 실행
+                    print(f"\n=== 세그먼트별 개별 텍스트 변환 중 (백엔드 {whisper_backend_kind}, 워커 {workers}개) ===")
+                    run_turn_pipeline(whisper_backend, workers, all_segments, target_sample_rate,
+                                      conversation_file, waveform)
+
+                if owns_backend:
+                    whisper_backend.close()
+                    whisper_backend = None
+
+        if speaker_thread is not None:
+            speaker_thread.join()
+
+        timer.print_report()
+        if speaker_timer is not timer:
+            speaker_timer.print_report("화자별 변환 스레드 소요 시간")
+            overlap = timer.overlap("구간별 변환", speaker_timer, "화자별 전체 변환")
+            print(f"구간별 변환과 화자별 전체 변환이 동시에 실행된 시간: {overlap:.2f}초 (두 표의 시간이 이만큼 겹침)")
+    finally:
+        # 구간별 변환이 실패해도 화자별 변환 스레드가 파일 쓰기를 마친 뒤에 정리하고 호출한 쪽으로 넘김
+        if speaker_thread is not None:
+            speaker_thread.join()
+        # 상주 whisper-server / 모델 종료
+        if owns_backend and whisper_backend is not None:
+            whisper_backend.close()
+
+    # 두 변환을 동시에 진행한 경우(both)에는 더 오래 걸린 쪽이 음성 인식 시간
+    return finish_metrics(audio_file, {
+        'duration': audio_seconds,
+        'turns': len(all_segments),
+        'speakers': len(speaker_segments),
+        'diarization_seconds': timer.timings.get("화자 분리", 0.0),
+        'stt_seconds': max(timer.timings.get("구간별 변환", 0.0),
+                           speaker_timer.timings.get("화자별 전체 변환", 0.0)),
+        'wall_seconds': timer.total(),
+    })
+
+
+def finish_metrics(audio_file, metrics):
+    """지표에 파일 이름과 RTF(전체 처리 시간 / 음성 길이) 추가"""
+    metrics['file'] = audio_file
+    metrics['rtf'] = metrics['wall_seconds'] / metrics['duration'] if metrics['duration'] > 0 else 0.0
+    print(f"\n파일 처리 완료: {audio_file} (길이 {metrics['duration']:.1f}초, 구간 {metrics['turns']}개, "
+          f"화자 {metrics['speakers']}명, 화자 분리 {metrics['diarization_seconds']:.1f}초, "
+          f"음성 인식 {metrics['stt_seconds']:.1f}초, RTF {metrics['rtf']:.3f})")
+    return metrics
+
+
+def main():
+    check_modes()
+    pipeline = load_diarization_pipeline()
+
+    audio_file = os.path.join(current_dir, "test.audio", "test9.mp3")
+
+    print(f"현재 디렉토리: {current_dir}")
+    print(f"찾는 파일 경로: {audio_file}")
+
+    # 파일 존재 확인
+    if not os.path.exists(audio_file):
+        print(f"오디오 파일을 찾을 수 없습니다: {audio_file}")
+        print(f"test.audio 폴더 내용:")
+        test_audio_dir = os.path.join(current_dir, "test.audio")
+        if os.path.exists(test_audio_dir):
+            for file in os.listdir(test_audio_dir):
+                print(f"  - {file}")
+        else:
+            print(f"test.audio 폴더가 존재하지 않습니다: {test_audio_dir}")
+        exit(1)
+
+    print(f"오디오 파일 처리 중: {audio_file}")
+
+    # 출력 디렉토리 설정
+    speakers_output_text_dir = os.path.join(current_dir, "speakers_output_text")
+
+    # 디렉토리가 없으면 생성
+    os.makedirs(speakers_output_text_dir, exist_ok=True)
+
+    # 결과 파일명 (현재 시간)
+    from datetime import datetime
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S_%f")[:17]
+
+    try:
+        process_file(pipeline, audio_file, os.path.join(speakers_output_text_dir, timestamp))
+        print(f"통합 텍스트는 {speakers_output_text_dir} 폴더에 저장되었습니다.")
+    except Exception as e:
+        print(f"화자 분리 처리 중 오류 발생: {e}")
+    finally:
+        release_diarization_pipeline()
+
+    get_registry().print_report()
+
+
+if __name__ == "__main__":
+    main()
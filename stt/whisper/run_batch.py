@@ -0,0 +1,271 @@
+# 폴더/목록 파일 일괄 화자 분리 + 음성 인식 (run.py 의 파일 단위 처리를 여러 파일에 적용)
+#
+# run.py 는 파일 하나마다 프로세스를 띄우면 pyannote 파이프라인과 whisper 모델을 매번 다시 올린다.
+# 여기서는 두 모델을 한 번만 로딩하고 파일 여러 개를 동시에 처리한다.
+# - 화자 분리(pyannote) 호출은 한 번에 하나씩만 실행하고 (torch 스레드를 CPU 예산 안에서 고정)
+# - 구간 변환은 파일들이 같은 whisper 워커 풀을 함께 써서, 한 파일이 화자 분리하는 동안 다른 파일의 구간을 변환한다
+# - 끝난 파일은 출력 폴더의 done.txt 에 기록해 중간에 죽어도 다시 실행하면 남은 파일부터 이어서 처리한다
+# - 파일별 길이/구간 수/화자 분리 시간/음성 인식 시간/RTF 를 metrics.csv 에 추가한다
+#
+# 사용법:
+#   python run_batch.py ./recordings                         # 폴더 안 오디오 파일 전체
+#   python run_batch.py a.mp3 b.mp3 --output-dir ./out
+#   python run_batch.py --manifest files.txt --jobs 3 --cpu-budget 12
+#
+# 목록 파일은 한 줄에 경로 하나 (빈 줄과 # 주석은 무시, 상대 경로는 목록 파일 기준).
+# 화자 분리/변환 방식 등 나머지 설정은 run.py 와 같은 .env 를 따른다.
+
+import argparse
+import csv
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+import run
+from model_registry import get_registry
+from text_metrics import AUDIO_EXTENSIONS
+
+DONE_FILE = "done.txt"
+METRICS_FILE = "metrics.csv"
+METRICS_FIELDS = ["file", "status", "duration_s", "turns", "speakers", "diarization_s", "stt_s", "wall_s",
+                  "rtf", "error"]
+
+
+def set_torch_threads(num_threads):
+    """현재 스레드의 torch 연산 스레드 수 지정 (torch 스레드 설정은 호출한 스레드에만 적용될 수 있음)"""
+    if torch is not None and torch.get_num_threads() != num_threads:
+        torch.set_num_threads(num_threads)
+
+
+class SerializedPipeline:
+    """
+    화자 분리 파이프라인 호출을 한 번에 하나로 제한하는 래퍼
+
+    pyannote 파이프라인은 내부 상태를 가진 모델이라 여러 스레드에서 동시에 부르지 않고,
+    화자 분리 대기 중인 파일은 그동안 다른 파일의 구간 변환이 CPU 를 쓴다.
+    호출은 파일 작업 스레드에서 일어나므로 torch 스레드 수도 호출하는 스레드에서 맞춘다.
+
+    Args:
+        pipeline: 화자 분리 파이프라인
+        num_threads (int): 화자 분리에 쓸 torch 스레드 수
+    """
+
+    def __init__(self, pipeline, num_threads):
+        self._pipeline = pipeline
+        self._num_threads = num_threads
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            set_torch_threads(self._num_threads)
+            return self._pipeline(*args, **kwargs)
+
+
+def collect_files(inputs, manifest=None):
+    """
+    파일/폴더 인자와 목록 파일을 오디오 파일 절대 경로 목록으로 펼침 (중복 제거, 순서 유지)
+
+    Args:
+        inputs (list): 오디오 파일 또는 폴더 (폴더는 바로 아래 오디오 파일만)
+        manifest (str): 한 줄에 경로 하나인 목록 파일
+
+    Returns:
+        list: 오디오 파일 절대 경로 목록
+    """
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths += [os.path.join(item, name) for name in sorted(os.listdir(item))
+                      if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS]
+        else:
+            paths.append(item)
+    if manifest:
+        base_dir = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    paths.append(os.path.join(base_dir, os.path.expanduser(line)))
+    return list(dict.fromkeys(os.path.abspath(path) for path in paths))
+
+
+def load_done(done_path):
+    """이전 실행에서 끝난 파일 목록"""
+    if not os.path.exists(done_path):
+        return set()
+    with open(done_path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+def output_prefixes(paths, output_dir):
+    """
+    파일별 결과 경로 앞부분 (파일 이름 기준, 다른 폴더의 같은 이름은 경로 해시를 붙여 구분)
+
+    다시 실행해도 같은 파일은 같은 이름이 되도록 실행 순서가 아니라 경로로 정한다.
+    """
+    stems = {}
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        stems.setdefault(stem, []).append(path)
+    prefixes = {}
+    for stem, same in stems.items():
+        for path in same:
+            name = stem
+            if len(same) > 1:
+                name = f"{stem}_{hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]}"
+            prefixes[path] = os.path.join(output_dir, name)
+    return prefixes
+
+
+class BatchRecorder:
+    """done.txt / metrics.csv 기록 (여러 작업 스레드에서 호출)"""
+
+    def __init__(self, output_dir):
+        self.done_path = os.path.join(output_dir, DONE_FILE)
+        self.metrics_path = os.path.join(output_dir, METRICS_FILE)
+        self._lock = threading.Lock()
+
+    def record(self, path, metrics=None, error=None):
+        """
+        파일 하나의 결과 기록 (성공한 파일만 done.txt 에 추가해 다음 실행에서 건너뜀)
+
+        Args:
+            path (str): 오디오 파일 절대 경로
+            metrics (dict): process_file() 지표 (실패 시 None)
+            error (Exception): 실패 원인
+        """
+        if metrics is not None:
+            row = {
+                'file': path, 'status': "ok",
+                'duration_s': f"{metrics['duration']:.2f}",
+                'turns': metrics['turns'], 'speakers': metrics['speakers'],
+                'diarization_s': f"{metrics['diarization_seconds']:.2f}",
+                'stt_s': f"{metrics['stt_seconds']:.2f}",
+                'wall_s': f"{metrics['wall_seconds']:.2f}",
+                'rtf': f"{metrics['rtf']:.4f}", 'error': "",
+            }
+        else:
+            row = {field: "" for field in METRICS_FIELDS}
+            row.update(file=path, status="failed", error=str(error))
+
+        with self._lock:
+            new_file = not os.path.exists(self.metrics_path)
+            with open(self.metrics_path, "a", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=METRICS_FIELDS)
+                if new_file:
+                    writer.writeheader()
+                writer.writerow(row)
+            if metrics is not None:
+                # 결과 파일을 다 쓴 뒤에 기록 (프로세스가 죽어도 done.txt 에 있는 파일은 결과가 온전함)
+                with open(self.done_path, "a", encoding="utf-8") as f:
+                    f.write(path + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+
+
+def plan_threads(cpu_budget, jobs):
+    """
+    CPU 예산을 화자 분리(torch)와 whisper 워커 풀에 나눔
+
+    파일이 하나씩만 처리되면 두 단계가 겹치지 않으므로 둘 다 예산 전체를 쓰고,
+    동시에 여러 파일을 처리하면 화자 분리 한 건과 구간 변환이 겹치므로 절반씩 나눈다.
+
+    Returns:
+        tuple: (화자 분리 스레드 수, whisper 워커 수)
+    """
+    if jobs <= 1:
+        diarization_threads, whisper_threads = cpu_budget, cpu_budget
+    else:
+        diarization_threads = max(1, cpu_budget // 2)
+        whisper_threads = max(1, cpu_budget - diarization_threads)
+    return diarization_threads, max(1, whisper_threads // max(1, run.whisper_threads_per_worker))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="폴더/목록 파일 일괄 화자 분리 + 음성 인식")
+    parser.add_argument("inputs", nargs="*", help="오디오 파일 또는 폴더")
+    parser.add_argument("--manifest", default=None, help="한 줄에 경로 하나인 목록 파일")
+    parser.add_argument("--output-dir", default=os.path.join(run.current_dir, "speakers_output_text", "batch"),
+                        help="결과/done.txt/metrics.csv 폴더 (기본값: speakers_output_text/batch)")
+    parser.add_argument("--cpu-budget", type=int, default=os.cpu_count() or 1,
+                        help="사용할 CPU 코어 수 (기본값: 전체)")
+    parser.add_argument("--jobs", type=int, default=2, help="동시에 처리할 파일 수 (기본값: 2)")
+    args = parser.parse_args()
+
+    paths = collect_files(args.inputs, args.manifest)
+    if not paths:
+        parser.error("오디오 파일 또는 --manifest 가 필요합니다.")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    recorder = BatchRecorder(args.output_dir)
+    done = load_done(recorder.done_path)
+    pending = [path for path in paths if path not in done]
+    missing = [path for path in pending if not os.path.exists(path)]
+    pending = [path for path in pending if path not in missing]
+    skipped = len(paths) - len(pending) - len(missing)
+    print(f"파일 {len(paths)}개 중 완료 {skipped}개 건너뜀, "
+          f"없는 파일 {len(missing)}개, 처리할 파일 {len(pending)}개")
+    for path in missing:
+        print(f"  오디오 파일을 찾을 수 없습니다: {path}")
+    if not pending:
+        return
+
+    run.check_modes()
+    jobs = max(1, min(args.jobs, len(pending)))
+    cpu_budget = max(1, args.cpu_budget)
+    diarization_threads, pool_size = plan_threads(cpu_budget, jobs)
+    print(f"CPU 예산 {cpu_budget}코어: 동시 파일 {jobs}개, 화자 분리 스레드 {diarization_threads}개, "
+          f"whisper 워커 {pool_size}개 x {run.whisper_threads_per_worker}스레드")
+
+    pipeline = SerializedPipeline(run.load_diarization_pipeline(), diarization_threads)
+    whisper_backend, workers = run.create_turn_backend(pool_size)
+    prefixes = output_prefixes(paths, args.output_dir)
+
+    def process(path):
+        return run.process_file(pipeline, path, prefixes[path], whisper_backend, workers)
+
+    results = []
+    failed = 0
+    batch_start = time.time()
+    try:
+        # 파일 작업 스레드의 나머지 torch 연산(입력 텐서 변환 등)도 같은 예산 안에서 실행
+        with ThreadPoolExecutor(max_workers=jobs, initializer=set_torch_threads,
+                                initargs=(diarization_threads,)) as executor:
+            futures = {executor.submit(process, path): path for path in pending}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    metrics = future.result()
+                except Exception as e:
+                    print(f"화자 분리 처리 중 오류 발생 ({path}): {e}")
+                    recorder.record(path, error=e)
+                    failed += 1
+                    continue
+                recorder.record(path, metrics)
+                results.append(metrics)
+    finally:
+        whisper_backend.close()
+        run.release_diarization_pipeline()
+    batch_seconds = time.time() - batch_start
+
+    total_audio = sum(metrics['duration'] for metrics in results)
+    print(f"\n=== 일괄 처리 결과 ({args.output_dir}) ===")
+    print(f"성공 {len(results)}개, 실패 {failed}개, 건너뜀 {skipped}개")
+    print(f"음성 {total_audio:.1f}초, 전체 처리 {batch_seconds:.1f}초", end="")
+    if total_audio > 0:
+        print(f", RTF {batch_seconds / total_audio:.3f} (음성 {total_audio / batch_seconds:.1f}초/초)")
+    else:
+        print()
+    print(f"파일별 지표: {recorder.metrics_path}")
+    get_registry().print_report()
+
+
+if __name__ == "__main__":
+    main()
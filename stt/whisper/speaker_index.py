@@ -0,0 +1,370 @@
+# 파일을 넘나드는 화자 임베딩 인덱스 + 파일 해시별 화자 분리 결과 캐시
+#
+# run.py 는 실행할 때마다 화자를 SPEAKER_00, SPEAKER_01 ... 로 새로 매기고 임베딩은 버린다.
+# 같은 사람들이 반복해서 나오는 회의 녹음을 위해
+# - 화자별 임베딩 중심(centroid)을 디스크 인덱스에 저장하고
+# - 새 파일의 화자 임베딩을 인덱스에서 벡터 검색해 코사인 거리가 max_distance 이하면 기존 화자 ID 를,
+#   아니면 새 화자 ID(SPK0001, SPK0002 ...)를 붙인다 (한 파일의 두 화자가 같은 ID 로 묶이지 않도록 일대일 매칭)
+# - 매칭된 화자의 중심은 발화 길이로 가중해 갱신한다
+# faiss 가 설치되어 있으면 IndexFlatIP 로 후보를 찾고, 없으면 numpy 행렬 곱으로 전체를 비교한다.
+#
+# 화자 분리 결과(구간 + 화자별 임베딩)는 오디오 내용 해시 기준으로 변환 결과 캐시(transcript_cache)에 넣어
+# 같은 파일을 다시 처리할 때 CPU 에서 가장 오래 걸리는 임베딩 추출을 포함한 화자 분리 전체를 건너뛴다.
+# TRANSCRIPT_CACHE_DIR 없이 인덱스만 사용하면 인덱스 폴더 안(diarization/)의 캐시에 저장한다.
+#
+# 여러 프로세스가 같은 인덱스를 쓸 수 있으므로 저장할 때 디스크의 인덱스를 다시 읽어
+# 이번 실행에서 바뀐 화자만 반영한다 (다른 실행이 등록한 화자를 덮어쓰지 않음).
+#
+# 인덱스는 음성 임베딩을 실행 간에 보관하고 결과의 화자 번호(SPEAKER_00 ...)를 ID(SPK0001 ...)로 바꾸므로
+# SPEAKER_INDEX_DIR 를 지정한 경우에만 사용한다 (기본값은 사용 안 함, 화자 분리 번호를 그대로 씀).
+#
+# 사용법 (인덱스 관리):
+#   python speaker_index.py                       # 등록된 화자 목록
+#   python speaker_index.py --rename SPK0001 홍길동  # 화자 이름 지정 (이후 결과에 이름으로 표시)
+#
+# 환경 변수:
+#   SPEAKER_INDEX_DIR       인덱스 폴더 (비우면 사용 안 함, 기본값: 비어 있음. 예: ~/.cache/stt_speakers)
+#   SPEAKER_MATCH_THRESHOLD 기존 화자로 볼 코사인 거리 상한 (기본값: 0.5)
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from transcript_cache import DEFAULT_MAX_MB, TranscriptCache, get_cache
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: 프로세스 간 잠금 없이 저장 (스레드 간 잠금과 다시 읽어 합치기만 적용)
+    fcntl = None
+
+DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".cache", "stt_speakers")
+DEFAULT_MATCH_THRESHOLD = 0.5
+
+# faiss 검색 시 화자 하나당 가져올 후보 수
+SEARCH_CANDIDATES = 8
+
+_shared_index = None
+_shared_lock = threading.Lock()
+
+
+def normalize_rows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+class SpeakerIndex:
+    """
+    디스크에 저장되는 화자 임베딩 인덱스
+
+    Args:
+        index_dir (str): 인덱스 폴더 (화자 목록과 임베딩 중심을 speakers.json 하나에 저장)
+        max_distance (float): 기존 화자로 볼 코사인 거리 상한
+    """
+
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR, max_distance=DEFAULT_MATCH_THRESHOLD):
+        self.index_dir = index_dir
+        self.max_distance = max_distance
+        self.matched = 0
+        self.enrolled = 0
+        self._lock = threading.Lock()
+        self._faiss_index = None
+        self._diarization_cache = None
+        self._changed = set()   # 마지막 저장 이후 갱신/이름 지정한 화자 ID
+        self._new = set()       # 마지막 저장 이후 새로 등록한 화자 ID
+        os.makedirs(index_dir, exist_ok=True)
+        self.speakers, self.embeddings = self._read()
+
+    def _path(self):
+        return os.path.join(self.index_dir, "speakers.json")
+
+    def _read(self):
+        """디스크의 (화자 목록, 정규화한 임베딩 중심 행렬 또는 None)"""
+        try:
+            with open(self._path(), encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return [], None
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 화자 인덱스를 읽지 못해 새로 시작합니다: {e}")
+            return [], None
+        if not stored:
+            return [], None
+        return stored, normalize_rows([speaker.pop('embedding') for speaker in stored])
+
+    @contextmanager
+    def _file_lock(self):
+        """같은 인덱스 폴더를 쓰는 다른 프로세스와의 저장 잠금"""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.index_dir, "speakers.lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @property
+    def diarization_cache(self):
+        """인덱스 폴더 안의 화자 분리 결과 캐시 (TRANSCRIPT_CACHE_DIR 를 쓰지 않을 때)"""
+        with self._lock:
+            if self._diarization_cache is None:
+                max_mb = float(os.getenv("TRANSCRIPT_CACHE_MAX_MB", str(DEFAULT_MAX_MB))) or DEFAULT_MAX_MB
+                self._diarization_cache = TranscriptCache(os.path.join(self.index_dir, "diarization"),
+                                                          int(max_mb * 1024 * 1024))
+        return self._diarization_cache
+
+    def __len__(self):
+        return len(self.speakers)
+
+    def display_name(self, speaker_id):
+        """이름이 지정된 화자는 이름, 아니면 ID"""
+        for speaker in self.speakers:
+            if speaker['id'] == speaker_id:
+                return speaker.get('name') or speaker_id
+        return speaker_id
+
+    def _distances(self, queries):
+        """(질의 수, 화자 수) 코사인 거리 행렬 (faiss 면 후보 밖은 inf)"""
+        if faiss is None or len(self.speakers) <= SEARCH_CANDIDATES:
+            return 1.0 - queries @ self.embeddings.T
+        if self._faiss_index is None:
+            self._faiss_index = faiss.IndexFlatIP(self.embeddings.shape[1])
+            self._faiss_index.add(np.ascontiguousarray(self.embeddings))
+        similarities, indices = self._faiss_index.search(np.ascontiguousarray(queries), SEARCH_CANDIDATES)
+        distances = np.full((len(queries), len(self.speakers)), np.inf, dtype=np.float32)
+        for row in range(len(queries)):
+            valid = indices[row] >= 0
+            distances[row, indices[row][valid]] = 1.0 - similarities[row][valid]
+        return distances
+
+    def identify(self, embeddings, durations=None, enroll=True, source=None):
+        """
+        화자 임베딩을 인덱스의 화자 ID 로 매칭
+
+        Args:
+            embeddings: (화자 수, 차원) 배열 (NaN 인 행은 매칭하지 않음)
+            durations (list): 화자별 발화 길이 (초, 중심 갱신 가중치)
+            enroll (bool): 매칭되지 않은 화자를 새 ID 로 등록할지 여부
+            source (str): 화자가 나온 파일의 content_hash() (같은 파일을 다시 넣어도 중심이 치우치지 않도록)
+
+        Returns:
+            list: 화자별 ID (매칭/등록하지 못한 화자는 None)
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim != 2 or len(embeddings) == 0:
+            return []
+        durations = durations if durations is not None else [1.0] * len(embeddings)
+        valid = [row for row in range(len(embeddings)) if np.all(np.isfinite(embeddings[row]))]
+        queries = normalize_rows(embeddings[valid]) if valid else None
+        result = [None] * len(embeddings)
+
+        with self._lock:
+            if valid and self.embeddings is not None and len(self.speakers):
+                # 한 파일의 두 화자가 같은 ID 로 묶이지 않도록 일대일 매칭
+                distances = self._distances(queries)
+                cost = np.where(np.isfinite(distances), distances, 1e6)
+                rows, cols = linear_sum_assignment(cost)
+                for row, col in zip(rows, cols):
+                    if distances[row, col] <= self.max_distance:
+                        result[valid[row]] = self.speakers[col]['id']
+                        self._update(col, queries[row], durations[valid[row]], source)
+                        self.matched += 1
+
+            if enroll:
+                for position, row in enumerate(valid):
+                    if result[row] is None:
+                        result[row] = self._enroll(queries[position], durations[row], source)
+        return result
+
+    def _update(self, col, embedding, duration, source):
+        """발화 길이로 가중한 이동 평균으로 중심 갱신 (같은 파일을 다시 처리한 경우는 갱신하지 않음)"""
+        speaker = self.speakers[col]
+        if source and source in speaker['files']:
+            return
+        weight = max(float(duration), 1e-3)
+        merged = self.embeddings[col] * speaker['duration'] + embedding * weight
+        self.embeddings[col] = merged / max(np.linalg.norm(merged), 1e-12)
+        speaker['duration'] += weight
+        speaker['count'] += 1
+        if source:
+            speaker['files'].append(source)
+        self._changed.add(speaker['id'])
+        self._faiss_index = None
+
+    def _enroll(self, embedding, duration, source):
+        speaker_id = f"SPK{len(self.speakers) + 1:04d}"
+        self.speakers.append({'id': speaker_id, 'name': None, 'count': 1,
+                              'duration': max(float(duration), 1e-3),
+                              'files': [source] if source else []})
+        row = embedding[np.newaxis, :]
+        self.embeddings = row.copy() if self.embeddings is None else np.vstack([self.embeddings, row])
+        self._faiss_index = None
+        self._new.add(speaker_id)
+        self.enrolled += 1
+        return speaker_id
+
+    def rename(self, speaker_id, name):
+        """화자 이름 지정 (저장은 save())"""
+        with self._lock:
+            for speaker in self.speakers:
+                if speaker['id'] == speaker_id:
+                    speaker['name'] = name
+                    self._changed.add(speaker_id)
+                    return True
+        return False
+
+    def save(self):
+        """
+        인덱스를 디스크에 저장
+
+        디스크의 인덱스를 다시 읽어 이번 실행에서 갱신한 화자는 덮어쓰고, 새로 등록한 화자는 추가한다.
+        다른 실행이 같은 ID 로 먼저 등록했으면 새 화자는 비어 있는 다음 ID 로 옮긴다.
+        저장 후에는 다른 실행이 등록한 화자도 이 인스턴스에서 매칭된다.
+
+        Returns:
+            dict: 옮긴 화자 ID (이전 ID → 저장된 ID, 없으면 빈 dict)
+        """
+        renamed = {}
+        with self._lock, self._file_lock():
+            speakers, embeddings = self._read()
+            vectors = list(embeddings) if embeddings is not None else []
+            rows = {speaker['id']: row for row, speaker in enumerate(speakers)}
+            taken = set(rows) | {speaker['id'] for speaker in self.speakers}
+            for row, speaker in enumerate(self.speakers):
+                speaker_id = speaker['id']
+                if speaker_id in self._new and speaker_id in rows:
+                    number = len(taken) + 1
+                    while f"SPK{number:04d}" in taken:
+                        number += 1
+                    renamed[speaker_id] = speaker_id = f"SPK{number:04d}"
+                    taken.add(speaker_id)
+                    speaker = dict(speaker, id=speaker_id)
+                elif speaker_id not in self._new and speaker_id not in self._changed and speaker_id in rows:
+                    continue
+                if speaker_id in rows:
+                    speakers[rows[speaker_id]] = speaker
+                    vectors[rows[speaker_id]] = self.embeddings[row]
+                else:
+                    rows[speaker_id] = len(speakers)
+                    speakers.append(speaker)
+                    vectors.append(self.embeddings[row])
+
+            stored = [dict(speaker, embedding=vectors[row].tolist()) for row, speaker in enumerate(speakers)]
+            # 다른 프로세스가 반쯤 쓰인 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+            fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(stored, f, ensure_ascii=False)
+                os.replace(tmp_path, self._path())
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+
+            self.speakers = speakers
+            self.embeddings = np.stack(vectors).astype(np.float32) if vectors else None
+            self._faiss_index = None
+            self._changed.clear()
+            self._new.clear()
+        return renamed
+
+    def print_report(self):
+        search = "faiss" if faiss is not None else "numpy"
+        print(f"\n=== 화자 인덱스 ({self.index_dir}, 검색 {search}) ===")
+        print(f"등록 화자 {len(self.speakers)}명, 이번 실행 매칭 {self.matched}명 / 신규 등록 {self.enrolled}명 "
+              f"(거리 상한 {self.max_distance})")
+
+
+def get_speaker_index():
+    """
+    환경 변수 설정으로 만든 프로세스 공용 화자 인덱스
+
+    Returns:
+        SpeakerIndex | None: SPEAKER_INDEX_DIR 가 비어 있으면 None (사용 안 함, 기본값)
+    """
+    global _shared_index
+    index_dir = os.getenv("SPEAKER_INDEX_DIR", "")
+    if not index_dir:
+        return None
+    with _shared_lock:
+        if _shared_index is None:
+            max_distance = float(os.getenv("SPEAKER_MATCH_THRESHOLD", str(DEFAULT_MATCH_THRESHOLD)))
+            _shared_index = SpeakerIndex(os.path.expanduser(index_dir), max_distance)
+    return _shared_index
+
+
+def get_diarization_cache():
+    """
+    화자 분리 결과(구간 + 임베딩) 캐시
+
+    Returns:
+        TranscriptCache | None: 변환 결과 캐시, 없으면 화자 인덱스 폴더의 캐시, 둘 다 사용하지 않으면 None
+    """
+    cache = get_cache()
+    if cache is not None:
+        return cache
+    index = get_speaker_index()
+    return index.diarization_cache if index is not None else None
+
+
+def diarization_to_cache(turns, labels, embeddings):
+    """화자 분리 결과를 캐시에 넣을 JSON 값으로 변환"""
+    return {
+        'turns': [[float(start), float(end), label] for start, end, label in turns],
+        'labels': list(labels),
+        'embeddings': None if embeddings is None else np.asarray(embeddings, dtype=np.float32).tolist(),
+    }
+
+
+def diarization_from_cache(value):
+    """diarization_to_cache() 값을 (turns, labels, embeddings) 로 복원"""
+    turns = [(start, end, label) for start, end, label in value['turns']]
+    embeddings = value.get('embeddings')
+    if embeddings is not None:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+    return turns, value['labels'], embeddings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="화자 임베딩 인덱스 관리")
+    parser.add_argument("--index-dir", default=None, help="인덱스 폴더 (기본값: SPEAKER_INDEX_DIR)")
+    parser.add_argument("--rename", nargs=2, metavar=("SPEAKER_ID", "NAME"), help="화자 이름 지정")
+    args = parser.parse_args()
+
+    index_dir = args.index_dir or os.path.expanduser(os.getenv("SPEAKER_INDEX_DIR", ""))
+    if not index_dir:
+        parser.error("화자 인덱스를 사용하지 않는 설정입니다 (--index-dir 또는 SPEAKER_INDEX_DIR 지정)")
+    index = SpeakerIndex(index_dir)
+
+    if args.rename:
+        speaker_id, name = args.rename
+        if not index.rename(speaker_id, name):
+            print(f"화자를 찾을 수 없습니다: {speaker_id}")
+            return
+        index.save()
+        print(f"{speaker_id} → {name}")
+        return
+
+    print(f"화자 인덱스: {index_dir} (등록 화자 {len(index)}명)")
+    for speaker in index.speakers:
+        name = f" ({speaker['name']})" if speaker.get('name') else ""
+        print(f"{speaker['id']}{name}: 파일 {len(speaker['files'])}개, 발화 {speaker['duration']:.0f}초, "
+              f"매칭 {speaker['count']}회")
+
+
+if __name__ == "__main__":
+    main()
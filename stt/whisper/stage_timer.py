@@ -0,0 +1,68 @@
+# 파이프라인 단계별 소요 시간 측정
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """
+    단계별 소요 시간 기록
+
+    사용 예:
+        timer = StageTimer()
+        with timer.stage("화자 분리"):
+            ...
+        timer.print_report()
+
+    동시에 실행되는 작업은 스레드마다 타이머를 따로 두고 overlap() 으로 겹친 시간을 확인한다
+    (한 타이머에 섞으면 단계 비율 합이 100% 를 넘는다).
+    """
+
+    def __init__(self):
+        self.timings = {}
+        # 단계 이름 → (처음 시작 시각, 마지막 종료 시각)
+        self.spans = {}
+        self._created = time.time()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.time()
+        print(f"\n[단계 시작] {name}")
+        try:
+            yield
+        finally:
+            end = time.time()
+            elapsed = end - start
+            # 같은 이름의 단계가 여러 번 실행되면 누적
+            with self._lock:
+                self.timings[name] = self.timings.get(name, 0.0) + elapsed
+                self.spans[name] = (self.spans.get(name, (start,))[0], end)
+            print(f"[단계 완료] {name}: {elapsed:.2f}초")
+
+    def total(self):
+        return time.time() - self._created
+
+    def overlap(self, name, other, other_name):
+        """
+        이 타이머의 name 단계와 다른 타이머의 other_name 단계가 동시에 실행된 시간 (초)
+
+        Args:
+            name (str): 이 타이머의 단계 이름
+            other (StageTimer): 다른 스레드의 타이머
+            other_name (str): 다른 타이머의 단계 이름
+        """
+        if name not in self.spans or other_name not in other.spans:
+            return 0.0
+        start = max(self.spans[name][0], other.spans[other_name][0])
+        end = min(self.spans[name][1], other.spans[other_name][1])
+        return max(0.0, end - start)
+
+    def print_report(self, title="단계별 소요 시간"):
+        total = self.total()
+        print(f"\n=== {title} ===")
+        for name, elapsed in self.timings.items():
+            share = elapsed / total * 100 if total > 0 else 0.0
+            print(f"{name}: {elapsed:.2f}초 ({share:.1f}%)")
+        print(f"전체: {total:.2f}초")
@@ -0,0 +1,353 @@
+# 윈도우 단위 스트리밍 화자 분리 (몇 시간짜리 녹음용)
+#
+# 파일 전체를 한 번에 speaker-diarization-3.1 에 넣으면 메모리가 녹음 길이만큼 늘고
+# 마지막까지 결과가 하나도 나오지 않는다. 여기서는 겹치는 윈도우마다 파이프라인을 실행하고
+# 윈도우별 화자 임베딩을 전역 화자 중심(centroid)에 다시 클러스터링해 화자 번호를 유지한다.
+#
+#   |------ 윈도우 1 ------|
+#                 |------ 윈도우 2 ------|
+#                 ^^^^^^^^ 겹침 구간 (가운데를 경계로 앞/뒤 윈도우가 나눠 맡음)
+#
+# - 윈도우마다 담당 구간(겹침 구간의 가운데 ~ 다음 겹침 구간의 가운데)의 구간만 사용한다
+# - 담당 구간 끝에 걸친 구간은 다음 윈도우에서 이어질 수 있으므로 보류했다가 합친 뒤 내보낸다
+# - 나머지 구간은 윈도우 처리 직후 확정(finalized)되어 바로 나오므로 뒤쪽 오디오를 화자 분리하는 동안
+#   앞쪽 구간의 음성 인식을 시작할 수 있다
+# - 화자 매칭: 윈도우 화자 임베딩과 전역 화자 중심의 코사인 거리 (헝가리안 매칭, max_distance 이하만 인정)
+#   임베딩이 없는 화자(NaN)는 겹침 구간에서 이전 윈도우 구간과 가장 많이 겹치는 전역 화자로 매칭
+# - 재클러스터링: 중심끼리 max_distance 안으로 가까워진 전역 화자는 먼저 생긴 화자로 합친다
+#   (이미 내보낸 구간의 화자 번호는 바꾸지 않고 이후 구간부터 합친 번호를 사용)
+#
+# 사용 예:
+#   diarizer = StreamingDiarizer(pipeline, window_seconds=300, overlap_seconds=30)
+#   for turn in diarizer.run(stream_audio(path, 30.0)):
+#       print(turn['speaker'], turn['start_time'], turn['end_time'])
+#   diarizer.print_report()
+
+import time
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from audio_preprocess import TARGET_SAMPLE_RATE, to_pyannote_input
+
+
+class SpeakerCluster:
+    """전역 화자 하나 (발화 길이로 가중한 정규화 임베딩 합)"""
+
+    def __init__(self, label):
+        self.label = label
+        self.embedding_sum = None
+        self.weight = 0.0
+
+    def add(self, embedding, duration):
+        weighted = embedding * max(duration, 1e-3)
+        self.embedding_sum = weighted if self.embedding_sum is None else self.embedding_sum + weighted
+        self.weight += max(duration, 1e-3)
+
+    def merge(self, other):
+        if other.embedding_sum is not None:
+            self.embedding_sum = other.embedding_sum if self.embedding_sum is None \
+                else self.embedding_sum + other.embedding_sum
+        self.weight += other.weight
+
+    @property
+    def centroid(self):
+        if self.embedding_sum is None:
+            return None
+        return normalize(self.embedding_sum)
+
+
+def normalize(vector):
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def valid_embedding(embedding):
+    return embedding is not None and embedding.size > 0 and bool(np.all(np.isfinite(embedding)))
+
+
+class StreamingDiarizer:
+    """
+    겹치는 윈도우 단위 화자 분리 + 전역 화자 재클러스터링
+
+    Args:
+        pipeline: pyannote.audio Pipeline (speaker-diarization-3.1)
+        sample_rate (int): 입력 오디오 샘플링 레이트
+        window_seconds (float): 윈도우 길이 (초)
+        overlap_seconds (float): 윈도우 겹침 길이 (초, window_seconds 보다 짧아야 함)
+        max_distance (float): 같은 화자로 볼 임베딩 코사인 거리 상한
+            (speaker-diarization-3.1 클러스터링 임계값 0.70 과 맞춤)
+        preprocess_fn (callable): 파이프라인에 넣기 전 윈도우 배열에 적용할 전처리 (None 이면 생략)
+        pad_seconds (float): 구간 오디오를 자를 때 앞뒤 여유 시간 (초)
+        join_gap (float): 윈도우 경계에서 같은 화자 구간을 이어붙일 최대 간격 (초)
+    """
+
+    def __init__(self, pipeline, sample_rate=TARGET_SAMPLE_RATE, window_seconds=300.0, overlap_seconds=30.0,
+                 max_distance=0.7, preprocess_fn=None, pad_seconds=0.0, join_gap=0.5):
+        if not 0 <= overlap_seconds < window_seconds:
+            raise ValueError(f"overlap_seconds({overlap_seconds}) 는 0 이상, window_seconds({window_seconds}) 미만이어야 합니다.")
+        self.pipeline = pipeline
+        self.sample_rate = sample_rate
+        self.window_samples = int(window_seconds * sample_rate)
+        self.overlap_samples = int(overlap_seconds * sample_rate)
+        self.max_distance = max_distance
+        self.preprocess_fn = preprocess_fn
+        self.pad_samples = int(pad_seconds * sample_rate)
+        self.join_gap = join_gap
+
+        self.speakers = {}
+        self._aliases = {}
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0
+        self._received = 0
+        self._window_start = 0
+        self._held = []
+        self._previous_turns = []
+        self._return_embeddings = True
+        self._lags = []
+        self.stats = {
+            'windows': 0,
+            'turns': 0,
+            'merges': 0,
+            'audio_seconds': 0.0,
+            'decode_seconds': 0.0,
+            'diarization_seconds': 0.0,
+        }
+
+    def feed(self, chunk):
+        """
+        오디오 조각 추가 (윈도우가 채워질 때마다 화자 분리 실행)
+
+        Args:
+            chunk (numpy.ndarray): (샘플,) float32 배열
+
+        Returns:
+            list: 이번에 확정된 구간 dict 목록
+        """
+        chunk = np.asarray(chunk, dtype=np.float32).reshape(-1)
+        if chunk.size == 0:
+            return []
+        self._buffer = np.concatenate([self._buffer, chunk])
+        self._received += chunk.size
+
+        turns = []
+        while self._received - self._window_start >= self.window_samples:
+            turns += self._process_window(final=False)
+        return turns
+
+    def finish(self):
+        """
+        남은 오디오로 마지막 윈도우를 처리하고 보류 중인 구간까지 모두 확정
+
+        Returns:
+            list: 확정된 구간 dict 목록
+        """
+        turns = []
+        if self._received > self._window_start:
+            turns += self._process_window(final=True)
+        else:
+            turns += [self._emit(turn) for turn in self._held]
+            self._held = []
+        self.stats['audio_seconds'] = self._received / self.sample_rate
+        return turns
+
+    def run(self, chunks):
+        """
+        오디오 조각 iterator 를 소비하며 확정된 구간을 바로 내보내는 generator
+
+        Args:
+            chunks: stream_audio() / preprocess_stream() 처럼 (샘플,) 배열을 내는 iterable
+
+        Yields:
+            dict: 'speaker', 'start_time', 'end_time', 'start_sample', 'end_sample', 'audio' 를 가진 구간
+        """
+        iterator = iter(chunks)
+        while True:
+            start = time.perf_counter()
+            chunk = next(iterator, None)
+            self.stats['decode_seconds'] += time.perf_counter() - start
+            if chunk is None:
+                break
+            yield from self.feed(chunk)
+        yield from self.finish()
+
+    def resolve(self, label):
+        """재클러스터링으로 합쳐진 화자 번호를 현재 번호로 변환"""
+        while label in self._aliases:
+            label = self._aliases[label]
+        return label
+
+    def _run_pipeline(self, audio):
+        pipeline_input = to_pyannote_input(self.preprocess_fn(audio) if self.preprocess_fn else audio,
+                                           self.sample_rate)
+        if self._return_embeddings:
+            try:
+                return self.pipeline(pipeline_input, return_embeddings=True)
+            except TypeError:
+                # return_embeddings 를 지원하지 않는 pyannote 버전: 겹침 구간 매칭만 사용
+                print("⚠️ 파이프라인이 return_embeddings 를 지원하지 않아 겹침 구간으로만 화자를 매칭합니다.")
+                self._return_embeddings = False
+        return self.pipeline(pipeline_input), None
+
+    def _process_window(self, final):
+        start = self._window_start
+        end = min(start + self.window_samples, self._received)
+        audio = self._buffer[start - self._buffer_start:end - self._buffer_start]
+        offset = start / self.sample_rate
+
+        # 이 윈도우가 담당하는 구간 (겹침 구간의 가운데를 경계로 나눔)
+        own_start = (start + self.overlap_samples // 2 if start > 0 else 0) / self.sample_rate
+        own_end = (end if final else end - self.overlap_samples // 2) / self.sample_rate
+
+        started = time.perf_counter()
+        diarization, embeddings = self._run_pipeline(audio)
+        elapsed = time.perf_counter() - started
+        self.stats['diarization_seconds'] += elapsed
+        self.stats['windows'] += 1
+
+        local_turns = [(turn.start + offset, turn.end + offset, label)
+                       for turn, _, label in diarization.itertracks(yield_label=True)]
+        mapping = self._assign(diarization.labels(), embeddings, local_turns)
+        self._recluster()
+        print(f"화자 분리 윈도우 {self.stats['windows']}: {offset:.0f}s - {end / self.sample_rate:.0f}s "
+              f"({elapsed:.1f}초, 구간 {len(local_turns)}개, 전역 화자 {len(self.speakers)}명)")
+
+        # 담당 구간으로 자르기
+        new_turns = []
+        for turn_start, turn_end, label in sorted(local_turns):
+            turn_start, turn_end = max(turn_start, own_start), min(turn_end, own_end)
+            if turn_end > turn_start:
+                new_turns.append({'speaker': self.resolve(mapping[label]),
+                                  'start_time': turn_start, 'end_time': turn_end})
+
+        # 이전 윈도우 끝에 걸려 보류한 구간을 이번 윈도우의 같은 화자 구간과 이어붙임
+        candidates = []
+        for held in self._held:
+            held['speaker'] = self.resolve(held['speaker'])
+            for turn in new_turns:
+                if turn['speaker'] == held['speaker'] and turn['start_time'] <= held['end_time'] + self.join_gap:
+                    held['end_time'] = max(held['end_time'], turn['end_time'])
+                    new_turns.remove(turn)
+                    break
+            candidates.append(held)
+        candidates += new_turns
+
+        emitted, self._held = [], []
+        for turn in sorted(candidates, key=lambda t: t['start_time']):
+            if not final and turn['end_time'] >= own_end - self.join_gap:
+                self._held.append(turn)
+            else:
+                emitted.append(self._emit(turn))
+
+        # 다음 윈도우에서 겹침 구간 매칭에 쓸 구간
+        self._previous_turns = [(s, e, self.resolve(mapping[label])) for s, e, label in local_turns]
+
+        if not final:
+            self._window_start = end - self.overlap_samples
+        self._trim_buffer()
+        return emitted
+
+    def _assign(self, labels, embeddings, local_turns):
+        """윈도우 화자 번호 → 전역 화자 번호"""
+        durations = {label: 0.0 for label in labels}
+        for turn_start, turn_end, label in local_turns:
+            durations[label] = durations.get(label, 0.0) + turn_end - turn_start
+
+        vectors = {}
+        if embeddings is not None:
+            for index, label in enumerate(labels):
+                if index < len(embeddings) and valid_embedding(np.asarray(embeddings[index])):
+                    vectors[label] = normalize(np.asarray(embeddings[index], dtype=np.float64))
+
+        mapping = {}
+        clusters = [cluster for cluster in self.speakers.values() if cluster.centroid is not None]
+        embedded = list(vectors)
+        if embedded and clusters:
+            # 코사인 거리 행렬로 일대일 매칭 (한 윈도우의 두 화자가 같은 전역 화자로 묶이지 않도록)
+            centroids = np.stack([cluster.centroid for cluster in clusters])
+            distances = 1.0 - np.stack([vectors[label] for label in embedded]) @ centroids.T
+            rows, cols = linear_sum_assignment(distances)
+            for row, col in zip(rows, cols):
+                if distances[row, col] <= self.max_distance:
+                    mapping[embedded[row]] = clusters[col].label
+
+        # 임베딩이 없는 화자: 겹침 구간에서 이전 윈도우 구간과 가장 많이 겹치는 전역 화자
+        taken = set(mapping.values())
+        for label in labels:
+            if label in mapping or label in vectors:
+                continue
+            overlaps = {}
+            for turn_start, turn_end, local in local_turns:
+                if local != label:
+                    continue
+                for prev_start, prev_end, speaker in self._previous_turns:
+                    shared = min(turn_end, prev_end) - max(turn_start, prev_start)
+                    if shared > 0 and speaker not in taken:
+                        overlaps[speaker] = overlaps.get(speaker, 0.0) + shared
+            if overlaps:
+                mapping[label] = max(overlaps, key=overlaps.get)
+                taken.add(mapping[label])
+
+        # 매칭되지 않은 화자는 새 전역 화자
+        for label in labels:
+            if label not in mapping:
+                new_label = f"SPEAKER_{len(self.speakers) + self.stats['merges']:02d}"
+                self.speakers[new_label] = SpeakerCluster(new_label)
+                mapping[label] = new_label
+            if label in vectors:
+                self.speakers[mapping[label]].add(vectors[label], durations.get(label, 0.0))
+        return mapping
+
+    def _recluster(self):
+        """중심이 max_distance 안으로 가까워진 전역 화자를 먼저 생긴 화자로 합침"""
+        while True:
+            clusters = [cluster for cluster in self.speakers.values() if cluster.centroid is not None]
+            if len(clusters) < 2:
+                return
+            centroids = np.stack([cluster.centroid for cluster in clusters])
+            distances = 1.0 - centroids @ centroids.T
+            np.fill_diagonal(distances, np.inf)
+            row, col = np.unravel_index(np.argmin(distances), distances.shape)
+            if distances[row, col] > self.max_distance:
+                return
+            keep, drop = sorted((clusters[row], clusters[col]), key=lambda c: int(c.label.split("_")[-1]))
+            keep.merge(drop)
+            del self.speakers[drop.label]
+            self._aliases[drop.label] = keep.label
+            self.stats['merges'] += 1
+            print(f"  화자 재클러스터링: {drop.label} → {keep.label} (거리 {distances[row, col]:.3f})")
+
+    def _emit(self, turn):
+        turn['speaker'] = self.resolve(turn['speaker'])
+        turn['start_sample'] = int(turn['start_time'] * self.sample_rate)
+        turn['end_sample'] = int(turn['end_time'] * self.sample_rate)
+        # 구간 오디오는 버퍼에서 복사해 두고 버퍼는 앞부분부터 버린다
+        audio_start = max(self._buffer_start, turn['start_sample'] - self.pad_samples)
+        audio_end = min(self._received, max(audio_start + 1, turn['end_sample'] + self.pad_samples))
+        turn['audio'] = self._buffer[audio_start - self._buffer_start:audio_end - self._buffer_start].copy()
+        self.stats['turns'] += 1
+        # 구간 끝부터 확정될 때까지 더 읽어야 했던 오디오 길이
+        self._lags.append(max(0.0, self._received / self.sample_rate - turn['end_time']))
+        return turn
+
+    def _trim_buffer(self):
+        keep_from = self._window_start
+        for turn in self._held:
+            keep_from = min(keep_from, int(turn['start_time'] * self.sample_rate) - self.pad_samples)
+        keep_from = max(keep_from, self._buffer_start)
+        if keep_from > self._buffer_start:
+            self._buffer = self._buffer[keep_from - self._buffer_start:].copy()
+            self._buffer_start = keep_from
+
+    def print_report(self):
+        stats = self.stats
+        audio_seconds = stats['audio_seconds'] or self._received / self.sample_rate
+        print("\n=== 스트리밍 화자 분리 통계 ===")
+        print(f"윈도우 {stats['windows']}개, 확정 구간 {stats['turns']}개, "
+              f"화자 {len(self.speakers)}명 (재클러스터링 병합 {stats['merges']}회)")
+        rtf = stats['diarization_seconds'] / audio_seconds if audio_seconds > 0 else 0.0
+        print(f"화자 분리 추론: {stats['diarization_seconds']:.1f}초 (RTF {rtf:.3f}), "
+              f"오디오 디코딩 대기: {stats['decode_seconds']:.1f}초, 음성 길이: {audio_seconds:.1f}초")
+        if self._lags:
+            print(f"확정 지연 (구간 끝 이후 더 읽은 오디오): 평균 {sum(self._lags) / len(self._lags):.1f}초, "
+                  f"최대 {max(self._lags):.1f}초")
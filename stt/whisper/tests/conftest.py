@@ -0,0 +1,7 @@
+# stt/whisper 모듈은 패키지가 아닌 스크립트 모음이므로 테스트에서 바로 import 할 수 있도록 경로 추가
+import os
+import sys
+
+WHISPER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, WHISPER_DIR)
+sys.path.insert(0, os.path.join(WHISPER_DIR, "whisper_python"))
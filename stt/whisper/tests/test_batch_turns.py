@@ -0,0 +1,64 @@
+import numpy as np
+
+from batch_turns import assign_segments, build_batch, find_turn
+
+SAMPLE_RATE = 100
+
+
+def make_turns():
+    return [
+        {'speaker': "SPEAKER_00", 'start_time': 1.0, 'end_time': 2.0},
+        {'speaker': "SPEAKER_01", 'start_time': 3.0, 'end_time': 5.0},
+    ]
+
+
+def test_build_batch_offsets():
+    waveform = np.arange(6 * SAMPLE_RATE, dtype=np.float32)[np.newaxis, :]
+    audio, offsets = build_batch(waveform, make_turns(), SAMPLE_RATE, gap_seconds=0.5)
+
+    assert audio.shape == (100 + 50 + 200,)
+    assert offsets == [
+        {'turn': 0, 'batch_start': 0.0, 'batch_end': 1.0},
+        {'turn': 1, 'batch_start': 1.5, 'batch_end': 3.5},
+    ]
+    # 구간 오디오는 원래 위치에서, 사이는 무음
+    np.testing.assert_array_equal(audio[:100], waveform[0, 100:200])
+    assert not audio[100:150].any()
+    np.testing.assert_array_equal(audio[150:], waveform[0, 300:500])
+
+
+def test_build_batch_empty():
+    audio, offsets = build_batch(np.zeros((1, 100), dtype=np.float32), [], SAMPLE_RATE)
+    assert audio.size == 0
+    assert offsets == []
+
+
+def test_find_turn_overlap_and_gap():
+    offsets = [{'turn': 0, 'batch_start': 0.0, 'batch_end': 1.0},
+               {'turn': 1, 'batch_start': 1.5, 'batch_end': 3.5}]
+    assert find_turn(offsets, 0.2, 0.8) == 0
+    # 두 구간에 걸치면 더 많이 겹치는 구간
+    assert find_turn(offsets, 0.9, 2.0) == 1
+    # 무음 간격 안이면 더 가까운 구간
+    assert find_turn(offsets, 1.05, 1.1) == 0
+    assert find_turn(offsets, 1.4, 1.45) == 1
+
+
+def test_assign_segments_by_word():
+    offsets = [{'turn': 0, 'batch_start': 0.0, 'batch_end': 1.0},
+               {'turn': 1, 'batch_start': 1.5, 'batch_end': 3.5}]
+    # 구간 경계를 넘는 세그먼트 하나가 단어 단위로 나뉨
+    segments = [{'start': 0.0, 'end': 3.0, 'text': "안녕하세요 반갑습니다 네",
+                 'words': [{'word': " 안녕하세요", 'start': 0.1, 'end': 0.9},
+                           {'word': " 반갑습니다", 'start': 1.6, 'end': 2.4},
+                           {'word': " 네", 'start': 2.5, 'end': 2.9}]}]
+    assert assign_segments(segments, offsets, 2) == ["안녕하세요", "반갑습니다 네"]
+
+
+def test_assign_segments_by_segment():
+    offsets = [{'turn': 0, 'batch_start': 0.0, 'batch_end': 1.0},
+               {'turn': 1, 'batch_start': 1.5, 'batch_end': 3.5}]
+    segments = [{'start': 0.0, 'end': 0.9, 'text': "안녕하세요"},
+                {'start': 1.6, 'end': 3.0, 'text': "반갑습니다"},
+                {'start': 3.0, 'end': 3.4, 'text': ""}]
+    assert assign_segments(segments, offsets, 3) == ["안녕하세요", "반갑습니다", ""]
@@ -0,0 +1,17 @@
+from compare_transcripts import load_conversation
+
+
+def test_load_conversation_speaker_names(tmp_path):
+    path = tmp_path / "conversation.txt"
+    path.write_text(
+        "Speaker SPEAKER_00 (0.00s - 1.50s): 안녕하세요\n"
+        "Speaker 홍 길동 (1.50s - 3.25s): 반갑습니다\n"
+        "Speaker Kim (팀장) (3.25s - 4.00s): 네\n"
+        "다른 줄\n",
+        encoding="utf-8",
+    )
+    assert load_conversation(str(path)) == {
+        ("SPEAKER_00", "0.00", "1.50"): "안녕하세요",
+        ("홍 길동", "1.50", "3.25"): "반갑습니다",
+        ("Kim (팀장)", "3.25", "4.00"): "네",
+    }
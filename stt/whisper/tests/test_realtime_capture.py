@@ -0,0 +1,53 @@
+import numpy as np
+
+from realtime_capture import UtteranceSegmenter
+
+SAMPLE_RATE = 1000
+BLOCK = 100
+
+
+def blocks(pattern):
+    """'s' = 음성 블록, '.' = 무음 블록 (0.1초씩)"""
+    return [np.full(BLOCK, 1000 if c == "s" else 0, dtype=np.int16) for c in pattern]
+
+
+def make_segmenter(**kwargs):
+    return UtteranceSegmenter(lambda block, sample_rate: bool(block.any()), SAMPLE_RATE, **kwargs)
+
+
+def feed_all(segmenter, pattern):
+    finished = []
+    for i, block in enumerate(blocks(pattern)):
+        finished += segmenter.feed(block, arrival_time=i * 0.1)
+    return finished
+
+
+def test_utterance_with_pre_roll_and_trimmed_silence():
+    segmenter = make_segmenter(pre_roll_seconds=0.3, end_silence_seconds=0.6)
+    utterances = feed_all(segmenter, "....." + "sssss" + "......" + "..")
+
+    assert len(utterances) == 1
+    utterance = utterances[0]
+    # 직전 무음 0.3초부터 시작, 끝 무음은 0.3초만 남김
+    assert utterance['start'] == 0.2
+    assert utterance['end'] == 1.3
+    assert utterance['audio'].size == 1100
+    assert utterance['speech_end_time'] == 0.9
+    assert not segmenter.in_utterance
+
+
+def test_max_length_and_flush():
+    segmenter = make_segmenter(pre_roll_seconds=0.0, max_utterance_seconds=1.0)
+    utterances = feed_all(segmenter, "s" * 15)
+
+    # 최대 길이에서 강제로 자르고, 나머지는 스트림 종료 시 flush
+    assert [(u['start'], u['end']) for u in utterances] == [(0.0, 1.0)]
+    assert segmenter.in_utterance
+    rest = segmenter.flush()
+    assert [(u['start'], u['end']) for u in rest] == [(1.0, 1.5)]
+    assert segmenter.flush() == []
+
+
+def test_short_blip_dropped():
+    segmenter = make_segmenter(pre_roll_seconds=0.0, end_silence_seconds=0.3, min_utterance_seconds=0.5)
+    assert feed_all(segmenter, "..s......") == []
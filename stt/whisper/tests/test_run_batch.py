@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+# run_batch 는 run.py 설정(.env)과 whisper-server 풀 모듈을 함께 불러옴
+pytest.importorskip("dotenv")
+pytest.importorskip("requests")
+
+from run_batch import collect_files, output_prefixes  # noqa: E402
+
+
+def test_collect_files(tmp_path):
+    folder = tmp_path / "recordings"
+    folder.mkdir()
+    for name in ["b.mp3", "a.wav", "notes.txt"]:
+        (folder / name).write_bytes(b"")
+    manifest = tmp_path / "files.txt"
+    manifest.write_text("# 목록\n\nrecordings/a.wav\nextra.m4a\n", encoding="utf-8")
+
+    paths = collect_files([str(folder), str(tmp_path / "single.mp3")], str(manifest))
+
+    # 폴더는 오디오 파일만 이름 순서로, 목록 파일 경로는 목록 파일 기준, 중복은 처음 위치만
+    assert paths == [
+        str(folder / "a.wav"),
+        str(folder / "b.mp3"),
+        str(tmp_path / "single.mp3"),
+        str(tmp_path / "extra.m4a"),
+    ]
+
+
+def test_output_prefixes(tmp_path):
+    paths = [os.path.join("/data", "day1", "meeting.mp3"),
+             os.path.join("/data", "day2", "meeting.mp3"),
+             os.path.join("/data", "day1", "call.wav")]
+    prefixes = output_prefixes(paths, str(tmp_path))
+
+    assert prefixes[paths[2]] == os.path.join(str(tmp_path), "call")
+    # 다른 폴더의 같은 이름은 경로 해시로 구분하고, 실행 순서와 무관하게 같은 이름
+    assert prefixes[paths[0]] != prefixes[paths[1]]
+    assert os.path.basename(prefixes[paths[0]]).startswith("meeting_")
+    assert output_prefixes(list(reversed(paths)), str(tmp_path)) == prefixes
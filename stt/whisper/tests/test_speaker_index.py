@@ -0,0 +1,102 @@
+import numpy as np
+
+from speaker_index import SpeakerIndex, diarization_from_cache, diarization_to_cache
+
+
+def test_enroll_and_match(tmp_path):
+    index = SpeakerIndex(str(tmp_path), max_distance=0.3)
+    assert index.identify([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], durations=[10.0, 5.0], source="file1") \
+        == ["SPK0001", "SPK0002"]
+
+    # 비슷한 임베딩은 기존 화자, 먼 임베딩은 새 화자
+    assert index.identify([[0.0, 0.95, 0.1], [0.0, 0.0, 1.0]], source="file2") == ["SPK0002", "SPK0003"]
+    assert (index.matched, index.enrolled) == (1, 3)
+    assert index.speakers[1]['files'] == ["file1", "file2"]
+
+
+def test_one_to_one_matching(tmp_path):
+    index = SpeakerIndex(str(tmp_path), max_distance=0.3)
+    index.identify([[1.0, 0.0]])
+    # 한 파일의 두 화자가 같은 화자로 묶이지 않음 (더 가까운 쪽만 매칭)
+    assert index.identify([[0.9, 0.1], [1.0, 0.0]], enroll=False) == [None, "SPK0001"]
+    assert index.identify([[0.9, 0.1], [1.0, 0.0]]) == ["SPK0002", "SPK0001"]
+
+
+def test_invalid_embedding_and_no_enroll(tmp_path):
+    index = SpeakerIndex(str(tmp_path))
+    assert index.identify([[np.nan, np.nan], [1.0, 0.0]], enroll=False) == [None, None]
+    assert index.identify([[np.nan, np.nan], [1.0, 0.0]]) == [None, "SPK0001"]
+
+
+def test_same_source_does_not_move_centroid(tmp_path):
+    index = SpeakerIndex(str(tmp_path), max_distance=0.5)
+    index.identify([[1.0, 0.0]], source="file1")
+    before = index.embeddings.copy()
+    index.identify([[0.8, 0.6]], source="file1")
+    np.testing.assert_array_equal(index.embeddings, before)
+    assert index.speakers[0]['count'] == 1
+
+
+def test_save_and_reload(tmp_path):
+    index = SpeakerIndex(str(tmp_path))
+    index.identify([[1.0, 0.0], [0.0, 1.0]], source="file1")
+    assert index.rename("SPK0002", "홍길동")
+    assert not index.rename("SPK9999", "없음")
+    index.save()
+
+    reloaded = SpeakerIndex(str(tmp_path))
+    assert len(reloaded) == 2
+    assert reloaded.display_name("SPK0002") == "홍길동"
+    assert reloaded.display_name("SPK0001") == "SPK0001"
+    np.testing.assert_allclose(reloaded.embeddings, index.embeddings)
+
+
+def test_diarization_cache_round_trip():
+    turns = [(0.0, 1.5, "SPEAKER_00"), (1.5, 3.0, "SPEAKER_01")]
+    embeddings = np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+    restored = diarization_from_cache(diarization_to_cache(turns, ["SPEAKER_00", "SPEAKER_01"], embeddings))
+    assert restored[0] == turns
+    assert restored[1] == ["SPEAKER_00", "SPEAKER_01"]
+    np.testing.assert_array_equal(restored[2], embeddings)
+    assert diarization_from_cache(diarization_to_cache(turns, [], None))[2] is None
+
+
+def test_save_merges_concurrent_runs(tmp_path):
+    # 같은 인덱스를 연 두 실행이 각자 화자를 등록하고 저장
+    first = SpeakerIndex(str(tmp_path))
+    second = SpeakerIndex(str(tmp_path))
+    assert first.identify([[1.0, 0.0]]) == ["SPK0001"]
+    assert second.identify([[0.0, 1.0]]) == ["SPK0001"]
+
+    assert first.save() == {}
+    # 나중에 저장한 실행의 새 화자는 다음 ID 로 옮겨지고 먼저 저장된 화자를 덮어쓰지 않음
+    assert second.save() == {"SPK0001": "SPK0002"}
+    assert [speaker['id'] for speaker in second.speakers] == ["SPK0001", "SPK0002"]
+
+    reloaded = SpeakerIndex(str(tmp_path))
+    assert reloaded.identify([[1.0, 0.0], [0.0, 1.0]], enroll=False) == ["SPK0001", "SPK0002"]
+
+
+def test_save_keeps_rename_from_other_run(tmp_path):
+    index = SpeakerIndex(str(tmp_path))
+    index.identify([[1.0, 0.0]])
+    index.save()
+
+    # 실행 중인 처리와 별도로 이름을 지정해도 처리 쪽 저장이 이름을 지우지 않음
+    running = SpeakerIndex(str(tmp_path))
+    cli = SpeakerIndex(str(tmp_path))
+    assert cli.rename("SPK0001", "홍길동")
+    cli.save()
+    running.identify([[0.0, 1.0]])
+    running.save()
+
+    reloaded = SpeakerIndex(str(tmp_path))
+    assert len(reloaded) == 2
+    assert reloaded.display_name("SPK0001") == "홍길동"
+
+
+def test_diarization_cache_in_index_dir(tmp_path):
+    index = SpeakerIndex(str(tmp_path))
+    cache = index.diarization_cache
+    assert cache is index.diarization_cache
+    assert cache.cache_dir == str(tmp_path / "diarization")
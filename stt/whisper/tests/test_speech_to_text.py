@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+# speech_to_text 는 모듈 로딩 시 transformers 모델 관련 패키지를 불러옴
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("librosa")
+pytest.importorskip("soundfile")
+
+from speech_to_text import split_windows, stitch_texts  # noqa: E402
+
+
+def test_split_windows_overlap():
+    audio = np.arange(70, dtype=np.float32)
+    windows = split_windows(audio, window_seconds=30, overlap_seconds=5, sample_rate=1)
+
+    assert [(w[0], w[-1]) for w in windows] == [(0, 29), (25, 54), (50, 69)]
+
+
+def test_split_windows_short_audio():
+    audio = np.arange(10, dtype=np.float32)
+    windows = split_windows(audio, window_seconds=30, overlap_seconds=5, sample_rate=1)
+    assert len(windows) == 1
+    np.testing.assert_array_equal(windows[0], audio)
+
+
+def test_stitch_texts_removes_overlap():
+    texts = ["오늘 회의 안건은 예산 편성과 일정", "예산 편성과 일정 조율입니다 그럼 시작"]
+    assert stitch_texts(texts) == "오늘 회의 안건은 예산 편성과 일정 조율입니다 그럼 시작"
+
+
+def test_stitch_texts_without_match():
+    assert stitch_texts(["안녕하세요", "반갑습니다 여러분"]) == "안녕하세요 반갑습니다 여러분"
+    assert stitch_texts([]) == ""
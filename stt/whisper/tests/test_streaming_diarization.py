@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import streaming_diarization
+from streaming_diarization import StreamingDiarizer
+
+SAMPLE_RATE = 100
+
+
+class FakeDiarization:
+    def __init__(self, tracks):
+        self.tracks = tracks
+
+    def itertracks(self, yield_label=False):
+        for start, end, label in self.tracks:
+            yield SimpleNamespace(start=start, end=end), None, label
+
+    def labels(self):
+        return sorted({label for _, _, label in self.tracks})
+
+
+class FakePipeline:
+    """윈도우마다 정해 둔 (윈도우 기준 구간 목록, 화자별 임베딩) 을 차례로 돌려주는 파이프라인"""
+
+    def __init__(self, windows):
+        self.windows = list(windows)
+        self.calls = 0
+
+    def __call__(self, audio, return_embeddings=False):
+        tracks, embeddings = self.windows[self.calls]
+        self.calls += 1
+        return FakeDiarization(tracks), np.array(embeddings, dtype=np.float32)
+
+
+@pytest.fixture(autouse=True)
+def no_torch_input(monkeypatch):
+    monkeypatch.setattr(streaming_diarization, "to_pyannote_input", lambda audio, sample_rate: audio)
+
+
+def test_turn_joined_across_window_boundary():
+    # 윈도우 10초, 겹침 2초: 윈도우 1 = 0~10초 (담당 0~9초), 윈도우 2 = 8~17초 (마지막, 담당 9~17초)
+    pipeline = FakePipeline([
+        ([(5.0, 10.0, "A")], [[1.0, 0.0]]),
+        ([(0.0, 4.0, "X"), (6.0, 8.0, "Y")], [[1.0, 0.0], [0.0, 1.0]]),
+    ])
+    diarizer = StreamingDiarizer(pipeline, sample_rate=SAMPLE_RATE, window_seconds=10, overlap_seconds=2)
+    chunks = np.split(np.arange(17 * SAMPLE_RATE, dtype=np.float32), 17)
+    turns = list(diarizer.run(chunks))
+
+    assert pipeline.calls == 2
+    assert [(t['speaker'], t['start_time'], t['end_time']) for t in turns] == [
+        ("SPEAKER_00", 5.0, 12.0),
+        ("SPEAKER_01", 14.0, 16.0),
+    ]
+    # 구간 오디오는 버퍼에서 원래 위치 그대로 복사
+    np.testing.assert_array_equal(turns[0]['audio'], np.arange(500, 1200, dtype=np.float32))
+    assert diarizer.stats['windows'] == 2
+    assert diarizer.stats['audio_seconds'] == 17.0
+
+
+def test_turn_inside_window_is_emitted_early():
+    pipeline = FakePipeline([
+        ([(1.0, 3.0, "A")], [[1.0, 0.0]]),
+        ([], np.zeros((0, 2))),
+    ])
+    diarizer = StreamingDiarizer(pipeline, sample_rate=SAMPLE_RATE, window_seconds=10, overlap_seconds=2)
+
+    # 윈도우 끝에 걸리지 않은 구간은 다음 윈도우를 기다리지 않고 확정
+    turns = diarizer.feed(np.zeros(10 * SAMPLE_RATE, dtype=np.float32))
+    assert [(t['speaker'], t['start_time'], t['end_time']) for t in turns] == [("SPEAKER_00", 1.0, 3.0)]
+    assert diarizer.finish() == []
+
+
+def test_speakers_matched_by_embedding():
+    pipeline = FakePipeline([
+        ([(1.0, 3.0, "A"), (4.0, 6.0, "B")], [[1.0, 0.0], [0.0, 1.0]]),
+        # 두 번째 윈도우에서는 화자 번호가 바뀌어 나와도 임베딩으로 같은 전역 화자에 매칭
+        ([(3.0, 5.0, "A"), (6.0, 7.0, "B")], [[0.0, 1.0], [1.0, 0.0]]),
+    ])
+    diarizer = StreamingDiarizer(pipeline, sample_rate=SAMPLE_RATE, window_seconds=10, overlap_seconds=2)
+    turns = list(diarizer.run([np.zeros(17 * SAMPLE_RATE, dtype=np.float32)]))
+
+    assert [(t['speaker'], t['start_time']) for t in turns] == [
+        ("SPEAKER_00", 1.0), ("SPEAKER_01", 4.0), ("SPEAKER_01", 11.0), ("SPEAKER_00", 14.0),
+    ]
+    assert len(diarizer.speakers) == 2
+
+
+def test_invalid_overlap():
+    with pytest.raises(ValueError):
+        StreamingDiarizer(None, window_seconds=10, overlap_seconds=10)
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from transcribe_scheduler import TranscriptionScheduler
+
+
+def make_segments():
+    return [
+        {'speaker': "SPEAKER_00", 'start_time': 0.0, 'end_time': 1.0},
+        {'speaker': "SPEAKER_01", 'start_time': 1.0, 'end_time': 4.0},
+        {'speaker': "SPEAKER_00", 'start_time': 4.0, 'end_time': 6.0},
+    ]
+
+
+def test_run_longest_first_and_time_order():
+    calls = []
+
+    def transcribe(segment):
+        calls.append(segment['start_time'])
+        return f"text {segment['start_time']}"
+
+    scheduler = TranscriptionScheduler(transcribe, workers=1, retry_delay=0)
+    results = scheduler.run(make_segments())
+
+    # 긴 구간부터 투입하고 결과는 시간 순서
+    assert calls == [1.0, 4.0, 0.0]
+    assert [r['start_time'] for r in results] == [0.0, 1.0, 4.0]
+    assert [r['text'] for r in results] == ["text 0.0", "text 1.0", "text 4.0"]
+    assert scheduler.stats['segments'] == 3
+    assert scheduler.stats['audio_duration'] == 6.0
+
+
+def test_run_retries_then_fails():
+    attempts = {}
+
+    def transcribe(segment):
+        attempts[segment['start_time']] = attempts.get(segment['start_time'], 0) + 1
+        if segment['start_time'] == 1.0 and attempts[1.0] == 1:
+            raise RuntimeError("일시적 오류")
+        if segment['start_time'] == 4.0:
+            raise RuntimeError("계속 실패")
+        return "ok"
+
+    scheduler = TranscriptionScheduler(transcribe, workers=2, max_retries=2, retry_delay=0)
+    results = {r['start_time']: r for r in scheduler.run(make_segments())}
+
+    assert results[0.0]['attempts'] == 1 and results[0.0]['error'] is None
+    assert results[1.0]['attempts'] == 2 and results[1.0]['text'] == "ok"
+    assert results[4.0]['attempts'] == 3 and results[4.0]['text'] == ""
+    assert results[4.0]['error'] == "계속 실패"
+    assert scheduler.stats['failed'] == 1
+    assert scheduler.stats['retried'] == 2
+
+
+def test_run_pipelined_outputs_in_order():
+    segments = [{'speaker': "SPEAKER_00", 'start_time': float(i), 'end_time': float(i) + 1} for i in range(8)]
+    output = []
+    active = []
+    lock = threading.Lock()
+
+    def transcribe(segment):
+        with lock:
+            active.append(segment['start_time'])
+        # 앞 구간이 더 오래 걸려 뒤 구간이 먼저 끝남
+        time.sleep(0.02 * (8 - segment['start_time']))
+        return segment['prepared']
+
+    def prepare(segment):
+        return dict(segment, prepared=f"p{int(segment['start_time'])}")
+
+    scheduler = TranscriptionScheduler(transcribe, workers=3, retry_delay=0)
+    results = scheduler.run_pipelined(iter(segments), prepare_fn=prepare,
+                                      on_result=lambda r: output.append(r['start_time']), queue_size=4)
+
+    assert output == [float(i) for i in range(8)]
+    assert [r['text'] for r in results] == [f"p{i}" for i in range(8)]
+    assert sorted(active) == [float(i) for i in range(8)]
+    assert scheduler.stats['segments'] == 8
+    assert 'stage_seconds' in scheduler.stats
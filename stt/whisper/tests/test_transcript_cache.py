@@ -0,0 +1,47 @@
+import os
+
+from transcript_cache import TranscriptCache, content_hash
+
+
+def test_make_key_depends_on_params(tmp_path):
+    cache = TranscriptCache(str(tmp_path))
+    key = cache.make_key("abc", "ko", "model", beam_size=5)
+    assert key == cache.make_key("abc", "ko", "model", beam_size=5)
+    assert key != cache.make_key("abc", "ko", "model", beam_size=1)
+    assert key != cache.make_key("abc", "en", "model", beam_size=5)
+
+
+def test_content_hash_sources(tmp_path):
+    path = tmp_path / "audio.bin"
+    path.write_bytes(b"audio data")
+    with open(path, "rb") as f:
+        assert content_hash(str(path)) == content_hash(b"audio data") == content_hash(f)
+
+
+def test_get_put_and_stats(tmp_path):
+    cache = TranscriptCache(str(tmp_path))
+    assert cache.get("missing") is None
+    cache.put("key", {'text': "안녕하세요"})
+    assert cache.get("key") == {'text': "안녕하세요"}
+    stats = cache.stats
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+
+
+def test_lru_eviction(tmp_path):
+    value = {'text': "x" * 100}
+    cache = TranscriptCache(str(tmp_path), max_bytes=250)
+    cache.put("a", value)
+    cache.put("b", value)
+    # 사용 시간을 과거로 돌려 b 가 a 보다 오래된 항목이 되게 함
+    os.utime(cache._path("a"), (100, 100))
+    os.utime(cache._path("b"), (200, 200))
+
+    # a 를 조회하면 최근 사용 항목이 되므로 c 를 넣을 때 b 가 지워짐
+    assert cache.get("a") == value
+    cache.put("c", value)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == value
+    assert cache.get("c") == value
+    assert cache.evictions == 1
+    assert cache.stats['bytes'] <= 250
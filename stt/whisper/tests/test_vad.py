@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+import vad
+from vad import VoiceActivityDetector, to_int16
+
+SAMPLE_RATE = 16000
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    # webrtcvad 판정은 잡음을 음성으로 보지 않을 수 있으므로 에너지 게이트만으로 구간 계산을 확인
+    monkeypatch.setattr(vad, "webrtcvad", None)
+    return VoiceActivityDetector(sample_rate=SAMPLE_RATE, min_speech_seconds=0.2, min_silence_seconds=0.3,
+                                 pad_seconds=0.0)
+
+
+def noise(seconds, amplitude=0.3, seed=0):
+    return (np.random.default_rng(seed).standard_normal(int(seconds * SAMPLE_RATE)) * amplitude).astype(np.float32)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def test_to_int16_float():
+    result = to_int16(np.array([0.0, 0.5, -1.0, 2.0], dtype=np.float32))
+    assert result.dtype == np.int16
+    np.testing.assert_array_equal(result, [0, 16383, -32767, 32767])
+
+
+def test_to_int16_keeps_int16():
+    audio = np.array([1, -2, 3], dtype=np.int16)
+    result = to_int16(audio)
+    np.testing.assert_array_equal(result, audio)
+    assert np.shares_memory(result, audio)
+
+
+def test_to_int16_channel_layouts():
+    # (샘플, 1) 녹음 버퍼
+    np.testing.assert_array_equal(to_int16(np.array([[100], [200]], dtype=np.int16)), [100, 200])
+    # (채널, 샘플) 파형은 채널 평균
+    np.testing.assert_array_equal(to_int16(np.array([[0.5, 0.5, 0.5], [0.5, -0.5, 0.0]], dtype=np.float32)),
+                                  [16383, 0, 8191])
+
+
+def test_to_int16_stereo_recording_buffer():
+    # (샘플, 2) 스테레오 녹음 버퍼는 샘플마다 두 채널 평균
+    buffer = np.array([[0.5, 0.5], [0.5, -0.5], [0.5, 0.0], [-0.5, -0.5]], dtype=np.float32)
+    np.testing.assert_array_equal(to_int16(buffer), [16383, 0, 8191, -16383])
+
+
+def test_flags_to_segments_matches_segments(detector):
+    audio = np.concatenate([silence(0.5), noise(1.0), silence(1.0), noise(0.5)])
+    flags = detector.speech_flags(audio)
+    assert detector.flags_to_segments(flags) == detector.segments(audio)
+
+
+def test_segments(detector):
+    audio = np.concatenate([silence(1.0), noise(1.0), silence(0.15), noise(0.5), silence(1.0), noise(0.09)])
+    segments = detector.segments(audio)
+
+    # 짧은 무음(0.15초)으로 끊긴 구간은 합치고, 0.2초보다 짧은 구간은 버림
+    assert len(segments) == 1
+    start, end = segments[0]
+    assert start == pytest.approx(0.99, abs=0.03)
+    assert end == pytest.approx(2.65, abs=0.03)
+
+
+def test_segments_silence(detector):
+    assert detector.segments(silence(1.0)) == []
+    assert detector.speech_bounds(silence(1.0)) is None
+
+
+def test_speech_bounds(detector):
+    audio = np.concatenate([silence(0.6), noise(1.0), silence(0.6)])
+    start, end = detector.speech_bounds(audio)
+    assert start == pytest.approx(0.6 * SAMPLE_RATE, abs=0.03 * SAMPLE_RATE)
+    assert end == pytest.approx(1.6 * SAMPLE_RATE, abs=0.03 * SAMPLE_RATE)
@@ -0,0 +1,54 @@
+import json
+
+from whisper_backend import WhisperCliBackend, format_segment_line, parse_segment_line
+
+
+def test_parse_segment_line():
+    segment = parse_segment_line("[00:01:02.500 --> 01:00:04.000]   안녕하세요 ")
+    assert segment == {'start': 62.5, 'end': 3604.0, 'text': "안녕하세요", 'avg_logprob': None}
+
+
+def test_parse_segment_line_ignores_other_output():
+    assert parse_segment_line("whisper_print_progress_callback: progress =  40%") is None
+    assert parse_segment_line("") is None
+
+
+def test_format_and_parse_round_trip():
+    segment = {'start': 3.25, 'end': 7.0, 'text': "반갑습니다"}
+    parsed = parse_segment_line(format_segment_line(segment))
+    assert (parsed['start'], parsed['end'], parsed['text']) == (3.25, 7.0, "반갑습니다")
+
+
+def test_read_json_words(tmp_path):
+    # 토큰 단위로 잘린 한글은 깨진 문자로 저장될 수 있으므로 단어 텍스트는 세그먼트 텍스트에서 가져옴
+    data = {"transcription": [{
+        "offsets": {"from": 0, "to": 3000},
+        "text": " 안녕하세요 반갑습니다",
+        "tokens": [
+            {"text": "[_BEG_]", "offsets": {"from": 0, "to": 0}, "p": 0.99},
+            {"text": " 안녕", "offsets": {"from": 0, "to": 500}, "p": 0.9},
+            {"text": "하세요", "offsets": {"from": 500, "to": 1200}, "p": 0.8},
+            {"text": " 반", "offsets": {"from": 1600, "to": 2000}, "p": 0.8},
+            {"text": "�습니다", "offsets": {"from": 2000, "to": 3000}, "p": 0.7},
+        ],
+    }]}
+    json_path = tmp_path / "result.json"
+    json_path.write_text(json.dumps(data), encoding="utf-8")
+
+    segments = WhisperCliBackend._read_json(str(json_path))
+    assert len(segments) == 1
+    assert segments[0]['text'] == "안녕하세요 반갑습니다"
+    assert segments[0]['avg_logprob'] < 0
+    assert segments[0]['words'] == [
+        {'word': " 안녕하세요", 'start': 0.0, 'end': 1.2},
+        {'word': " 반갑습니다", 'start': 1.6, 'end': 3.0},
+    ]
+
+
+def test_read_json_without_token_offsets(tmp_path):
+    data = {"transcription": [{"offsets": {"from": 0, "to": 1000}, "text": " 네", "tokens": [{"text": " 네"}]}]}
+    json_path = tmp_path / "result.json"
+    json_path.write_text(json.dumps(data), encoding="utf-8")
+
+    segments = WhisperCliBackend._read_json(str(json_path))
+    assert 'words' not in segments[0]
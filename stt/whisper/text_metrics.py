@@ -0,0 +1,81 @@
+# 음성 인식 결과 비교용 오류율 계산 (WER / CER)
+
+import os
+import re
+import unicodedata
+
+AUDIO_EXTENSIONS = ('.mp3', '.webm', '.wav', '.m4a', '.flac')
+
+
+def normalize_text(text):
+    """비교 전 텍스트 정규화 (유니코드 정규화, 문장부호 제거, 공백 정리)"""
+    text = unicodedata.normalize("NFC", text).lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def edit_distance(reference, hypothesis):
+    """두 시퀀스 사이의 레벤슈타인 거리"""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_item in enumerate(reference, 1):
+        current = [i] + [0] * len(hypothesis)
+        for j, hyp_item in enumerate(hypothesis, 1):
+            current[j] = min(
+                previous[j] + 1,                          # 삭제
+                current[j - 1] + 1,                       # 삽입
+                previous[j - 1] + (ref_item != hyp_item)  # 치환
+            )
+        previous = current
+    return previous[-1]
+
+
+def wer(reference, hypothesis):
+    """
+    단어 오류율 (Word Error Rate)
+
+    Returns:
+        float: 편집 거리 / 정답 단어 수
+    """
+    ref_words = normalize_text(reference).split()
+    hyp_words = normalize_text(hypothesis).split()
+    if not ref_words:
+        return 0.0 if not hyp_words else 1.0
+    return edit_distance(ref_words, hyp_words) / len(ref_words)
+
+
+def cer(reference, hypothesis):
+    """
+    문자 오류율 (Character Error Rate) - 한국어는 띄어쓰기 차이가 커서 공백을 제외하고 계산
+
+    Returns:
+        float: 편집 거리 / 정답 문자 수
+    """
+    ref_chars = normalize_text(reference).replace(" ", "")
+    hyp_chars = normalize_text(hypothesis).replace(" ", "")
+    if not ref_chars:
+        return 0.0 if not hyp_chars else 1.0
+    return edit_distance(ref_chars, hyp_chars) / len(ref_chars)
+
+
+def load_samples(sample_dir):
+    """
+    벤치마크용 (오디오 경로, 정답 텍스트) 목록 로드
+
+    샘플 폴더에는 오디오 파일과 같은 이름의 정답 텍스트(.txt)를 둔다.
+      samples/meeting1.mp3, samples/meeting1.txt, ...
+
+    Returns:
+        list: (audio_path, reference_text) 튜플 목록
+    """
+    samples = []
+    for name in sorted(os.listdir(sample_dir)):
+        base, ext = os.path.splitext(name)
+        if ext.lower() not in AUDIO_EXTENSIONS:
+            continue
+        reference_path = os.path.join(sample_dir, base + ".txt")
+        if not os.path.exists(reference_path):
+            print(f"정답 텍스트가 없어 건너뜀: {name}")
+            continue
+        with open(reference_path, encoding="utf-8") as f:
+            samples.append((os.path.join(sample_dir, name), f.read().strip()))
+    return samples
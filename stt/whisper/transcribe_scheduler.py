@@ -0,0 +1,229 @@
+# 화자 구간(turn) 병렬 변환 스케줄러
+#
+# 구간들을 N개 워커(워커당 스레드 수 고정)에 나눠 동시에 변환한다.
+# - 긴 구간부터 먼저 투입해 마지막에 긴 구간 하나만 남는 꼬리 지연을 줄임
+# - 실패한 구간은 재시도
+# - 결과는 원래 시간 순서로 반환
+# - run_pipelined(): 구간 생성/준비 → 변환 → 출력 단계를 크기 제한 큐로 겹쳐 실행 (스트리밍 화자 분리, 대화 파일 바로 추가)
+# - 구간별 지연 시간과 전체 실시간 배율(RTF) 보고
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+def percentile(values, ratio):
+    """정렬된 값 목록에서 백분위 값 (최근접 순위)"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(ratio * (len(values) - 1)))))
+    return values[index]
+
+
+class TranscriptionScheduler:
+    """
+    구간 변환 스케줄러
+
+    Args:
+        transcribe_fn (callable): 구간 dict 하나를 받아 텍스트를 반환하는 함수
+        workers (int): 동시에 처리할 구간 수 (워커 풀 크기와 맞춤)
+        max_retries (int): 구간별 최대 재시도 횟수
+        retry_delay (float): 재시도 전 대기 시간 (초, 시도마다 2배)
+    """
+
+    def __init__(self, transcribe_fn, workers, max_retries=2, retry_delay=1.0):
+        self.transcribe_fn = transcribe_fn
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.stats = {}
+
+    def _run_one(self, segment):
+        attempts = 0
+        delay = self.retry_delay
+        start = time.time()
+        while True:
+            attempts += 1
+            try:
+                text = self.transcribe_fn(segment)
+                return text, attempts, time.time() - start, None
+            except Exception as e:
+                if attempts > self.max_retries:
+                    return "", attempts, time.time() - start, str(e)
+                print(f"  재시도 {attempts}/{self.max_retries}: "
+                      f"Speaker {segment['speaker']} ({segment['start_time']:.2f}s) - {e}")
+                time.sleep(delay)
+                delay *= 2
+
+    def run(self, segments):
+        """
+        구간 목록을 병렬로 변환
+
+        Args:
+            segments (list): 'speaker', 'start_time', 'end_time' 을 가진 구간 dict 목록
+
+        Returns:
+            list: 'text', 'latency', 'attempts', 'error' 가 추가된 구간 dict 목록 (시간 순서)
+        """
+        # 긴 구간부터 투입
+        ordered = sorted(segments, key=lambda s: s['end_time'] - s['start_time'], reverse=True)
+
+        results = []
+        wall_start = time.time()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self._run_one, segment): segment for segment in ordered}
+            for future in as_completed(futures):
+                text, attempts, latency, error = future.result()
+                self._record(results, dict(futures[future], text=text, latency=latency,
+                                           attempts=attempts, error=error), len(ordered))
+        return self._finish(results, segments, time.time() - wall_start)
+
+    def run_pipelined(self, segments, prepare_fn=None, on_result=None, queue_size=None):
+        """
+        구간 생성 → 준비 → 변환 → 출력 단계를 크기 제한 큐로 이어 겹쳐 실행
+
+        - 생성/준비 (호출한 스레드): segments 에서 구간을 꺼내 prepare_fn (오디오 자르기 등) 적용 후 작업 큐에 넣음
+          (스트리밍 화자 분리 generator 면 화자 분리도 이 단계에서 진행)
+        - 변환 (워커 N개): 작업 큐에서 꺼내 변환 (실패 시 재시도)
+        - 출력 (스레드 1개): 결과를 들어온 순서대로 다시 맞춰 on_result 호출 (대화 파일에 바로 추가 등)
+        처리 중인 구간 수가 queue_size 를 넘으면 앞 단계가 기다리므로 (backpressure) 뒤 단계가 느려도
+        메모리가 늘지 않는다. 전체 시간은 단계 시간의 합이 아니라 가장 느린 단계 시간에 가까워진다.
+
+        Args:
+            segments: 시간 순서 구간 dict iterable (generator 가능)
+            prepare_fn (callable): 구간 dict 를 받아 변환할 준비가 된 구간 dict 반환
+            on_result (callable): 결과 구간 dict 를 시간 순서대로 받는 함수
+            queue_size (int): 동시에 처리 중일 수 있는 구간 수 (기본값: 워커 수 x 4)
+
+        Returns:
+            list: run() 과 같은 형식의 구간 dict 목록 (시간 순서, 'audio' 키 제외)
+        """
+        queue_size = max(queue_size or self.workers * 4, self.workers + 1)
+        in_flight = threading.BoundedSemaphore(queue_size)
+        work_queue = queue.Queue()
+        result_queue = queue.Queue()
+        results, submitted = [], []
+        seconds = {'source': 0.0, 'prepare': 0.0, 'transcribe': 0.0, 'output': 0.0, 'backpressure': 0.0}
+        seconds_lock = threading.Lock()
+
+        def worker():
+            while True:
+                item = work_queue.get()
+                if item is None:
+                    return
+                index, segment = item
+                text, attempts, latency, error = self._run_one(segment)
+                # 구간 오디오는 변환이 끝나면 바로 버림
+                segment.pop('audio', None)
+                with seconds_lock:
+                    seconds['transcribe'] += latency
+                result_queue.put((index, dict(segment, text=text, latency=latency,
+                                              attempts=attempts, error=error)))
+
+        def writer():
+            pending = {}
+            next_index = 0
+            while True:
+                item = result_queue.get()
+                if item is None:
+                    return
+                pending[item[0]] = item[1]
+                # 앞 구간이 끝나야 뒤 구간을 출력 (파일이 시간 순서로 쌓이도록)
+                while next_index in pending:
+                    result = pending.pop(next_index)
+                    next_index += 1
+                    start = time.perf_counter()
+                    self._record(results, result, None)
+                    if on_result is not None:
+                        try:
+                            on_result(result)
+                        except Exception as e:
+                            print(f"  결과 출력 실패: {e}")
+                    seconds['output'] += time.perf_counter() - start
+                    in_flight.release()
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(self.workers)]
+        output = threading.Thread(target=writer, daemon=True)
+        for thread in threads + [output]:
+            thread.start()
+
+        wall_start = time.time()
+        try:
+            iterator = iter(segments)
+            index = 0
+            while True:
+                start = time.perf_counter()
+                segment = next(iterator, None)
+                seconds['source'] += time.perf_counter() - start
+                if segment is None:
+                    break
+                start = time.perf_counter()
+                if prepare_fn is not None:
+                    segment = prepare_fn(segment)
+                seconds['prepare'] += time.perf_counter() - start
+                submitted.append({'start_time': segment['start_time'], 'end_time': segment['end_time']})
+
+                start = time.perf_counter()
+                in_flight.acquire()
+                seconds['backpressure'] += time.perf_counter() - start
+                work_queue.put((index, segment))
+                index += 1
+        finally:
+            for _ in threads:
+                work_queue.put(None)
+            for thread in threads:
+                thread.join()
+            result_queue.put(None)
+            output.join()
+
+        self._finish(results, submitted, time.time() - wall_start)
+        self.stats['stage_seconds'] = seconds
+        return results
+
+    def _record(self, results, result, total):
+        results.append(result)
+        status = f"실패: {result['error']}" if result['error'] else f"{result['latency']:.1f}초"
+        progress = f"{len(results)}/{total}" if total is not None else f"{len(results)}"
+        print(f"[{progress}] Speaker {result['speaker']} "
+              f"({result['start_time']:.2f}s - {result['end_time']:.2f}s) {status}")
+
+    def _finish(self, results, segments, wall_time):
+        results.sort(key=lambda s: s['start_time'])
+
+        latencies = sorted(r['latency'] for r in results)
+        audio_duration = sum(s['end_time'] - s['start_time'] for s in segments)
+        self.stats = {
+            'segments': len(results),
+            'failed': sum(1 for r in results if r['error']),
+            'retried': sum(1 for r in results if r['attempts'] > 1),
+            'wall_time': wall_time,
+            'audio_duration': audio_duration,
+            'rtf': wall_time / audio_duration if audio_duration > 0 else 0.0,
+            'latency_mean': sum(latencies) / len(latencies) if latencies else 0.0,
+            'latency_p50': percentile(latencies, 0.5),
+            'latency_p95': percentile(latencies, 0.95),
+            'latency_max': latencies[-1] if latencies else 0.0,
+        }
+        return results
+
+    def print_report(self):
+        stats = self.stats
+        if not stats:
+            return
+        print("\n=== 구간 변환 통계 ===")
+        print(f"구간 수: {stats['segments']} (실패 {stats['failed']}, 재시도 {stats['retried']})")
+        print(f"워커 수: {self.workers}")
+        print(f"구간 지연: 평균 {stats['latency_mean']:.2f}초, p50 {stats['latency_p50']:.2f}초, "
+              f"p95 {stats['latency_p95']:.2f}초, 최대 {stats['latency_max']:.2f}초")
+        print(f"처리 시간: {stats['wall_time']:.1f}초 / 음성 길이: {stats['audio_duration']:.1f}초 "
+              f"(RTF {stats['rtf']:.3f})")
+        seconds = stats.get('stage_seconds')
+        if seconds:
+            # 변환 시간은 워커 전체 합이므로 워커 수로 나눈 값이 단계 소요 시간
+            transcribe = seconds['transcribe'] / self.workers
+            stage_sum = seconds['source'] + seconds['prepare'] + transcribe + seconds['output']
+            print(f"단계별 시간: 구간 생성 {seconds['source']:.1f}초, 준비 {seconds['prepare']:.1f}초, "
+                  f"변환 {transcribe:.1f}초 (워커 합 {seconds['transcribe']:.1f}초), 출력 {seconds['output']:.1f}초, "
+                  f"큐 대기 {seconds['backpressure']:.1f}초")
+            print(f"단계 합 {stage_sum:.1f}초 → 겹쳐 실행 {stats['wall_time']:.1f}초")
@@ -0,0 +1,271 @@
+# 음성 인식 엔진 공통 인터페이스 (Transcriber)
+#
+# 저장소의 인식 경로는 엔진마다 로딩/입출력 코드가 따로 있었다.
+#   whisper.cpp     : whisper_backend (cli / server / resident)
+#   faster-whisper  : whisper_python/speech_to_text_final.py (run_transcribe, 디코딩 프리셋)
+#   transformers    : whisper_python/speech_to_text.py (KoreanSpeechToText, whisper-large-v3)
+#   qwen2-audio     : ../qwen2/run_qwen2.py (Qwen2-Audio-7B-Instruct)
+# 여기서는 같은 방식으로 쓸 수 있도록 얇은 어댑터로 감싼다.
+#
+#   with create_transcriber("faster-whisper", preset="fast") as transcriber:
+#       segments = transcriber.transcribe("meeting.mp3")
+#
+# load() 는 모델 로딩 시간을 load_seconds 에 기록하고, transcribe() 는 경로 또는 16kHz float32 배열을
+# 받아 {'start', 'end', 'text', 'avg_logprob'} 세그먼트 목록을 반환한다 (whisper_backend.make_segment).
+# 엔진별 의존성(torch, faster_whisper, transformers, pywhispercpp)은 load() 에서만 import 하므로
+# 설치된 엔진만 골라 쓸 수 있다.
+
+import os
+import sys
+import time
+
+from audio_preprocess import TARGET_SAMPLE_RATE, load_audio, resample, to_mono
+from whisper_backend import create_backend, make_segment
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+WHISPER_PYTHON_DIR = os.path.join(SCRIPT_DIR, "whisper_python")
+QWEN2_DIR = os.path.join(SCRIPT_DIR, "..", "qwen2")
+WHISPER_CPP_DIR = os.path.join(SCRIPT_DIR, "whisper.cpp_local")
+
+
+def _import_script(directory, module_name):
+    """하위 폴더의 스크립트 모듈 import (각 폴더 스크립트끼리 쓰는 sys.path 방식과 동일)"""
+    directory = os.path.abspath(directory)
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    return __import__(module_name)
+
+
+def _as_audio(audio, sample_rate=TARGET_SAMPLE_RATE):
+    """경로 또는 배열 입력을 16kHz 모노 float32 배열로 변환"""
+    if isinstance(audio, (str, os.PathLike)):
+        return load_audio(str(audio), TARGET_SAMPLE_RATE)
+    return resample(to_mono(audio), sample_rate, TARGET_SAMPLE_RATE)
+
+
+class Transcriber:
+    """
+    음성 인식 엔진 공통 인터페이스
+
+    하위 클래스는 _load() 와 _transcribe(16kHz float32 배열) 를 구현한다.
+
+    Args:
+        language (str): 인식 언어
+    """
+
+    name = None
+
+    def __init__(self, language="ko"):
+        self.language = language
+        self.load_seconds = None
+
+    @property
+    def loaded(self):
+        return self.load_seconds is not None
+
+    def load(self):
+        """모델 로딩 (한 번만 수행, 걸린 시간을 load_seconds 에 기록)"""
+        if not self.loaded:
+            start = time.perf_counter()
+            self._load()
+            self.load_seconds = time.perf_counter() - start
+        return self
+
+    def transcribe(self, audio, sample_rate=TARGET_SAMPLE_RATE):
+        """
+        오디오 하나 변환
+
+        Args:
+            audio: 파일 경로 또는 (샘플,) float32 배열
+            sample_rate (int): 배열 입력의 샘플링 레이트
+
+        Returns:
+            list: {'start', 'end', 'text', 'avg_logprob'} 세그먼트 목록 (초)
+        """
+        self.load()
+        return self._transcribe(_as_audio(audio, sample_rate))
+
+    def _load(self):
+        raise NotImplementedError
+
+    def _transcribe(self, audio):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self.load()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class WhisperCppTranscriber(Transcriber):
+    """
+    whisper.cpp (whisper_backend 의 cli / server / resident 백엔드)
+
+    Args:
+        backend (str): cli | server | resident (None 이면 WHISPER_BACKEND 환경 변수, 기본값 DEFAULT_BACKEND)
+        whisper_dir (str): whisper-cli / whisper-server 와 model 폴더가 있는 디렉토리
+        model_file (str): model 폴더 안의 ggml 모델 파일 이름
+        threads (int): 스레드 수
+    """
+
+    name = "whisper.cpp"
+
+    def __init__(self, language="ko", backend=None, whisper_dir=WHISPER_CPP_DIR,
+                 model_file="ggml-large-v2-q8_0.bin", threads=None):
+        super().__init__(language)
+        self.backend_kind = backend
+        self.whisper_dir = whisper_dir
+        self.model_path = os.path.join(whisper_dir, "model", model_file)
+        self.threads = threads or os.cpu_count() or 4
+        self._backend = None
+
+    def _load(self):
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(f"whisper.cpp 모델 파일을 찾을 수 없습니다: {self.model_path}")
+        self._backend = create_backend(self.backend_kind,
+                                       model_path=self.model_path,
+                                       cli_path=os.path.join(self.whisper_dir, "whisper-cli"),
+                                       server_path=os.path.join(self.whisper_dir, "whisper-server"),
+                                       language=self.language,
+                                       threads=self.threads,
+                                       cwd=self.whisper_dir)
+        if self._backend.name == "cli" and not os.path.exists(self._backend.cli_path):
+            raise FileNotFoundError(f"whisper-cli를 찾을 수 없습니다: {self._backend.cli_path}")
+
+    def _transcribe(self, audio):
+        return self._backend.transcribe(audio)
+
+    def close(self):
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+
+
+class FasterWhisperTranscriber(Transcriber):
+    """
+    faster-whisper (speech_to_text_final.py 의 모델 싱글톤과 디코딩 프리셋 사용)
+
+    Args:
+        preset (str): accurate | balanced | fast
+        batch_size (int): 0 이면 순차 디코딩, 1 이상이면 배치 추론 파이프라인
+        cpu_threads (int): CPU 추론 스레드 수 (0 이면 faster-whisper 기본값)
+    """
+
+    name = "faster-whisper"
+
+    def __init__(self, language="ko", preset="accurate", batch_size=0, cpu_threads=0):
+        super().__init__(language)
+        self.preset = preset
+        self.batch_size = batch_size
+        self.cpu_threads = cpu_threads
+        self._module = None
+
+    def _load(self):
+        self._module = _import_script(WHISPER_PYTHON_DIR, "speech_to_text_final")
+        self._module.get_whisper_model(self.cpu_threads)
+
+    def _transcribe(self, audio):
+        segments, _ = self._module.run_transcribe(audio, self.preset, self.batch_size, language=self.language)
+        return [make_segment(segment.start, segment.end, segment.text, getattr(segment, 'avg_logprob', None))
+                for segment in segments]
+
+
+class TransformersWhisperTranscriber(Transcriber):
+    """
+    transformers Whisper (speech_to_text.py 의 KoreanSpeechToText 로컬 모델)
+
+    타임스탬프 없이 텍스트만 나오므로 입력 전체를 세그먼트 하나로 반환한다.
+
+    Args:
+        model_name (str): Hugging Face 모델 이름
+        **options: KoreanSpeechToText 추가 인자 (batch_size, cpu_optimized, num_threads, cpu_affinity)
+    """
+
+    name = "transformers"
+
+    def __init__(self, language="ko", model_name="openai/whisper-large-v3", **options):
+        super().__init__(language)
+        self.model_name = model_name
+        self.options = options
+        self._stt = None
+
+    def _load(self):
+        module = _import_script(WHISPER_PYTHON_DIR, "speech_to_text")
+        self._stt = module.KoreanSpeechToText(model_name=self.model_name, language=self.language, **self.options)
+        self._stt.load()
+
+    def _transcribe(self, audio):
+        text = self._stt.transcribe_array(audio)
+        return [make_segment(0.0, audio.size / TARGET_SAMPLE_RATE, text)]
+
+
+class Qwen2AudioTranscriber(Transcriber):
+    """
+    Qwen2-Audio (run_qwen2.py 의 get_model / transcribe)
+
+    생성형 모델이라 타임스탬프가 없으므로 입력 전체를 세그먼트 하나로 반환한다.
+    벤치마크 재현성을 위해 기본값은 greedy 디코딩이다 (run_qwen2.py 단독 실행은 샘플링).
+
+    Args:
+        model_name (str): Hugging Face 모델 이름 (None 이면 run_qwen2.MODEL_NAME)
+        do_sample (bool): 샘플링 여부
+        max_new_tokens (int): 최대 생성 토큰 수
+    """
+
+    name = "qwen2-audio"
+
+    def __init__(self, language="ko", model_name=None, do_sample=False, max_new_tokens=256):
+        super().__init__(language)
+        self.model_name = model_name
+        self.do_sample = do_sample
+        self.max_new_tokens = max_new_tokens
+        self._module = None
+        self._processor = None
+        self._model = None
+        self._device = None
+
+    def _load(self):
+        self._module = _import_script(QWEN2_DIR, "run_qwen2")
+        self._device = self._module.get_device()
+        # 변환기를 닫을 때까지 모델을 들고 있으므로 그동안 레지스트리에서 해제되지 않도록 사용 중 표시
+        self._processor, self._model = self._module.get_model(self.model_name or self._module.MODEL_NAME,
+                                                              self._device, hold=True)
+
+    def _transcribe(self, audio):
+        text = self._module.transcribe(self._processor, self._model, audio, self._device,
+                                       max_new_tokens=self.max_new_tokens, do_sample=self.do_sample)
+        return [make_segment(0.0, audio.size / TARGET_SAMPLE_RATE, text)]
+
+    def close(self):
+        if self._model is not None:
+            self._module.release_model(self.model_name or self._module.MODEL_NAME, self._device)
+        self._processor = None
+        self._model = None
+
+
+TRANSCRIBERS = {
+    WhisperCppTranscriber.name: WhisperCppTranscriber,
+    FasterWhisperTranscriber.name: FasterWhisperTranscriber,
+    TransformersWhisperTranscriber.name: TransformersWhisperTranscriber,
+    Qwen2AudioTranscriber.name: Qwen2AudioTranscriber,
+}
+
+
+def create_transcriber(name, **kwargs):
+    """
+    이름으로 Transcriber 생성 (모델은 load() 또는 with 문에서 로딩)
+
+    Args:
+        name (str): TRANSCRIBERS 키 (whisper.cpp, faster-whisper, transformers, qwen2-audio)
+        **kwargs: 엔진별 생성자 인자 (language, preset, backend 등)
+
+    Returns:
+        Transcriber
+    """
+    if name not in TRANSCRIBERS:
+        raise ValueError(f"알 수 없는 인식 엔진: {name} (사용 가능: {', '.join(TRANSCRIBERS)})")
+    return TRANSCRIBERS[name](**kwargs)
@@ -0,0 +1,214 @@
+# 변환 결과 디스크 캐시 (오디오 내용 해시 기반)
+#
+# 같은 녹음을 다시 올리면 전처리/디코딩 없이 저장된 결과를 돌려준다.
+# 키는 오디오 내용의 sha256 + 언어 + 모델 + 디코딩 파라미터로 만들기 때문에
+# 파일 이름이 달라도 내용이 같으면 적중하고, 모델/옵션이 바뀌면 자동으로 미스가 된다.
+# 항목은 키 이름의 JSON 파일 하나씩 저장하고, 전체 크기가 상한을 넘으면
+# 가장 오래 사용하지 않은 항목(mtime 기준 LRU)부터 지운다.
+#
+# 캐시는 TRANSCRIPT_CACHE_DIR 를 지정한 경우에만 사용한다 (기본값은 사용 안 함, 해시 계산도 하지 않음).
+#
+# 환경 변수:
+#   TRANSCRIPT_CACHE_DIR     캐시 폴더 (비우면 사용 안 함, 기본값: 비어 있음. 예: ~/.cache/stt_transcripts)
+#   TRANSCRIPT_CACHE_MAX_MB  최대 크기 MB (0 이면 캐시 사용 안 함, 기본값: 500)
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "stt_transcripts")
+DEFAULT_MAX_MB = 500
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def content_hash(source, chunk_size=1 << 20):
+    """
+    오디오 내용의 sha256 (파일은 청크 단위로 읽어 메모리에 전부 올리지 않음)
+
+    Args:
+        source: 파일 경로, bytes, 또는 read() 가 있는 파일 객체
+
+    Returns:
+        str: 16진수 해시
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    elif hasattr(source, "read"):
+        for chunk in iter(lambda: source.read(chunk_size), b""):
+            digest.update(chunk)
+    else:
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_fingerprint(model):
+    """
+    모델 식별 문자열 (모델 파일이면 이름/크기/수정 시간, 아니면 이름 그대로)
+
+    수 GB 모델 파일 전체를 해시하지 않고, 파일이 교체되면 키가 바뀌도록 한다.
+    """
+    model = str(model)
+    if os.path.isfile(model):
+        stat = os.stat(model)
+        return f"{os.path.basename(model)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return model
+
+
+class TranscriptCache:
+    """
+    크기 제한이 있는 LRU 변환 결과 캐시
+
+    Args:
+        cache_dir (str): 캐시 폴더
+        max_bytes (int): 캐시 전체 최대 크기 (바이트)
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def make_key(self, audio_hash, language, model, **params):
+        """
+        캐시 키 생성
+
+        Args:
+            audio_hash (str): content_hash() 결과
+            language (str): 인식 언어
+            model (str): model_fingerprint() 결과 등 모델 식별 문자열
+            **params: 결과에 영향을 주는 디코딩/전처리 파라미터
+
+        Returns:
+            str: 16진수 키
+        """
+        payload = json.dumps({
+            "audio": audio_hash,
+            "language": language,
+            "model": model,
+            "params": params,
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """
+        저장된 결과 조회 (적중 시 사용 시간을 갱신해 LRU 순서 유지)
+
+        Returns:
+            dict | None: put() 으로 저장한 값, 없으면 None
+        """
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        결과 저장 후 크기 상한을 넘으면 오래된 항목 삭제
+
+        Args:
+            key (str): make_key() 결과
+            value (dict): JSON 으로 저장 가능한 결과 (segments, text 등)
+        """
+        # 다른 프로세스가 반쯤 쓰인 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._evict()
+
+    def _entries(self):
+        """(mtime, 크기, 경로) 목록"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    @property
+    def stats(self):
+        """적중/미스/삭제 횟수와 현재 항목 수, 크기"""
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+        }
+
+    def print_report(self):
+        stats = self.stats
+        print(f"\n=== 변환 결과 캐시 ({self.cache_dir}) ===")
+        print(f"적중 {stats['hits']}회, 미스 {stats['misses']}회 (적중률 {stats['hit_rate'] * 100:.0f}%), "
+              f"삭제 {stats['evictions']}회")
+        print(f"항목 {stats['entries']}개, {stats['bytes'] / (1024 * 1024):.1f}MB / "
+              f"{self.max_bytes / (1024 * 1024):.0f}MB")
+
+
+def get_cache():
+    """
+    환경 변수 설정으로 만든 프로세스 공용 캐시
+
+    Returns:
+        TranscriptCache | None: TRANSCRIPT_CACHE_DIR 가 비어 있거나 TRANSCRIPT_CACHE_MAX_MB 가 0 이면 None (사용 안 함)
+    """
+    global _shared_cache
+    cache_dir = os.getenv("TRANSCRIPT_CACHE_DIR", "")
+    max_mb = float(os.getenv("TRANSCRIPT_CACHE_MAX_MB", str(DEFAULT_MAX_MB)))
+    if not cache_dir or max_mb <= 0:
+        return None
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = TranscriptCache(os.path.expanduser(cache_dir), int(max_mb * 1024 * 1024))
+    return _shared_cache
@@ -0,0 +1,179 @@
+# 프레임 단위 음성 구간 검출 (webrtcvad + 벡터화된 에너지 게이트)
+#
+# 기존 has_speech 는 호출마다 webrtcvad.Vad 를 새로 만들고, 30ms 프레임마다
+# 파이썬 루프에서 frame.tobytes() 로 복사해 판정한 뒤 True/False 만 돌려줬다.
+# 여기서는
+# - 버퍼 전체를 (프레임 수, 프레임 길이) int16 뷰로 한 번에 자르고
+# - 프레임 에너지(dBFS)를 numpy 로 한 번에 계산해 확실한 무음 프레임은 webrtcvad 호출 없이 제외하고
+# - 남은 프레임만 재사용하는 Vad 인스턴스로 판정한 뒤
+# - 판정 결과를 짧은 틈 병합/짧은 구간 제거로 다듬어 음성 구간 목록으로 반환한다.
+# webrtcvad 가 없으면 에너지 게이트만으로 판정한다.
+
+import threading
+
+import numpy as np
+
+try:
+    import webrtcvad
+except ImportError:
+    webrtcvad = None
+
+# webrtcvad 가 받는 프레임 길이 (10, 20, 30ms)
+FRAME_MS = 30
+
+
+def to_int16(audio):
+    """float(-1.0~1.0) 또는 int16 파형을 (샘플,) int16 배열로 변환 (이미 int16 이면 복사 없음)"""
+    audio = np.asarray(audio)
+    if audio.ndim == 2:
+        if audio.shape[1] == 1:
+            # (샘플, 1) 녹음 버퍼
+            audio = audio[:, 0]
+        elif audio.shape[1] == 2:
+            # (샘플, 2) 스테레오 녹음 버퍼 (sounddevice/soundfile 형식)
+            audio = audio.mean(axis=1).astype(audio.dtype)
+        else:
+            # (채널, 샘플) 파형
+            audio = audio.mean(axis=0).astype(audio.dtype)
+    if audio.dtype == np.int16:
+        return np.ascontiguousarray(audio)
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+def rms(audio):
+    """
+    RMS 계산 (int16 을 제곱하면 넘치므로 float64 로 계산)
+
+    Returns:
+        float: 입력과 같은 단위의 RMS (int16 이면 0~32767)
+    """
+    audio = np.asarray(audio, dtype=np.float64)
+    return float(np.sqrt(np.mean(audio ** 2))) if audio.size else 0.0
+
+
+class VoiceActivityDetector:
+    """
+    재사용 가능한 음성 구간 검출기
+
+    Args:
+        aggressiveness (int): webrtcvad 민감도 (0-3, 클수록 무음으로 판정을 많이 함)
+        sample_rate (int): 샘플링 레이트 (8000, 16000, 32000, 48000)
+        frame_ms (int): 프레임 길이 (10, 20, 30ms)
+        energy_threshold_db (float): 이보다 조용한 프레임은 webrtcvad 없이 무음 처리 (dBFS)
+        min_speech_seconds (float): 이보다 짧은 음성 구간은 버림
+        min_silence_seconds (float): 이보다 짧은 무음은 앞뒤 음성 구간과 합침
+        pad_seconds (float): 음성 구간 앞뒤 여유 시간
+    """
+
+    def __init__(self, aggressiveness=2, sample_rate=16000, frame_ms=FRAME_MS, energy_threshold_db=-50.0,
+                 min_speech_seconds=0.2, min_silence_seconds=0.3, pad_seconds=0.1):
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.energy_threshold_db = energy_threshold_db
+        self.min_speech_frames = max(1, int(round(min_speech_seconds * 1000 / frame_ms)))
+        self.min_silence_frames = max(1, int(round(min_silence_seconds * 1000 / frame_ms)))
+        self.pad_frames = int(round(pad_seconds * 1000 / frame_ms))
+        self._vad = webrtcvad.Vad(aggressiveness) if webrtcvad is not None else None
+        # Vad 인스턴스는 내부 상태가 있어 여러 스레드(구간 병렬 변환)에서 동시에 쓰지 않도록 보호
+        self._lock = threading.Lock()
+
+    def frame_view(self, audio):
+        """
+        (프레임 수, 프레임 길이) int16 뷰 (끝의 모자란 샘플은 제외, int16 입력이면 복사 없음)
+        """
+        audio = to_int16(audio)
+        frame_count = audio.size // self.frame_size
+        return audio[:frame_count * self.frame_size].reshape(frame_count, self.frame_size)
+
+    def frame_energy_db(self, frames):
+        """프레임별 RMS 에너지 (dBFS, 한 번의 벡터 연산)"""
+        power = np.mean(np.square(frames, dtype=np.float64), axis=1) / (32768.0 ** 2)
+        return 10 * np.log10(np.maximum(power, 1e-12))
+
+    def speech_flags(self, audio):
+        """
+        프레임별 음성 여부
+
+        Returns:
+            numpy.ndarray: (프레임 수,) bool 배열
+        """
+        frames = self.frame_view(audio)
+        flags = self.frame_energy_db(frames) > self.energy_threshold_db
+        if self._vad is None or not flags.any():
+            return flags
+        # 에너지 게이트를 통과한 프레임만 webrtcvad 로 판정 (버퍼는 한 번만 bytes 로 변환)
+        data = frames.tobytes()
+        frame_bytes = self.frame_size * 2
+        is_speech = self._vad.is_speech
+        with self._lock:
+            for index in np.flatnonzero(flags):
+                start = index * frame_bytes
+                flags[index] = is_speech(data[start:start + frame_bytes], self.sample_rate)
+        return flags
+
+    def speech_ratio(self, audio):
+        """음성 프레임 비율 (0.0~1.0)"""
+        flags = self.speech_flags(audio)
+        return float(flags.mean()) if flags.size else 0.0
+
+    def has_speech(self, audio, min_ratio=0.5):
+        """음성 프레임 비율이 min_ratio 를 넘는지 여부 (기존 has_speech 와 같은 기준)"""
+        return self.speech_ratio(audio) > min_ratio
+
+    def segments(self, audio):
+        """
+        음성 구간 목록
+
+        Args:
+            audio: (샘플,) float 또는 int16 파형
+
+        Returns:
+            list: (시작 초, 끝 초) 튜플 목록
+        """
+        return self.flags_to_segments(self.speech_flags(audio))
+
+    def flags_to_segments(self, flags):
+        """
+        speech_flags() 결과를 음성 구간 목록으로 변환 (짧은 틈 병합, 짧은 구간 제거, 앞뒤 여유 추가)
+
+        Returns:
+            list: (시작 초, 끝 초) 튜플 목록
+        """
+        if not flags.any():
+            return []
+
+        # 연속된 음성 프레임 구간 [시작, 끝) 찾기
+        padded = np.concatenate([[False], flags, [False]])
+        changes = np.flatnonzero(padded[1:] != padded[:-1])
+        runs = changes.reshape(-1, 2)
+
+        # 짧은 무음으로 끊긴 구간 병합
+        merged = [list(runs[0])]
+        for start, end in runs[1:]:
+            if start - merged[-1][1] < self.min_silence_frames:
+                merged[-1][1] = end
+            else:
+                merged.append([start, end])
+
+        frame_seconds = self.frame_size / self.sample_rate
+        total_frames = flags.size
+        result = []
+        for start, end in merged:
+            if end - start < self.min_speech_frames:
+                continue
+            start = max(0, start - self.pad_frames)
+            end = min(total_frames, end + self.pad_frames)
+            result.append((float(start * frame_seconds), float(end * frame_seconds)))
+        return result
+
+    def speech_bounds(self, audio):
+        """
+        첫 음성 구간 시작 ~ 마지막 음성 구간 끝 샘플 범위 (앞뒤 무음 제거용)
+
+        Returns:
+            tuple | None: (시작 샘플, 끝 샘플), 음성이 없으면 None
+        """
+        segments = self.segments(audio)
+        if not segments:
+            return None
+        return int(segments[0][0] * self.sample_rate), int(segments[-1][1] * self.sample_rate)
@@ -1,13 +1,18 @@
 import streamlit as st
-import subprocess
 import tempfile
 import os
-import threading
+import shutil
 import time
-import queue
+import sys
+from functools import partial
 from pathlib import Path
-from pydub import AudioSegment
-from pydub.effects import normalize, low_pass_filter
+
+# 공용 모듈(stt/whisper) 경로 추가
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from audio_preprocess import TARGET_SAMPLE_RATE, probe_audio_info, scan_audio, preprocess_stream
+from whisper_backend import backend_from_env, create_backend, format_segment_line
+from transcript_cache import get_cache, content_hash, model_fingerprint
+from jobs import JobManager, STATUS_QUEUED, STATUS_RUNNING, STATUS_DONE, STATUS_ERROR
 
 # 페이지 설정
 st.set_page_config(
@@ -20,40 +25,139 @@ st.set_page_config(
 st.title(" Whisper.cpp 음성-텍스트 변환기")
 st.markdown("---")
 
-# 전역 변수로 결과 저장 (스레드 안전)
-global_result_queue = queue.Queue()
-global_result_ready = False
-global_result_data = None
-global_result_type = None
+# 현재 스크립트의 디렉토리를 기준으로 경로 설정
+SCRIPT_DIR = Path(__file__).parent.absolute()
+WHISPER_CLI_PATH = SCRIPT_DIR / "whisper-cli"
+WHISPER_SERVER_PATH = SCRIPT_DIR / "whisper-server"
+MODEL_PATH = SCRIPT_DIR.parent / "model" / "ggml-large-v2-q8_0.bin"
+
+# server/resident 백엔드는 입력 전체를 메모리 배열로 모으므로 이보다 긴 파일은 cli 백엔드로만 변환 (분)
+MAX_IN_MEMORY_MINUTES = float(os.getenv("WHISPER_WEB_MAX_IN_MEMORY_MINUTES", "120"))
+
+# 결과에 영향을 주는 전처리/디코딩 설정 (캐시 키에 포함)
+DECODE_PARAMS = dict(normalize=True, cutoff=3000, gain_db=5.0)
 
-def preprocess_audio(audio):
+def process_audio_file(job, backend):
     """
-    오디오 전처리 함수 (노이즈 제거 및 음량 최적화)
+    음성 파일을 처리하는 함수 (작업 큐 워커 스레드에서 실행)
+    
+    Args:
+        job: jobs.Job - file_path, language 를 읽고 progress 를 갱신
+        backend: whisper_backend 백엔드 (cli | server | resident)
+    
+    Returns:
+        str: 변환된 텍스트 (실패 시 예외)
     """
-    # 스테레오를 모노로 변환 (음성 인식에 더 적합)
-    if audio.channels == 2:
-        print("스테레오를 모노로 변환 중...")
-        audio = audio.set_channels(1)
+    file_path = job.file_path
+    
+    # 1차 패스: 스트리밍 디코딩으로 길이와 피크만 계산 (정규화와 WAV 헤더용)
+    print("오디오 분석 시작...")
+    num_samples, peak = scan_audio(file_path, TARGET_SAMPLE_RATE)
+    print(f"오디오 길이: {num_samples/TARGET_SAMPLE_RATE:.1f}초, 샘플레이트: {TARGET_SAMPLE_RATE}Hz, "
+          f"백엔드: {backend.name}")
+    # cli 만 윈도우 단위로 whisper-cli stdin 에 흘려보내고, server/resident 는 전체를 한 배열로 모은다
+    # (16kHz float32 기준 1시간 약 230MB)
+    if backend.name != "cli" and MAX_IN_MEMORY_MINUTES > 0 and num_samples > MAX_IN_MEMORY_MINUTES * 60 * TARGET_SAMPLE_RATE:
+        raise ValueError(f"{backend.name} 백엔드는 {MAX_IN_MEMORY_MINUTES:.0f}분보다 긴 파일을 변환할 수 없습니다 "
+                         f"(WHISPER_BACKEND=cli 사용 또는 WHISPER_WEB_MAX_IN_MEMORY_MINUTES 조정)")
     
-    # 샘플레이트를 16kHz로 변환 (Whisper 모델에 최적화)
-    if audio.frame_rate != 16000:
-        print(f"샘플레이트를 16kHz로 변환 중... (현재: {audio.frame_rate}Hz)")
-        audio = audio.set_frame_rate(16000)
+    def on_progress(fraction):
+        job.progress = fraction
     
-    # 오디오 정규화 (볼륨 레벨 조정)
-    print("오디오 정규화 중...")
-    audio = normalize(audio)
+    def on_segment(segment):
+        # 세그먼트가 디코딩될 때마다 작업에 추가해 화면에 바로 표시
+        job.append_line(format_segment_line(segment) + "\n")
     
-    # Low-pass filter 적용 (3000Hz) - 노이즈 제거
-    print("Low-pass filter 적용 중 (3000Hz)...")
-    audio = low_pass_filter(audio, 3000)
-    print("Low-pass filter 적용 완료")
+    # 2차 패스: 모노/16kHz 디코딩 → 정규화 → Low-pass 3000Hz → +5dB 를 윈도우 단위로 적용해
+    # 백엔드로 바로 전달 (cli 백엔드는 업로드 크기와 무관하게 윈도우 하나만 메모리에 올림)
+    chunks = preprocess_stream(file_path, TARGET_SAMPLE_RATE, peak=peak, **DECODE_PARAMS)
+    segments = backend.transcribe(chunks, num_samples=num_samples, language=job.language,
+                                  on_segment=on_segment, on_progress=on_progress)
     
-    # 음량 5dB 증가 (더 정확한 인식을 위해)
-    print("음량을 5dB 증가 중...")
-    audio = audio + 5  # 5dB 증가
+    # 최종 결과는 백엔드가 반환한 세그먼트 기준 (부분 결과와 같은 형식)
+    job.lines = [format_segment_line(segment) + "\n" for segment in segments]
     
-    return audio
+    # 같은 내용의 파일을 다시 올리면 디코딩 없이 바로 반환되도록 저장
+    cache = get_cache()
+    if cache is not None and job.cache_key:
+        cache.put(job.cache_key, {'lines': job.lines, 'segments': segments})
+    
+    return job.partial_text
+
+@st.cache_resource
+def get_backend():
+    """
+    모든 세션이 공유하는 whisper.cpp 백엔드 (WHISPER_BACKEND: cli | server | resident, 기본값 DEFAULT_BACKEND)
+    
+    server 는 WHISPER_WEB_WORKERS 개의 whisper-server 를, resident 는 프로세스 안에 모델 하나를 상주시킨다.
+    """
+    kind = backend_from_env()
+    if kind == "cli" and not WHISPER_CLI_PATH.exists():
+        raise FileNotFoundError(f"whisper-cli 파일을 찾을 수 없습니다: {WHISPER_CLI_PATH}")
+    if not MODEL_PATH.exists():
+        raise FileNotFoundError(f"모델 파일을 찾을 수 없습니다: {MODEL_PATH}")
+    backend = create_backend(kind, model_path=MODEL_PATH, cli_path=WHISPER_CLI_PATH,
+                             server_path=WHISPER_SERVER_PATH,
+                             pool_size=int(os.getenv("WHISPER_WEB_WORKERS", "2")), cwd=str(SCRIPT_DIR))
+    # 상주 서비스이므로 프로세스 안 모델(resident)은 미리 워밍업하고 메모리 상한으로 해제되지 않도록 고정
+    if hasattr(backend, "warmup"):
+        backend.warmup(pin=True)
+    return backend
+
+@st.cache_resource
+def get_job_manager():
+    """모든 세션이 공유하는 작업 큐 (동시 변환 수는 WHISPER_WEB_WORKERS 로 제한)"""
+    return JobManager(max_workers=int(os.getenv("WHISPER_WEB_WORKERS", "2")))
+
+job_manager = get_job_manager()
+
+# resident 백엔드는 첫 변환 요청이 아니라 서비스가 처음 열릴 때 모델 로딩/워밍업 (실패하면 변환 시작 때 안내)
+if backend_from_env() == "resident":
+    try:
+        get_backend()
+    except Exception as e:
+        print(f"resident 백엔드 미리 로딩 실패: {e}")
+
+def spool_upload(uploaded_file):
+    """
+    업로드를 디스크에 한 번만 저장하고 경로 반환 (같은 업로드는 세션에서 재사용)
+    
+    getvalue() 로 전체 바이트를 복사하지 않고 청크 단위로 파일에 쓴다.
+    
+    Args:
+        uploaded_file: Streamlit UploadedFile
+    
+    Returns:
+        str: 저장된 임시 파일 경로
+    """
+    spooled = st.session_state.get('spooled_upload')
+    if spooled and spooled['file_id'] == uploaded_file.file_id and os.path.exists(spooled['path']):
+        return spooled['path']
+    
+    # 이전 업로드의 임시 파일 정리
+    discard_spooled_upload()
+    
+    uploaded_file.seek(0)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
+        shutil.copyfileobj(uploaded_file, tmp_file, 1024 * 1024)
+        tmp_file_path = tmp_file.name
+    uploaded_file.seek(0)
+    
+    st.session_state.spooled_upload = {'file_id': uploaded_file.file_id, 'path': tmp_file_path}
+    return tmp_file_path
+
+def discard_spooled_upload(delete=True):
+    """세션에 저장된 업로드 임시 파일 정리 (delete=False 면 소유권만 넘김)"""
+    spooled = st.session_state.pop('spooled_upload', None)
+    if spooled and delete:
+        try:
+            os.unlink(spooled['path'])
+        except OSError:
+            pass
+
+# 현재 세션의 작업 (세션마다 자기 작업 ID 만 보관)
+current_job = job_manager.get(st.session_state.get('job_id')) if st.session_state.get('job_id') else None
+job_active = current_job is not None and not current_job.finished
 
 # 사이드바 설정
 with st.sidebar:
@@ -75,6 +179,12 @@ with st.sidebar:
     st.markdown("- **모델**: ggml-large-v2")
     st.markdown("- **정확도**: 높음")
     st.markdown("- **속도**: 중간")
+    
+    cache = get_cache()
+    if cache is not None:
+        st.markdown("---")
+        st.markdown("### 결과 캐시")
+        st.markdown(f"- **적중/미스**: {cache.hits} / {cache.misses}")
 
 # 메인 영역
 col1, col2 = st.columns([1, 1])
@@ -93,35 +203,52 @@ with col2:
     st.header("🎵 음원 재생")
     
     if uploaded_file is not None:
+        # 디스크에 한 번 저장한 파일 (rerun 마다 업로드 전체를 다시 읽지 않도록 재생/정보 모두 이 경로 사용)
+        spooled_path = spool_upload(uploaded_file)
+        
         # 음원 재생 컴포넌트
-        st.audio(uploaded_file, format=f'audio/{uploaded_file.name.split(".")[-1]}')
+        st.audio(spooled_path, format=f'audio/{uploaded_file.name.split(".")[-1]}')
         
-        # 파일 정보 표시
-        file_size = len(uploaded_file.getvalue()) / (1024 * 1024)  # MB
+        # 파일 정보 표시 (크기는 업로드 메타데이터에서)
+        file_size = uploaded_file.size / (1024 * 1024)  # MB
         st.info(f"📄 파일명: {uploaded_file.name}")
         st.info(f"📊 파일 크기: {file_size:.2f} MB")
         
-        # 오디오 정보 표시
+        # 오디오 정보 표시 (디스크에 한 번 저장한 파일의 헤더만 ffprobe 로 읽음)
         try:
-            # 임시 파일로 저장하여 오디오 정보 확인
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_file_path = tmp_file.name
-            
-            audio = AudioSegment.from_file(tmp_file_path)
-            
-            # 임시 파일 삭제
-            os.unlink(tmp_file_path)
+            audio_info = probe_audio_info(spooled_path)
+            st.info(f"⏱️ 길이: {audio_info['duration']:.1f}초, {audio_info['sample_rate']}Hz, "
+                    f"{audio_info['channels']}채널 ({audio_info['codec']})")
         except Exception as e:
             st.warning(f"오디오 정보를 읽을 수 없습니다: {e}")
     else:
+        discard_spooled_upload()
         st.info("파일을 업로드하면 여기에 음원 재생기가 표시됩니다")
 
-# 변환 버튼
-if uploaded_file is not None and not st.session_state.get('processing', False):
+# 변환 버튼 - 업로드를 임시 파일로 저장하고 작업 큐에 넣은 뒤 바로 반환
+if uploaded_file is not None and not job_active:
     if st.button("🚀 변환 시작", type="primary", use_container_width=True):
-        st.session_state.processing = True
-        st.session_state.transcription_text = ""
+        # 내용 해시 + 언어 + 모델 + 디코딩 설정으로 캐시 조회 (적중하면 디코딩 생략)
+        cache = get_cache()
+        cache_key = None
+        cached = None
+        tmp_file_path = spool_upload(uploaded_file)
+        if cache is not None:
+            cache_key = cache.make_key(content_hash(tmp_file_path), language,
+                                       model_fingerprint(MODEL_PATH), **DECODE_PARAMS)
+            cached = cache.get(cache_key)
+        
+        if cached is not None:
+            st.session_state.job_id = job_manager.add_done(language, cached['lines'])
+        else:
+            # 임시 파일은 작업이 넘겨받아 끝나면 삭제
+            discard_spooled_upload(delete=False)
+            try:
+                job_fn = partial(process_audio_file, backend=get_backend())
+            except Exception as e:
+                st.error(f"whisper.cpp 백엔드를 준비할 수 없습니다: {e}")
+                st.stop()
+            st.session_state.job_id = job_manager.submit(job_fn, tmp_file_path, language, cache_key)
         st.rerun()
 
 # 텍스트 결과 영역
@@ -131,201 +258,60 @@ st.header("📝 변환 결과")
 # 결과를 표시할 placeholder 생성
 result_placeholder = st.empty()
 
-# 결과 처리 (매 프레임마다 체크) - 메인 스레드에서 실행
-if global_result_ready == True:
-    if global_result_type == "success":
-        # placeholder에 직접 결과 표시
-        with result_placeholder.container():
-            st.text_area(
-                "변환된 텍스트",
-                value=global_result_data,
-                height=400,
-                disabled=True
-            )
-            
-            # 다운로드 버튼
-            st.download_button(
-                label="📥 텍스트 파일 다운로드",
-                data=global_result_data,
-                file_name=f"transcription_{int(time.time())}.txt",
-                mime="text/plain",
-                use_container_width=True
-            )
+with result_placeholder.container():
+    if current_job is None:
+        st.text_area(
+            "변환된 텍스트가 여기에 표시됩니다",
+            value="",
+            height=400,
+            disabled=True
+        )
+    
+    elif current_job.status == STATUS_QUEUED:
+        position = job_manager.queue_position(current_job.id)
+        st.info(f"대기 중입니다... (대기 순번: {position})")
+    
+    elif current_job.status == STATUS_RUNNING:
+        elapsed = time.time() - current_job.started_at
+        st.progress(current_job.progress,
+                    text=f"음성을 텍스트로 변환 중입니다... {current_job.progress * 100:.0f}% ({elapsed:.0f}초 경과)")
         
-        st.session_state.processing = False
-        # 전역 변수 초기화
-        global_result_ready = False
-        global_result_data = None
-        global_result_type = None
+        # 지금까지 디코딩된 부분 결과
+        st.text_area(
+            f"변환 중인 텍스트 ({len(current_job.lines)}개 구간)",
+            value=current_job.partial_text,
+            height=400,
+            disabled=True
+        )
+    
+    elif current_job.status == STATUS_DONE:
+        st.text_area(
+            "변환된 텍스트",
+            value=current_job.result,
+            height=400,
+            disabled=True
+        )
         
-    elif global_result_type == "error":
-        with result_placeholder.container():
-            st.error(global_result_data)
-        st.session_state.processing = False
-        # 전역 변수 초기화
-        global_result_ready = False
-        global_result_data = None
-        global_result_type = None
-
-# 초기 상태 또는 처리 중일 때 placeholder에 기본 내용 표시
-if not global_result_ready:
-    with result_placeholder.container():
-        if st.session_state.get('processing', False):
-            with st.spinner("음성을 텍스트로 변환 중입니다..."):
-                st.info("변환이 완료되면 결과가 표시됩니다.")
-        else:
+        # 다운로드 버튼
+        st.download_button(
+            label="📥 텍스트 파일 다운로드",
+            data=current_job.result,
+            file_name=f"transcription_{int(current_job.finished_at)}.txt",
+            mime="text/plain",
+            use_container_width=True
+        )
+    
+    elif current_job.status == STATUS_ERROR:
+        st.error(current_job.error)
+        if current_job.lines:
             st.text_area(
-                "변환된 텍스트가 여기에 표시됩니다",
-                value="",
+                "오류 전까지 변환된 텍스트",
+                value=current_job.partial_text,
                 height=400,
                 disabled=True
             )
 
-def process_audio_file(file_path, language):
-    """음성 파일을 처리하는 함수"""
-    global global_result_ready, global_result_data, global_result_type
-    
-    try:
-        # 현재 스크립트의 디렉토리를 기준으로 경로 설정
-        script_dir = Path(__file__).parent.absolute()
-        whisper_cli_path = script_dir / "whisper-cli"
-        model_path = script_dir.parent / "model" / "ggml-large-v2-q8_0.bin"
-        
-        # 파일 존재 확인
-        if not whisper_cli_path.exists():
-            raise FileNotFoundError(f"whisper-cli 파일을 찾을 수 없습니다: {whisper_cli_path}")
-        
-        if not model_path.exists():
-            raise FileNotFoundError(f"모델 파일을 찾을 수 없습니다: {model_path}")
-        
-        # 오디오 전처리 적용
-        print("오디오 전처리 시작...")
-        audio = AudioSegment.from_file(file_path)
-        
-        # 전처리 전 정보 출력
-        print(f"전처리 전 - 길이: {len(audio)/1000:.1f}초, 채널: {audio.channels}개, 샘플레이트: {audio.frame_rate}Hz")
-        
-        # 오디오 전처리 적용
-        audio = preprocess_audio(audio)
-        
-        # 전처리 후 정보 출력
-        print(f"전처리 후 - 길이: {len(audio)/1000:.1f}초, 채널: {audio.channels}개, 샘플레이트: {audio.frame_rate}Hz")
-        
-        # 전처리된 오디오를 임시 WAV 파일로 저장
-        temp_processed_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-        audio.export(temp_processed_file.name, format="wav", parameters=["-ar", "16000"])
-        temp_processed_file.close()
-        
-        # 전처리된 파일 경로 사용
-        input_file_path = temp_processed_file.name
-        print(f"전처리된 파일 저장: {input_file_path}")
-        
-        # whisper-cli 실행
-        cmd = [
-            str(whisper_cli_path),
-            "-l", language,
-            "-m", str(model_path),
-            "-f", input_file_path
-        ]
-        
-        # 명령어 로깅 (디버깅용)
-        print(f"실행 명령어: {' '.join(cmd)}")
-        
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            universal_newlines=True,
-            bufsize=1
-        )
-        
-        transcription_lines = []
-        processing_started = False
-        
-        # 실시간으로 출력 읽기
-        for line in process.stdout:
-            print(f"{line.strip()}")  # 디버깅용
-            
-            # "main: processing" 메시지가 나오면 처리 시작
-            if "main: processing" in line:
-                processing_started = True
-                continue
-            
-            # "ggml_metal_free: deallocating" 메시지가 나오면 처리 완료
-            if "ggml_metal_free: deallocating" in line:
-                process.returncode = 0
-                break
-            
-            # 처리 중이고 타임라인이 있는 라인만 수집
-            if processing_started and "[" in line and "-->" in line and "]" in line:
-                # "Whisper 출력: " 부분을 제거하고 타임라인부터 내용까지 추출
-                clean_line = line.strip()
-                transcription_lines.append(clean_line + "\n")
-
-        process.wait()
-        
-        # 전처리된 임시 파일 정리
-        if os.path.exists(input_file_path):
-            try:
-                os.unlink(input_file_path)
-                print("전처리된 임시 파일 정리 완료")
-            except:
-                pass
-        
-        if process.returncode == 0:
-            # 전역 변수에 결과 저장
-            result_text = "".join(transcription_lines)
-            global_result_data = result_text
-            global_result_type = "success"
-            global_result_ready = True
-        else:
-            global_result_data = "음성 변환 중 오류가 발생했습니다."
-            global_result_type = "error"
-            global_result_ready = True
-            
-    except Exception as e:
-        error_msg = f"처리 중 오류가 발생했습니다: {str(e)}"
-        print(error_msg)  # 디버깅용
-        global_result_data = error_msg
-        global_result_type = "error"
-        global_result_ready = True
-
-# 파일이 업로드되고 변환이 시작되었을 때 처리
-if uploaded_file is not None and st.session_state.get('processing', False):
-    # 임시 파일로 저장
-    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-        tmp_file.write(uploaded_file.getvalue())
-        tmp_file_path = tmp_file.name
-    
-    # 백그라운드에서 처리
-    thread = threading.Thread(
-        target=process_audio_file,
-        args=(tmp_file_path, language)
-    )
-    thread.start()
-    
-    # 스레드가 완료될 때까지 대기 (블로킹)
-    thread.join()
-    
-    # 스레드 완료 후 결과 처리
-    if global_result_ready:
-        if global_result_type == "success":
-            with result_placeholder.container():
-                st.text_area(
-                    "변환된 텍스트",
-                    value=global_result_data,
-                    height=400,
-                    disabled=True
-                )
-                # ... 다운로드 버튼
-            st.session_state.processing = False
-        elif global_result_type == "error":
-            with result_placeholder.container():
-                st.error(global_result_data)
-            st.session_state.processing = False
-    
-    # 임시 파일 정리
-    try:
-        os.unlink(tmp_file_path)
-    except:
-        pass
+# 작업이 끝날 때까지 주기적으로 다시 실행해 진행 상황 갱신 (폴링)
+if job_active:
+    time.sleep(1)
+    st.rerun()
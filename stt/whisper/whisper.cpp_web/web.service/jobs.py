@@ -0,0 +1,139 @@
+# 변환 작업 큐 (세션 간 공유, 작업별 ID 와 결과 보관)
+#
+# Streamlit 스크립트는 작업을 큐에 넣고 바로 반환하며, 이후 실행(rerun)마다
+# 작업 ID 로 진행 상황과 결과를 조회한다. 워커 수를 제한해 동시에 여러 사용자가
+# 올려도 서버가 과부하되지 않게 한다.
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_ERROR = "error"
+
+
+class Job:
+    """변환 작업 하나의 상태"""
+
+    def __init__(self, file_path, language, cache_key=None):
+        self.id = uuid.uuid4().hex
+        self.file_path = file_path
+        self.language = language
+        self.cache_key = cache_key  # 변환 결과 캐시 키 (없으면 캐시에 저장하지 않음)
+        self.status = STATUS_QUEUED
+        self.progress = 0.0       # 0.0 ~ 1.0
+        self.lines = []           # 디코딩되는 대로 추가되는 결과 라인 (부분 결과)
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def append_line(self, line):
+        """부분 결과 라인 추가 (워커 스레드에서 호출, 화면은 다음 폴링 때 반영)"""
+        self.lines.append(line)
+
+    @property
+    def partial_text(self):
+        return "".join(self.lines)
+
+    @property
+    def finished(self):
+        return self.status in (STATUS_DONE, STATUS_ERROR)
+
+
+class JobManager:
+    """
+    제한된 워커 풀로 변환 작업을 실행하는 작업 큐
+
+    Args:
+        max_workers (int): 동시에 실행할 작업 수
+        keep_seconds (int): 끝난 작업 결과를 보관할 시간 (초)
+    """
+
+    def __init__(self, max_workers=2, keep_seconds=3600):
+        self.max_workers = max_workers
+        self.keep_seconds = keep_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="whisper-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, file_path, language, cache_key=None):
+        """
+        작업을 큐에 넣고 바로 작업 ID 반환
+
+        Args:
+            fn (callable): Job 을 받아 결과 텍스트를 반환하는 함수 (실패 시 예외)
+            file_path (str): 업로드된 파일 경로 (작업이 끝나면 삭제)
+            language (str): 인식 언어
+            cache_key (str): 변환 결과 캐시 키
+        """
+        job = Job(file_path, language, cache_key)
+        with self._lock:
+            self._purge_finished()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn)
+        return job.id
+
+    def add_done(self, language, lines):
+        """
+        이미 결과가 있는 작업(캐시 적중)을 완료 상태로 등록하고 작업 ID 반환
+
+        Args:
+            language (str): 인식 언어
+            lines (list): 결과 라인 목록
+        """
+        job = Job(None, language)
+        job.lines = list(lines)
+        job.result = job.partial_text
+        job.progress = 1.0
+        job.status = STATUS_DONE
+        job.started_at = job.finished_at = time.time()
+        with self._lock:
+            self._purge_finished()
+            self._jobs[job.id] = job
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def queue_position(self, job_id):
+        """대기 중인 작업의 순번 (1부터), 대기 중이 아니면 0"""
+        with self._lock:
+            queued = sorted((j for j in self._jobs.values() if j.status == STATUS_QUEUED),
+                            key=lambda j: j.created_at)
+        for position, job in enumerate(queued, 1):
+            if job.id == job_id:
+                return position
+        return 0
+
+    def _run(self, job, fn):
+        job.status = STATUS_RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = fn(job)
+            job.progress = 1.0
+            job.status = STATUS_DONE
+        except Exception as e:
+            print(f"작업 {job.id} 실패: {e}")
+            job.error = f"처리 중 오류가 발생했습니다: {str(e)}"
+            job.status = STATUS_ERROR
+        finally:
+            job.finished_at = time.time()
+            try:
+                os.unlink(job.file_path)
+            except OSError:
+                pass
+
+    def _purge_finished(self):
+        """보관 시간이 지난 완료 작업 정리 (lock 안에서 호출)"""
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and now - job.finished_at > self.keep_seconds]
+        for job_id in expired:
+            del self._jobs[job_id]
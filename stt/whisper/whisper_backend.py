@@ -0,0 +1,459 @@
+# whisper.cpp 인식 백엔드 (구조화된 세그먼트 반환)
+#
+# 지금까지 진입점마다 whisper-cli 를 띄우고 stdout 텍스트를 result.stdout.strip() 이나
+# "-->" 검색으로 다시 파싱했다. 여기서는 같은 인터페이스의 백엔드 세 가지를 제공한다.
+#   cli     : 호출마다 whisper-cli 실행, JSON 출력(-ojf)으로 세그먼트 수집
+#   server  : 상주 whisper-server 워커 풀 (WhisperServerPool), HTTP verbose_json
+#   resident: pywhispercpp 로 같은 프로세스 안에 ggml 모델 상주, float32 배열을 그대로 전달
+#
+# 모든 백엔드의 transcribe() 는
+#   {'start', 'end', 'text', 'avg_logprob'} dict 목록 (시간 단위: 초)
+# 을 반환한다. 입력은 파일 경로, (샘플,) float32 배열, 또는 float32 청크 이터러블(num_samples 필요)이다.
+# 청크 이터러블을 윈도우 단위로 흘려보내 메모리를 일정하게 쓰는 것은 cli 뿐이고,
+# server/resident 는 입력 전체를 한 배열로 모은 뒤 변환한다 (16kHz float32 기준 1시간 약 230MB).
+
+import json
+import math
+import os
+import re
+import subprocess
+import tempfile
+import threading
+
+import numpy as np
+
+from audio_preprocess import TARGET_SAMPLE_RATE, load_audio, resample, to_mono
+from audio_segments import to_pcm16, to_wav_bytes, wav_header
+
+BACKENDS = ("cli", "server", "resident")
+# WHISPER_BACKEND 를 지정하지 않았을 때의 백엔드 (모든 진입점 공통, 실행 파일 하나만 있으면 되고 메모리 사용이 일정함)
+DEFAULT_BACKEND = "cli"
+# 세그먼트에 단어 타임스탬프('words')를 채우는 백엔드 (resident 는 세그먼트 단위만)
+WORD_TIMESTAMP_BACKENDS = ("cli", "server")
+
+# whisper-cli 세그먼트 출력 (예: "[00:00:01.000 --> 00:00:04.500]   안녕하세요")
+SEGMENT_LINE_PATTERN = re.compile(
+    r"\[(\d+):(\d+):(\d+(?:\.\d+)?)\s*-->\s*(\d+):(\d+):(\d+(?:\.\d+)?)\]\s*(.*)")
+# 상주 모델은 인스턴스끼리 공유하므로 변환 호출은 프로세스 전체에서 직렬화
+_resident_lock = threading.Lock()
+
+# whisper-cli -pp 진행률 출력 (예: "whisper_print_progress_callback: progress =  40%")
+PROGRESS_PATTERN = re.compile(r"progress\s*=\s*(\d+)%")
+
+
+def backend_from_env():
+    """WHISPER_BACKEND 환경 변수의 백엔드 종류 (없으면 DEFAULT_BACKEND)"""
+    return os.getenv("WHISPER_BACKEND", DEFAULT_BACKEND)
+
+
+def make_segment(start, end, text, avg_logprob=None, words=None):
+    """백엔드 공통 세그먼트 dict"""
+    segment = {
+        'start': float(start),
+        'end': float(end),
+        'text': text.strip(),
+        'avg_logprob': avg_logprob,
+    }
+    if words:
+        segment['words'] = words
+    return segment
+
+
+def format_timestamp(seconds):
+    """초 -> 'HH:MM:SS.mmm'"""
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600 * 1000)
+    minutes, milliseconds = divmod(milliseconds, 60 * 1000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+
+def format_segment_line(segment):
+    """세그먼트를 whisper-cli 출력과 같은 '[시작 --> 끝]  텍스트' 한 줄로 변환"""
+    return f"[{format_timestamp(segment['start'])} --> {format_timestamp(segment['end'])}]   {segment['text']}"
+
+
+def parse_segment_line(line):
+    """
+    whisper-cli 세그먼트 출력 한 줄 파싱
+
+    Returns:
+        dict | None: 세그먼트 (타임라인 줄이 아니면 None)
+    """
+    match = SEGMENT_LINE_PATTERN.search(line)
+    if not match:
+        return None
+    h1, m1, s1, h2, m2, s2, text = match.groups()
+    start = int(h1) * 3600 + int(m1) * 60 + float(s1)
+    end = int(h2) * 3600 + int(m2) * 60 + float(s2)
+    return make_segment(start, end, text)
+
+
+def segments_to_text(segments, separator=" "):
+    """세그먼트 텍스트를 이어붙인 전체 텍스트"""
+    return separator.join(segment['text'] for segment in segments if segment['text'])
+
+
+def _as_array(audio, sample_rate, num_samples=None):
+    """
+    경로/배열/청크 이터러블 입력을 16kHz 모노 float32 배열로 변환
+
+    청크 이터러블도 전체를 메모리에 모은다 (num_samples 를 알면 한 번만 할당해 채우므로 복사본이 생기지 않음).
+    """
+    if isinstance(audio, (str, os.PathLike)):
+        return load_audio(str(audio), TARGET_SAMPLE_RATE)
+    if not isinstance(audio, np.ndarray):
+        if num_samples is not None:
+            buffer = np.zeros(num_samples, dtype=np.float32)
+            filled = 0
+            for chunk in audio:
+                chunk = chunk[:num_samples - filled]
+                buffer[filled:filled + chunk.size] = chunk
+                filled += chunk.size
+            audio = buffer
+        else:
+            chunks = list(audio)
+            audio = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+    audio = to_mono(audio)
+    return resample(audio, sample_rate, TARGET_SAMPLE_RATE)
+
+
+class WhisperCliBackend:
+    """
+    호출마다 whisper-cli 를 실행하는 백엔드
+
+    stdout 의 세그먼트 줄은 나오는 즉시 on_segment 로 넘기고(부분 결과 표시용),
+    최종 결과는 -ojf JSON 파일에서 토큰 확률(avg_logprob)과 토큰 오프셋(단어 타임스탬프)까지 읽는다.
+
+    Args:
+        cli_path (str): whisper-cli 경로
+        model_path (str): ggml 모델 경로
+        language (str): 인식 언어
+        threads (int): 스레드 수 (None 이면 whisper-cli 기본값)
+        extra_args (list): 추가 인자 (예: --vad 옵션)
+        cwd (str): 실행 디렉토리
+    """
+
+    name = "cli"
+
+    def __init__(self, cli_path, model_path, language="ko", threads=None, extra_args=None, cwd=None):
+        self.cli_path = str(cli_path)
+        self.model_path = str(model_path)
+        self.language = language
+        self.threads = threads
+        self.extra_args = list(extra_args or [])
+        self.cwd = cwd
+
+    def transcribe(self, audio, sample_rate=TARGET_SAMPLE_RATE, num_samples=None,
+                   on_segment=None, on_progress=None, language=None):
+        """
+        오디오 하나 변환
+
+        Args:
+            audio: 파일 경로, (샘플,) float32 배열, 또는 float32 청크 이터러블
+            sample_rate (int): 배열/청크의 샘플링 레이트 (16kHz 가 아니면 리샘플링)
+            num_samples (int): 청크 이터러블의 전체 샘플 수 (WAV 헤더용, 이 경우 16kHz 여야 함)
+            on_segment (callable): 세그먼트가 디코딩될 때마다 호출 (dict)
+            on_progress (callable): 진행률 (0.0~1.0)
+            language (str): 이번 호출의 인식 언어 (None 이면 생성 시 언어)
+
+        Returns:
+            list: 세그먼트 dict 목록
+        """
+        from_file = isinstance(audio, (str, os.PathLike))
+        if not from_file and isinstance(audio, np.ndarray):
+            audio = resample(to_mono(audio), sample_rate, TARGET_SAMPLE_RATE)
+            num_samples = audio.size
+            audio = [audio]
+        elif not from_file and num_samples is None:
+            audio = [_as_array(audio, sample_rate)]
+            num_samples = audio[0].size
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_base = os.path.join(tmp_dir, "result")
+            cmd = [self.cli_path, "-l", language or self.language, "-m", self.model_path,
+                   "-ojf", "-of", output_base]
+            if self.threads:
+                cmd += ["-t", str(self.threads)]
+            if on_progress is not None:
+                cmd.append("-pp")
+            cmd += self.extra_args
+            cmd += ["-f", str(audio) if from_file else "-"]
+
+            process = subprocess.Popen(cmd,
+                                       stdin=subprocess.DEVNULL if from_file else subprocess.PIPE,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT,
+                                       cwd=self.cwd)
+
+            # stdout 을 읽는 동안 막히지 않도록 WAV 는 별도 스레드에서 stdin 으로 전달
+            feeder = None
+            if not from_file:
+                feeder = threading.Thread(target=self._feed_wav, args=(process, audio, num_samples), daemon=True)
+                feeder.start()
+
+            segments = []
+            output_tail = []
+            for raw_line in process.stdout:
+                line = raw_line.decode("utf-8", errors="replace").rstrip()
+                output_tail = (output_tail + [line])[-20:]
+
+                progress_match = PROGRESS_PATTERN.search(line)
+                if progress_match:
+                    if on_progress is not None:
+                        on_progress(min(int(progress_match.group(1)), 100) / 100)
+                    continue
+
+                segment = parse_segment_line(line)
+                if segment is not None:
+                    segments.append(segment)
+                    if on_segment is not None:
+                        on_segment(segment)
+
+            # 완료 여부는 로그 문자열이 아니라 프로세스 종료 코드로 판단
+            returncode = process.wait()
+            if feeder is not None:
+                feeder.join()
+            if returncode != 0:
+                raise RuntimeError(f"whisper-cli 실행 실패 (종료 코드 {returncode}):\n" + "\n".join(output_tail))
+
+            json_path = output_base + ".json"
+            if os.path.exists(json_path):
+                segments = self._read_json(json_path)
+        return segments
+
+    @staticmethod
+    def _feed_wav(process, chunks, num_samples):
+        try:
+            process.stdin.write(wav_header(num_samples, TARGET_SAMPLE_RATE))
+            written = 0
+            for chunk in chunks:
+                # 헤더에 적은 샘플 수를 넘지 않도록 보정
+                chunk = chunk[:num_samples - written]
+                process.stdin.write(to_pcm16(chunk))
+                written += chunk.size
+            if written < num_samples:
+                process.stdin.write(bytes((num_samples - written) * 2))
+            process.stdin.close()
+        except (BrokenPipeError, OSError):
+            # whisper-cli 가 먼저 종료된 경우 (종료 코드로 오류 처리)
+            pass
+
+    @staticmethod
+    def _read_json(json_path):
+        """-ojf 결과 파일에서 세그먼트, 평균 토큰 로그 확률, 단어 타임스탬프 읽기"""
+        # 토큰 단위로 자른 한글이 깨진 바이트로 저장될 수 있어 replace 로 읽음
+        with open(json_path, encoding="utf-8", errors="replace") as f:
+            data = json.load(f)
+        segments = []
+        for item in data.get("transcription", []):
+            offsets = item.get("offsets", {})
+            tokens = [token for token in item.get("tokens", []) if not token.get("text", "").startswith("[_")]
+            probabilities = [token["p"] for token in tokens if "p" in token]
+            avg_logprob = (sum(math.log(max(p, 1e-10)) for p in probabilities) / len(probabilities)
+                           if probabilities else None)
+            segments.append(make_segment(offsets.get("from", 0) / 1000, offsets.get("to", 0) / 1000,
+                                         item.get("text", ""), avg_logprob,
+                                         WhisperCliBackend._token_words(item.get("text", ""), tokens)))
+        return segments
+
+    @staticmethod
+    def _token_words(text, tokens):
+        """
+        -ojf 토큰 오프셋을 whisper-server verbose_json 과 같은 단어 목록으로 묶음
+
+        공백으로 시작하는 토큰에서 새 단어를 시작하고, 단어 텍스트는 (토큰 단위로 깨졌을 수 있는)
+        토큰 텍스트 대신 세그먼트 텍스트의 단어를 쓴다. 단어 수가 맞지 않으면 빈 목록.
+
+        Returns:
+            list: {'word', 'start', 'end'} dict 목록 (시간 단위: 초, 'word' 는 앞 공백 포함)
+        """
+        spans = []
+        for token in tokens:
+            token_offsets = token.get("offsets")
+            if not token_offsets:
+                return []
+            start, end = token_offsets.get("from", 0) / 1000, token_offsets.get("to", 0) / 1000
+            if not spans or token.get("text", "").startswith(" "):
+                spans.append([start, end])
+            else:
+                spans[-1][1] = end
+        words = text.split()
+        if not words or len(words) != len(spans):
+            return []
+        return [{'word': " " + word, 'start': start, 'end': end} for word, (start, end) in zip(words, spans)]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class WhisperServerBackend:
+    """
+    상주 whisper-server 워커 풀 백엔드
+
+    Args:
+        pool (WhisperServerPool): 시작된 워커 풀
+    """
+
+    name = "server"
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    @property
+    def concurrency(self):
+        return self.pool.pool_size
+
+    def transcribe(self, audio, sample_rate=TARGET_SAMPLE_RATE, num_samples=None,
+                   on_segment=None, on_progress=None, language=None):
+        """WhisperCliBackend.transcribe 와 같은 인터페이스 (세그먼트는 응답을 받은 뒤 한꺼번에 전달)"""
+        wav_bytes = to_wav_bytes(_as_array(audio, sample_rate, num_samples), TARGET_SAMPLE_RATE)
+        segments = []
+        for item in self.pool.transcribe_segments(wav_bytes, language=language):
+            segment = make_segment(item['start'], item['end'], item['text'],
+                                   item.get('avg_logprob'), item.get('words'))
+            segments.append(segment)
+            if on_segment is not None:
+                on_segment(segment)
+        if on_progress is not None:
+            on_progress(1.0)
+        return segments
+
+    def close(self):
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class WhisperResidentBackend:
+    """
+    pywhispercpp 로 ggml 모델을 현재 프로세스에 상주시키는 백엔드
+
+    float32 배열을 WAV 인코딩/프로세스 생성/HTTP 없이 바로 넘긴다.
+    모델 컨텍스트는 동시에 하나의 변환만 처리하므로 호출을 직렬화한다.
+
+    Args:
+        model_path (str): ggml 모델 경로
+        language (str): 인식 언어
+        threads (int): 스레드 수 (None 이면 CPU 코어 수)
+    """
+
+    name = "resident"
+    concurrency = 1
+
+    def __init__(self, model_path, language="ko", threads=None):
+        try:
+            from pywhispercpp.model import Model
+        except ImportError:
+            raise ImportError("resident 백엔드에는 pywhispercpp 가 필요합니다: pip install pywhispercpp")
+
+        from model_registry import get_registry
+
+        self.language = language
+        self.model_path = str(model_path)
+        n_threads = threads or os.cpu_count() or 4
+        self._compute_type = f"ggml-t{n_threads}"
+
+        # 같은 프로세스에서 백엔드를 다시 만들어도 모델은 레지스트리에서 재사용
+        # (스레드 수는 로딩 시 고정되므로 키에 포함, 언어는 호출마다 넘김)
+        def load():
+            print(f"whisper.cpp 모델 로딩 중 (상주, 스레드 {n_threads}개): {model_path}")
+            return Model(str(model_path),
+                         n_threads=n_threads,
+                         language=language,
+                         print_progress=False,
+                         print_realtime=False)
+
+        self._load = load
+        # 백엔드가 모델을 들고 있는 동안(close 까지) 메모리 상한으로 해제되지 않도록 사용 중 표시
+        self._model = get_registry().acquire(self.model_path, load, device="cpu", compute_type=self._compute_type)
+
+    def warmup(self, pin=False):
+        """
+        1초 무음으로 첫 추론 초기화 비용을 미리 치름
+
+        Args:
+            pin (bool): True 면 메모리 상한을 넘어도 해제하지 않음 (상주 웹 서비스용)
+        """
+        from model_registry import get_registry
+
+        def run_dummy(model):
+            with _resident_lock:
+                model.transcribe(np.zeros(TARGET_SAMPLE_RATE, dtype=np.float32), language=self.language)
+
+        get_registry().warmup(self.model_path, self._load, device="cpu", compute_type=self._compute_type,
+                              warmup_fn=run_dummy, pin=pin)
+
+    def transcribe(self, audio, sample_rate=TARGET_SAMPLE_RATE, num_samples=None,
+                   on_segment=None, on_progress=None, language=None):
+        """WhisperCliBackend.transcribe 와 같은 인터페이스 (청크 입력은 메모리에서 이어붙임)"""
+        audio = np.ascontiguousarray(_as_array(audio, sample_rate, num_samples), dtype=np.float32)
+
+        def new_segment(segment):
+            if on_segment is not None:
+                # pywhispercpp 의 t0/t1 은 10ms 단위
+                on_segment(make_segment(segment.t0 / 100, segment.t1 / 100, segment.text))
+
+        with _resident_lock:
+            # 레지스트리의 모델은 다른 언어로 만든 백엔드와 공유될 수 있으므로 언어를 항상 지정
+            result = self._model.transcribe(audio, new_segment_callback=new_segment,
+                                            language=language or self.language)
+        if on_progress is not None:
+            on_progress(1.0)
+        return [make_segment(segment.t0 / 100, segment.t1 / 100, segment.text) for segment in result]
+
+    def close(self):
+        if self._model is not None:
+            from model_registry import get_registry
+
+            get_registry().release(self.model_path, device="cpu", compute_type=self._compute_type)
+        self._model = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def create_backend(kind=None, model_path=None, cli_path=None, server_path=None, language="ko",
+                   threads=None, pool_size=1, extra_args=None, cwd=None):
+    """
+    백엔드 생성
+
+    Args:
+        kind (str): cli | server | resident (None 이면 backend_from_env())
+        model_path (str): ggml 모델 경로
+        cli_path (str): whisper-cli 경로 (cli)
+        server_path (str): whisper-server 경로 (server)
+        language (str): 인식 언어
+        threads (int): 스레드 수 (server 는 워커당)
+        pool_size (int): whisper-server 워커 수 (server)
+        extra_args (list): 실행 파일 추가 인자 (cli, server)
+        cwd (str): 실행 디렉토리 (cli, server)
+
+    Returns:
+        WhisperCliBackend | WhisperServerBackend | WhisperResidentBackend
+    """
+    kind = kind or backend_from_env()
+    if kind == "cli":
+        return WhisperCliBackend(cli_path, model_path, language, threads, extra_args, cwd)
+    if kind == "server":
+        from whisper_server_pool import WhisperServerPool
+
+        pool = WhisperServerPool(str(server_path), str(model_path), language=language, pool_size=pool_size,
+                                 threads_per_worker=threads or 4, extra_args=extra_args, cwd=cwd)
+        return WhisperServerBackend(pool.start())
+    if kind == "resident":
+        return WhisperResidentBackend(model_path, language, threads)
+    raise ValueError(f"알 수 없는 whisper 백엔드: {kind} (사용 가능: {', '.join(BACKENDS)})")
@@ -0,0 +1,84 @@
+# faster-whisper 디코딩 프리셋별 정확도(WER/CER)와 속도(RTF) 비교
+#
+# 사용법:
+#   python bench_decode_presets.py ./samples --batch-sizes 0 8 16
+#
+# 샘플 폴더에는 오디오 파일과 같은 이름의 정답 텍스트(.txt)를 둔다.
+#   samples/meeting1.mp3, samples/meeting1.txt, ...
+# batch size 0 은 기존 순차 디코딩, 1 이상은 BatchedInferencePipeline 을 사용한다.
+
+import argparse
+import os
+import sys
+import time
+
+from speech_to_text_final import DECODE_PRESETS, get_whisper_model, run_transcribe
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from audio_preprocess import TARGET_SAMPLE_RATE, load_audio, preprocess
+from text_metrics import wer, cer, load_samples
+
+
+def run_config(samples, preset, batch_size):
+    """프리셋 하나 x 배치 크기 하나로 전체 샘플 실행"""
+    total_audio = 0.0
+    total_time = 0.0
+    references = []
+    hypotheses = []
+    for audio_path, reference, audio in samples:
+        start = time.time()
+        segments, _ = run_transcribe(audio, preset, batch_size)
+        text = " ".join(segment.text.strip() for segment in segments)
+        total_time += time.time() - start
+        total_audio += audio.size / TARGET_SAMPLE_RATE
+        references.append(reference)
+        hypotheses.append(text)
+
+    reference_all = " ".join(references)
+    hypothesis_all = " ".join(hypotheses)
+    return {
+        'wer': wer(reference_all, hypothesis_all),
+        'cer': cer(reference_all, hypothesis_all),
+        'rtf': total_time / total_audio if total_audio > 0 else 0.0,
+        'time': total_time,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="디코딩 프리셋별 WER/CER/RTF 벤치마크")
+    parser.add_argument("sample_dir", help="오디오 + 정답 텍스트(.txt) 샘플 폴더")
+    parser.add_argument("--presets", nargs="+", default=list(DECODE_PRESETS),
+                        help=f"측정할 프리셋 (기본값: {' '.join(DECODE_PRESETS)})")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[0, 8],
+                        help="배치 크기 목록 (0 = 순차 디코딩, 기본값: 0 8)")
+    args = parser.parse_args()
+
+    samples = load_samples(args.sample_dir)
+    if not samples:
+        print(f"샘플이 없습니다: {args.sample_dir}")
+        return
+
+    # 디코딩 시간만 측정하도록 전처리와 모델 로딩은 미리 수행
+    print(f"샘플 {len(samples)}개 전처리 중...")
+    prepared = [
+        (path, reference, preprocess(load_audio(path), TARGET_SAMPLE_RATE, normalize=True))
+        for path, reference in samples
+    ]
+    get_whisper_model()
+
+    rows = []
+    for preset in args.presets:
+        for batch_size in args.batch_sizes:
+            print(f"\n=== 프리셋 {preset}, 배치 {batch_size or '순차'} ===")
+            result = run_config(prepared, preset, batch_size)
+            rows.append((preset, batch_size, result))
+
+    print("\n=== 결과 ===")
+    print(f"{'프리셋':<10}{'배치':>6}{'WER':>8}{'CER':>8}{'RTF':>8}{'시간(초)':>10}")
+    for preset, batch_size, result in rows:
+        print(f"{preset:<10}{batch_size or '-':>6}{result['wer']:>8.3f}{result['cer']:>8.3f}"
+              f"{result['rtf']:>8.3f}{result['time']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# KoreanSpeechToText (transformers Whisper) 배치 크기별 처리량 비교
+#
+# 사용법:
+#   python bench_transformers_batch.py ./samples --batch-sizes 1 4 8
+#   python bench_transformers_batch.py a.mp3 b.mp3 --model openai/whisper-small
+#
+# 같은 파일 목록을 transcribe_batch 로 배치 크기별로 변환하고 윈도우/초, 파일/초, RTF 를 출력한다.
+# 배치 크기 1 은 기존처럼 30초 윈도우를 하나씩 generate 하는 경우와 같다.
+# 30초보다 긴 파일은 겹치는 윈도우로 나뉘어 다른 파일의 윈도우와 같은 배치로 묶인다.
+
+import argparse
+import os
+import time
+
+import librosa
+import torch
+
+from speech_to_text import SAMPLE_RATE, KoreanSpeechToText, split_windows
+
+AUDIO_EXTENSIONS = ('.mp3', '.webm', '.wav', '.m4a', '.flac')
+
+
+def collect_files(inputs):
+    """파일/폴더 인자를 오디오 파일 경로 목록으로 펼침"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths += [os.path.join(item, name) for name in sorted(os.listdir(item))
+                      if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS]
+        else:
+            paths.append(item)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="transformers Whisper 배치 크기별 처리량 벤치마크")
+    parser.add_argument("inputs", nargs="+", help="오디오 파일 또는 폴더")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 4, 8],
+                        help="측정할 배치 크기 (기본값: 1 4 8)")
+    parser.add_argument("--model", default="openai/whisper-large-v3", help="모델 이름")
+    args = parser.parse_args()
+
+    paths = collect_files(args.inputs)
+    if not paths:
+        print("오디오 파일이 없습니다.")
+        return
+
+    audios = [librosa.load(path, sr=SAMPLE_RATE)[0] for path in paths]
+    total_audio = sum(audio.size for audio in audios) / SAMPLE_RATE
+    window_count = sum(len(split_windows(audio)) for audio in audios)
+    print(f"파일 {len(paths)}개, 전체 {total_audio:.1f}초, 30초 윈도우 {window_count}개")
+    print(f"디바이스: cpu, torch 스레드 {torch.get_num_threads()}개")
+
+    stt = KoreanSpeechToText(model_name=args.model)
+    stt.load()  # 측정에서 모델 로딩 시간 제외
+
+    rows = []
+    for batch_size in args.batch_sizes:
+        stt.batch_size = batch_size
+        start = time.time()
+        stt.transcribe_arrays(audios)
+        elapsed = time.time() - start
+        rows.append((batch_size, elapsed))
+        print(f"배치 {batch_size}: {elapsed:.1f}초")
+
+    print("\n=== 결과 ===")
+    print(f"{'배치':>6}{'시간(초)':>10}{'윈도우/초':>12}{'파일/초':>10}{'RTF':>8}")
+    for batch_size, elapsed in rows:
+        print(f"{batch_size:>6}{elapsed:>10.1f}{window_count / elapsed:>12.2f}"
+              f"{len(paths) / elapsed:>10.2f}{elapsed / total_audio:>8.3f}")
+    baseline = rows[0][1]
+    for batch_size, elapsed in rows[1:]:
+        print(f"배치 {batch_size} 속도 향상 (배치 {rows[0][0]} 대비): {baseline / elapsed:.2f}배")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,197 @@
 import os
+import sys
+from difflib import SequenceMatcher
 import torch
 from transformers import WhisperProcessor, WhisperForConditionalGeneration
-from langchain_huggingface import HuggingFaceEndpoint
 import librosa
 import soundfile as sf
 
+# 공용 모듈(stt/whisper) 경로 추가
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from model_registry import get_registry
+
+SAMPLE_RATE = 16000
+
+# Whisper 특징 추출기는 30초까지만 보므로 긴 오디오는 겹치는 30초 윈도우로 나눠 변환
+WINDOW_SECONDS = 30.0
+OVERLAP_SECONDS = 5.0
+
+def split_windows(audio, window_seconds=WINDOW_SECONDS, overlap_seconds=OVERLAP_SECONDS, sample_rate=SAMPLE_RATE):
+    """
+    오디오를 겹치는 고정 길이 윈도우로 분할
+    
+    Args:
+        audio (numpy.ndarray): (샘플,) 오디오
+        window_seconds (float): 윈도우 길이 (초)
+        overlap_seconds (float): 이웃 윈도우끼리 겹치는 길이 (초)
+    
+    Returns:
+        list: 윈도우 배열 목록 (윈도우 길이 이하면 원본 하나)
+    """
+    window = int(window_seconds * sample_rate)
+    step = window - int(overlap_seconds * sample_rate)
+    windows = []
+    start = 0
+    while True:
+        end = min(start + window, audio.size)
+        windows.append(audio[start:end])
+        if end >= audio.size:
+            break
+        start += step
+    return windows
+
+def stitch_texts(texts, max_overlap_words=40, min_match_words=2):
+    """
+    겹치는 윈도우의 변환 결과를 겹친 부분이 한 번만 나오도록 이어붙임
+    
+    앞 윈도우 끝부분과 다음 윈도우 앞부분에서 가장 길게 일치하는 어절 구간을 찾아,
+    일치 구간부터는 다음 윈도우 결과를 쓴다 (윈도우 끝에서 잘린 단어는 버려짐).
+    일치 구간이 없으면 그대로 이어붙인다.
+    
+    Args:
+        texts (list): 윈도우 순서대로의 변환 텍스트
+        max_overlap_words (int): 겹침을 찾을 앞뒤 어절 수
+        min_match_words (int): 겹침으로 인정할 최소 일치 어절 수
+    
+    Returns:
+        str: 이어붙인 텍스트
+    """
+    merged = []
+    for text in texts:
+        words = text.split()
+        if not merged:
+            merged = words
+            continue
+        tail = merged[-max_overlap_words:]
+        head = words[:max_overlap_words]
+        match = SequenceMatcher(None, tail, head, autojunk=False).find_longest_match(0, len(tail), 0, len(head))
+        if match.size >= min_match_words:
+            cut = len(merged) - len(tail) + match.a
+            merged = merged[:cut] + words[match.b:]
+        else:
+            merged += words
+    return " ".join(merged)
+
+def configure_cpu_threads(num_threads=None, cpu_affinity=None):
+    """
+    CPU 추론 스레드 설정
+    
+    Args:
+        num_threads (int): torch 연산 스레드 수 (None 이면 고정한 코어 수, 그것도 없으면 torch 기본값)
+        cpu_affinity (list): 프로세스를 고정할 CPU 코어 번호 목록 (Linux 전용, 예: [0, 1, 2, 3])
+    """
+    if cpu_affinity:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, set(cpu_affinity))
+            print(f"CPU 코어 고정: {sorted(cpu_affinity)}")
+        else:
+            print("이 OS 에서는 CPU 코어 고정을 지원하지 않아 건너뜁니다.")
+        num_threads = num_threads or len(cpu_affinity)
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    print(f"torch 스레드 수: {torch.get_num_threads()}")
+
+def quantize_linear_int8(model):
+    """
+    Linear 레이어를 int8 동적 양자화 (가중치 int8 저장, 활성값은 실행 시 양자화)
+    
+    CPU 전용이며 인코더/디코더 연산 대부분이 Linear 라서 메모리와 추론 시간이 크게 준다.
+    
+    Returns:
+        양자화된 모델
+    """
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
 class KoreanSpeechToText:
-    def __init__(self, model_name="openai/whisper-large-v3", use_endpoint=False, endpoint_url=None):
+    def __init__(self, model_name="openai/whisper-large-v3", use_endpoint=False, endpoint_url=None,
+                 batch_size=8, window_seconds=WINDOW_SECONDS, overlap_seconds=OVERLAP_SECONDS,
+                 cpu_optimized=False, num_threads=None, cpu_affinity=None, language="ko"):
         """
-        한국어 음성 인식 클래스
+        한국어 음성 인식 클래스 (로컬 모델은 처음 변환할 때 또는 load() 호출 시 모델 레지스트리에서 로딩)
         
         Args:
             model_name: 사용할 모델명
             use_endpoint: Dedicated Endpoint 사용 여부
             endpoint_url: Endpoint URL (use_endpoint=True일 때)
+            batch_size: generate 한 번에 넣을 30초 윈도우 수 (로컬 모델)
+            window_seconds: 긴 오디오를 나눌 윈도우 길이 (초, 30초 이하)
+            overlap_seconds: 이웃 윈도우끼리 겹치는 길이 (초)
+            cpu_optimized: CPU 최적화 로딩 (SDPA 어텐션 + Linear int8 동적 양자화)
+            num_threads: torch 연산 스레드 수 (None 이면 고정한 코어 수, 그것도 없으면 기본값, 변환 호출마다 적용)
+            cpu_affinity: 프로세스를 고정할 CPU 코어 번호 목록 (Linux 전용, 생성 시 적용)
+            language: 인식 언어 (기본값: 한국어, 로컬 모델은 generate 호출마다 지정)
         """
         self.model_name = model_name
         self.use_endpoint = use_endpoint
+        self.batch_size = batch_size
+        self.window_seconds = window_seconds
+        self.overlap_seconds = overlap_seconds
+        self.cpu_optimized = cpu_optimized
+        self.num_threads = num_threads or (len(cpu_affinity) if cpu_affinity else None)
+        self.cpu_affinity = sorted(cpu_affinity) if cpu_affinity else None
+        self.language = language
+        self.device = "cpu"
+        # 레지스트리 키 - 스레드/코어 설정이 다른 인스턴스는 모델을 따로 두고 보고서에서도 구분
+        self.compute_type = "int8" if cpu_optimized else "float32"
+        if self.num_threads:
+            self.compute_type += f"-t{self.num_threads}"
+        if self.cpu_affinity:
+            self.compute_type += "-cpu" + ",".join(str(core) for core in self.cpu_affinity)
+        
+        # 스레드/코어 설정은 모델 로딩(레지스트리에서 처음 한 번만 실행)이 아니라 인스턴스 생성 시 적용
+        if not use_endpoint and (cpu_optimized or self.num_threads or self.cpu_affinity):
+            configure_cpu_threads(self.num_threads, self.cpu_affinity)
         
         if use_endpoint:
-            # Dedicated Endpoint 사용
+            # Dedicated Endpoint 사용 (로컬 모델만 쓸 때는 langchain 이 필요 없도록 여기서 import)
+            from langchain_huggingface import HuggingFaceEndpoint
             self.llm = HuggingFaceEndpoint(
                 endpoint_url=endpoint_url,
                 task="automatic-speech-recognition",
                 huggingfacehub_api_token=os.environ.get("HUGGINGFACEHUB_API_TOKEN")
             )
+    
+    def load(self):
+        """
+        로컬 모델을 미리 로딩 (같은 모델/연산 타입이면 프로세스 안의 다른 인스턴스와 공유)
+        
+        Returns:
+            tuple: (processor, model)
+        """
+        return get_registry().get(self.model_name, self._load_local_model,
+                                  device=self.device, compute_type=self.compute_type)
+    
+    @property
+    def processor(self):
+        return self.load()[0]
+    
+    @property
+    def model(self):
+        return self.load()[1]
+    
+    def _load_local_model(self):
+        processor = WhisperProcessor.from_pretrained(self.model_name)
+        if self.cpu_optimized:
+            # PyTorch SDPA(scaled_dot_product_attention) 커널로 어텐션 계산
+            model = WhisperForConditionalGeneration.from_pretrained(
+                self.model_name, attn_implementation="sdpa", low_cpu_mem_usage=True)
+            model.eval()
+            model = quantize_linear_int8(model)
+            print("CPU 최적화 모드: SDPA 어텐션 + Linear int8 동적 양자화")
         else:
-            # 로컬 모델 사용
-            self.processor = WhisperProcessor.from_pretrained(model_name)
-            self.model = WhisperForConditionalGeneration.from_pretrained(model_name)
-            
-            # 한국어 설정
-            self.processor.tokenizer.set_prefix_tokens(language="ko", task="transcribe")
-    
-    def transcribe_audio(self, audio_path):
+            model = WhisperForConditionalGeneration.from_pretrained(self.model_name)
+            model.eval()
+        
+        # 언어는 processor 에 고정하지 않고 generate 호출마다 지정 (다른 언어 인스턴스와 모델을 공유)
+        return processor, model
+    
+    def transcribe_audio(self, audio_path, long_form=True):
         """
         오디오 파일을 텍스트로 변환
         
         Args:
             audio_path: 오디오 파일 경로 (.mp3, .webm, .wav 등)
+            long_form: 30초보다 긴 오디오를 겹치는 윈도우로 나눠 전부 변환 (False 면 앞 30초만)
         
         Returns:
             str: 변환된 텍스트
@@ -51,36 +204,116 @@ class KoreanSpeechToText:
         else:
             # 로컬 모델 사용 시
             # 오디오 로드 및 전처리
-            audio, sample_rate = librosa.load(audio_path, sr=16000)
-            
-            # Whisper 입력 형식으로 변환
-            input_features = self.processor(
-                audio, 
-                sampling_rate=16000, 
-                return_tensors="pt"
-            ).input_features
-            
-            # 한국어 설정
-            forced_decoder_ids = self.processor.get_decoder_prompt_ids(
-                language="ko", 
-                task="transcribe"
+            audio, sample_rate = librosa.load(audio_path, sr=SAMPLE_RATE)
+            return self.transcribe_array(audio, long_form)
+    
+    def transcribe_array(self, audio, long_form=True):
+        """
+        16kHz float32 오디오 배열을 텍스트로 변환 (로컬 모델 전용)
+        
+        Args:
+            audio (numpy.ndarray): (샘플,) 16kHz float32 배열
+            long_form: 30초보다 긴 오디오를 겹치는 윈도우로 나눠 전부 변환 (False 면 앞 30초만)
+        
+        Returns:
+            str: 변환된 텍스트
+        """
+        if not long_form:
+            return self._generate([audio[:int(WINDOW_SECONDS * SAMPLE_RATE)]])[0]
+        return self.transcribe_arrays([audio])[0]
+    
+    def transcribe_batch(self, audio_paths):
+        """
+        여러 오디오 파일을 한 번에 변환 (짧은 파일들은 패딩해서 같은 generate 배치로 묶음)
+        
+        Args:
+            audio_paths (list): 오디오 파일 경로 목록
+        
+        Returns:
+            list: 파일 순서대로의 변환 텍스트
+        """
+        audios = [librosa.load(path, sr=SAMPLE_RATE)[0] for path in audio_paths]
+        return self.transcribe_arrays(audios)
+    
+    def transcribe_arrays(self, audios):
+        """
+        16kHz float32 배열 여러 개를 변환 (로컬 모델 전용)
+        
+        모든 입력의 30초 윈도우를 하나의 목록으로 모아 batch_size 개씩 generate 하고,
+        입력별로 윈도우 결과를 겹침 기준으로 이어붙인다.
+        
+        Args:
+            audios (list): (샘플,) 16kHz float32 배열 목록
+        
+        Returns:
+            list: 입력 순서대로의 변환 텍스트
+        """
+        if self.use_endpoint:
+            raise ValueError("배열 입력 변환은 로컬 모델에서만 사용할 수 있습니다.")
+        
+        windows = []
+        owners = []  # 윈도우별 입력 인덱스
+        for index, audio in enumerate(audios):
+            for window in split_windows(audio, self.window_seconds, self.overlap_seconds):
+                windows.append(window)
+                owners.append(index)
+        
+        window_texts = []
+        for start in range(0, len(windows), self.batch_size):
+            window_texts += self._generate(windows[start:start + self.batch_size])
+        
+        texts_by_input = [[] for _ in audios]
+        for index, text in zip(owners, window_texts):
+            texts_by_input[index].append(text)
+        return [stitch_texts(texts) for texts in texts_by_input]
+    
+    def _generate(self, windows):
+        """
+        30초 이하 윈도우 배치 하나를 generate 한 번으로 변환
+        
+        Args:
+            windows (list): (샘플,) 16kHz float32 배열 목록
+        
+        Returns:
+            list: 윈도우 순서대로의 텍스트
+        """
+        # torch 스레드 설정은 호출한 스레드에만 적용될 수 있으므로 변환 호출마다 맞춤
+        if self.num_threads and torch.get_num_threads() != self.num_threads:
+            torch.set_num_threads(self.num_threads)
+        # 추론하는 동안 메모리 상한으로 모델이 해제되지 않도록 사용 중 표시
+        with get_registry().using(self.model_name, self._load_local_model,
+                                  device=self.device, compute_type=self.compute_type) as (processor, model):
+            return self._generate_with(processor, model, windows)
+    
+    def _generate_with(self, processor, model, windows):
+        # Whisper 입력 형식으로 변환 (특징 추출기가 30초 길이로 패딩해 배치로 묶음)
+        input_features = processor(
+            list(windows), 
+            sampling_rate=SAMPLE_RATE, 
+            return_tensors="pt"
+        ).input_features
+        
+        # 인식 언어 설정
+        forced_decoder_ids = processor.get_decoder_prompt_ids(
+            language=self.language, 
+            task="transcribe"
+        )
+        
+        # 추론
+        with torch.inference_mode():
+            predicted_ids = model.generate(
+                input_features,
+                forced_decoder_ids=forced_decoder_ids,
+                max_length=448
             )
-            
-            # 추론
-            with torch.no_grad():
-                predicted_ids = self.model.generate(
-                    input_features,
-                    forced_decoder_ids=forced_decoder_ids,
-                    max_length=448
-                )
-            
-            # 텍스트 디코딩
-            transcription = self.processor.batch_decode(
-                predicted_ids, 
-                skip_special_tokens=True
-            )[0]
-            
-            return transcription
+        
+        # 텍스트 디코딩
+        transcriptions = processor.batch_decode(
+            predicted_ids, 
+            skip_special_tokens=True
+        )
+        
+        return [text.strip() for text in transcriptions]
 
 # 사용 예시
 if __name__ == "__main__":
@@ -90,6 +323,9 @@ if __name__ == "__main__":
     # 1. 로컬 모델 사용
     stt_local = KoreanSpeechToText(model_name="openai/whisper-large-v3")
     
+    # 1-1. CPU 최적화 로딩 (SDPA + int8 동적 양자화, 정확도 비교는 ../bench_transformers_cpu.py)
+    # stt_local = KoreanSpeechToText(model_name="openai/whisper-large-v3", cpu_optimized=True, num_threads=8)
+    
     # 2. Dedicated Endpoint 사용
     # stt_endpoint = KoreanSpeechToText(
     #     model_name="openai/whisper-large-v3",
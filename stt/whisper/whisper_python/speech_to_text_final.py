@@ -1,55 +1,184 @@
 import os
+import sys
+import time
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pydub import AudioSegment
 from pydub.effects import normalize, low_pass_filter
 from faster_whisper import WhisperModel
 from datetime import datetime
+import numpy as np
 import torch
 import glob
 
-# 전역 변수로 모델 저장 (재사용을 위해)
-_whisper_model = None
-_model_loaded = False
+# 공용 모듈(stt/whisper) 경로 추가
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from audio_preprocess import TARGET_SAMPLE_RATE, find_quiet_point, probe_duration, preprocess_stream, scan_audio
+from transcript_cache import get_cache, content_hash
+from model_registry import get_registry
 
-def get_whisper_model():
+# 최적화된 음성 인식 옵션 (파일 모드/스트리밍 모드 공통)
+TRANSCRIBE_OPTIONS = dict(
+    language="ko",
+    # 정확한 인식을 위한 최적화된 파라미터들
+    beam_size=5,  # 더 정확한 인식을 위해 증가
+    best_of=5,    # 더 많은 후보 검토
+    temperature=0.0,  # 결정적 결과 유지
+    condition_on_previous_text=True,  # 이전 텍스트 고려
+    initial_prompt="",  # 초기 프롬프트 추가
+    word_timestamps=False,  # 단어별 타임스탬프 비활성화
+    vad_filter=True,  # VAD 필터 활성화
+    vad_parameters=dict(
+        min_silence_duration_ms=1000,  # 1초로 증가 (노래 중간 휴식 허용)
+        speech_pad_ms=300  # 0.3초로 감소
+    ),
+    # 노이즈 제거를 위한 임계값 조정
+    compression_ratio_threshold=2.4,  # 압축 비율 임계값
+    no_speech_threshold=0.3,  # 무음 임계값 낮춤 (0.6 → 0.3)
+    # 반복 패널티 완화
+    repetition_penalty=0.8,  # 반복 패널티 완화 (1.0 → 0.8)
+    length_penalty=1.0,  # 길이 패널티 유지
+    # 추가 옵션
+    suppress_tokens=[-1],  # EOT 토큰 억제
+    without_timestamps=False,  # 타임스탬프 유지
+    max_initial_timestamp=1.0,  # 초기 타임스탬프 최대값
+)
+
+# 품질/속도 프리셋 (TRANSCRIBE_OPTIONS 위에 덮어씀)
+#   accurate: 빔 서치 5 (기존 설정, 가장 느림)
+#   balanced: 빔 서치 2
+#   fast    : greedy 디코딩 (빔 1)
+DECODE_PRESETS = {
+    "accurate": dict(beam_size=5, best_of=5),
+    "balanced": dict(beam_size=2, best_of=2),
+    "fast": dict(beam_size=1, best_of=1),
+}
+
+# 스트리밍 모드 윈도우 길이 (초) - 메모리 사용량은 이 길이에 비례하고 파일 길이와 무관
+STREAM_WINDOW_SECONDS = 300
+
+# 파일 모드(streaming=False)에서 변환하는 최대 길이 (초) - 넘는 부분은 잘림
+MAX_FILE_MODE_SECONDS = 30 * 60
+
+# faster-whisper 모델 이름 (캐시 키에도 사용)
+WHISPER_MODEL_NAME = "large-v2"
+
+# 모델 레지스트리 키 이름
+WHISPER_REGISTRY_NAME = f"faster-whisper:{WHISPER_MODEL_NAME}"
+BATCHED_REGISTRY_NAME = f"faster-whisper-batched:{WHISPER_MODEL_NAME}"
+
+def get_device_and_compute_type():
+    """GPU 사용 가능 여부에 따른 (device, compute_type)"""
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    compute_type = "float16" if device == "cuda" else "int8"
+    return device, compute_type
+
+def get_whisper_model(cpu_threads=0, hold=False):
     """
-    Whisper 모델을 싱글톤으로 관리하는 함수 (오프라인 지원)
+    Whisper 모델을 모델 레지스트리에서 가져오는 함수 (처음 호출 시 로딩, 오프라인 지원)
+    
+    Args:
+        cpu_threads (int): CPU 추론 스레드 수 (0이면 faster-whisper 기본값, 처음 로딩할 때만 적용)
+        hold (bool): True 면 release_model(WHISPER_REGISTRY_NAME) 까지 메모리 상한으로 해제되지 않도록 사용 중 표시
+    """
+    device, compute_type = get_device_and_compute_type()
+    get = get_registry().acquire if hold else get_registry().get
+    return get(WHISPER_REGISTRY_NAME, lambda: _load_whisper_model(device, compute_type, cpu_threads),
+               device=device, compute_type=compute_type)
+
+def release_model(name):
+    """get_whisper_model(hold=True) / get_batched_pipeline(hold=True) 의 사용 중 표시 해제"""
+    device, compute_type = get_device_and_compute_type()
+    get_registry().release(name, device, compute_type)
+
+def _load_whisper_model(device, compute_type, cpu_threads):
+    """faster-whisper 모델 로딩 (로컬 캐시 우선, 없으면 다운로드)"""
+    # 오프라인 모드로 시도 (캐시된 모델 사용)
+    try:
+        print("로컬 캐시에서 모델 로딩 시도 중...")
+        whisper_model = WhisperModel(
+            WHISPER_MODEL_NAME, 
+            device=device, 
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+            local_files_only=True  # 오프라인 모드 강제
+        )
+        print("✓ 오프라인 모드로 모델 로딩 성공!")
+    except Exception as e:
+        print(f"로컬 모델을 찾을 수 없습니다: {e}")
+        print("인터넷 연결이 필요합니다. 모델을 다운로드합니다...")
+        whisper_model = WhisperModel(
+            WHISPER_MODEL_NAME, 
+            device=device, 
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+            local_files_only=False  # 온라인 다운로드 허용
+        )
+        print("✓ 모델 다운로드 완료! 다음 실행부터는 오프라인에서 사용 가능합니다.")
+    
+    print(f"모델 로딩 완료! (Device: {device}, Compute Type: {compute_type})")
+    
+    return whisper_model
+
+def get_batched_pipeline(hold=False):
     """
-    global _whisper_model, _model_loaded
+    faster-whisper 배치 추론 파이프라인 (VAD 구간들을 batch_size 개씩 묶어 한 번에 디코딩)
     
-    if not _model_loaded:
-        print("음성 인식 모델 로딩 중...")
-        
-        # GPU 사용 가능 여부 확인
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        compute_type = "float16" if device == "cuda" else "int8"
-        
-        # 오프라인 모드로 시도 (캐시된 모델 사용)
-        try:
-            print("로컬 캐시에서 모델 로딩 시도 중...")
-            _whisper_model = WhisperModel(
-                "large-v2", 
-                device=device, 
-                compute_type=compute_type,
-                local_files_only=True  # 오프라인 모드 강제
-            )
-            print("✓ 오프라인 모드로 모델 로딩 성공!")
-        except Exception as e:
-            print(f"로컬 모델을 찾을 수 없습니다: {e}")
-            print("인터넷 연결이 필요합니다. 모델을 다운로드합니다...")
-            _whisper_model = WhisperModel(
-                "large-v2", 
-                device=device, 
-                compute_type=compute_type,
-                local_files_only=False  # 온라인 다운로드 허용
-            )
-            print("✓ 모델 다운로드 완료! 다음 실행부터는 오프라인에서 사용 가능합니다.")
-        
-        _model_loaded = True
-        print(f"모델 로딩 완료! (Device: {device}, Compute Type: {compute_type})")
-    else:
-        print("기존 모델 재사용 중...")
+    파이프라인은 WhisperModel 을 참조하므로 파이프라인이 있는 동안 모델도 해제되지 않게 holds 로 묶는다.
+    """
+    from faster_whisper import BatchedInferencePipeline
     
-    return _whisper_model
+    # 모델을 먼저 가져와야 파이프라인 상주 크기에 모델 크기가 중복으로 잡히지 않음
+    whisper_model = get_whisper_model()
+    device, compute_type = get_device_and_compute_type()
+    registry = get_registry()
+    get = registry.acquire if hold else registry.get
+    return get(BATCHED_REGISTRY_NAME, lambda: BatchedInferencePipeline(model=whisper_model),
+               device=device, compute_type=compute_type,
+               holds=[registry.make_key(WHISPER_REGISTRY_NAME, device, compute_type)])
+
+def _release_when_done(segments, name):
+    """세그먼트 제너레이터를 끝까지 (또는 중간에 닫을 때까지) 읽으면 모델 사용 중 표시 해제"""
+    try:
+        yield from segments
+    finally:
+        release_model(name)
+
+def run_transcribe(audio, preset="accurate", batch_size=0, **overrides):
+    """
+    프리셋과 배치 크기에 맞춰 음성 인식 실행
+    
+    Args:
+        audio: 오디오 파일 경로 또는 16kHz float32 배열
+        preset (str): DECODE_PRESETS 키 (accurate, balanced, fast)
+        batch_size (int): 0 이면 VAD 구간을 순차 디코딩, 1 이상이면 배치 추론 파이프라인 사용
+        **overrides: TRANSCRIBE_OPTIONS 에 덮어쓸 추가 옵션
+    
+    Returns:
+        tuple: (segments 제너레이터, info)
+    
+    faster-whisper 는 segments 를 읽을 때 디코딩하므로, 다 읽을 때까지 모델을 사용 중으로 표시해
+    메모리 상한으로 해제되지 않게 한다 (segments 는 반드시 끝까지 읽거나 닫아야 함).
+    """
+    if preset not in DECODE_PRESETS:
+        raise ValueError(f"알 수 없는 프리셋: {preset} (사용 가능: {', '.join(DECODE_PRESETS)})")
+    options = dict(TRANSCRIBE_OPTIONS, **DECODE_PRESETS[preset])
+    options.update(overrides)
+    
+    if batch_size and batch_size > 0:
+        # 배치 모드는 구간을 독립적으로 디코딩하므로 이전 텍스트 조건을 쓰지 않음
+        options.pop("condition_on_previous_text", None)
+        options["batch_size"] = batch_size
+        name, model = BATCHED_REGISTRY_NAME, get_batched_pipeline(hold=True)
+    else:
+        name, model = WHISPER_REGISTRY_NAME, get_whisper_model(hold=True)
+    try:
+        segments, info = model.transcribe(audio, **options)
+    except BaseException:
+        release_model(name)
+        raise
+    return _release_when_done(segments, name), info
 
 def preprocess_audio(audio):
     """
@@ -80,9 +209,112 @@ def preprocess_audio(audio):
     
     return audio
 
-def convert_audio_to_text_improved(audio_file_path):
+def transcribe_streaming(audio_file_path, window_seconds=STREAM_WINDOW_SECONDS, preset="accurate", batch_size=0):
+    """
+    ffmpeg 로 고정 길이 윈도우씩 디코딩하면서 세그먼트를 생성되는 즉시 반환하는 제너레이터
+    
+    파일 전체를 메모리에 올리지 않으므로 길이 제한(30분)이 없고, 메모리 사용량은
+    윈도우 길이에만 비례한다. 윈도우 경계는 끝부분의 가장 조용한 지점으로 옮겨
+    단어가 잘리지 않게 하고, 직전 윈도우의 텍스트를 다음 윈도우의 프롬프트로 넘긴다.
+    
+    정규화 피크는 먼저 파일 전체를 한 번 훑어 구하고(scan_audio) 모든 윈도우에 같은 배율을 쓴다.
+    윈도우마다 정규화하면 조용한 윈도우의 잡음이 최대 음량까지 커져 없는 말이 인식되고,
+    윈도우 경계마다 음량이 달라져 파일 전체 변환과 결과가 달라진다.
+    
+    Args:
+        audio_file_path (str): 입력 오디오 파일 경로
+        window_seconds (float): 디코딩 윈도우 길이 (초)
+        preset (str): 디코딩 프리셋 (DECODE_PRESETS)
+        batch_size (int): 배치 추론 크기 (0 이면 순차 디코딩)
+    
+    Yields:
+        dict: {'start', 'end', 'text', 'avg_logprob'} (파일 기준 시간, 초)
+    """
+    window_samples = int(window_seconds * TARGET_SAMPLE_RATE)
+    
+    offset = 0.0  # 현재 윈도우의 파일 기준 시작 시간 (초)
+    previous_text = ""
+    
+    def decode_window(window):
+        nonlocal previous_text
+        segments, _ = run_transcribe(window, preset, batch_size, initial_prompt=previous_text)
+        for segment in segments:
+            # 프롬프트로 쓰는 마지막 200자만 보관 (몇 시간짜리 녹음에서도 문자열이 커지지 않도록)
+            previous_text = (previous_text + segment.text)[-200:]
+            yield {
+                'start': offset + segment.start,
+                'end': offset + segment.end,
+                'text': segment.text.strip(),
+                'avg_logprob': getattr(segment, 'avg_logprob', None),
+            }
+    
+    # 전처리 (파일 전체 피크로 정규화 → Low-pass 3000Hz, 필터 상태는 윈도우 사이에 이어짐 → +5dB)
+    _, peak = scan_audio(audio_file_path, TARGET_SAMPLE_RATE)
+    chunks = preprocess_stream(audio_file_path, TARGET_SAMPLE_RATE, normalize=True, cutoff=3000, gain_db=5.0,
+                               window_seconds=window_seconds, peak=peak)
+    
+    buffer = np.zeros(0, dtype=np.float32)
+    for chunk in chunks:
+        buffer = np.concatenate([buffer, chunk])
+        if buffer.size < window_samples:
+            continue
+        # 윈도우 끝부분의 가장 조용한 지점에서 자르고 나머지는 다음 윈도우로 넘김
+        cut = find_quiet_point(buffer, TARGET_SAMPLE_RATE)
+        window, buffer = buffer[:cut], buffer[cut:]
+        print(f"윈도우 디코딩: {offset / 60:.1f}분 ~ {(offset + cut / TARGET_SAMPLE_RATE) / 60:.1f}분")
+        yield from decode_window(window)
+        offset += cut / TARGET_SAMPLE_RATE
+    
+    if buffer.size > 0:
+        print(f"윈도우 디코딩: {offset / 60:.1f}분 ~ {(offset + buffer.size / TARGET_SAMPLE_RATE) / 60:.1f}분")
+        yield from decode_window(buffer)
+
+def convert_audio_to_text_streaming(audio_file_path, window_seconds=STREAM_WINDOW_SECONDS, preset="accurate", batch_size=0):
+    """
+    스트리밍 모드로 오디오 파일을 텍스트로 변환 (길이 제한 없음, 일정한 메모리 사용)
+    """
+    text_parts = []
+    confidence_scores = []
+    
+    try:
+        print("\n=== 세그먼트별 인식 결과 (스트리밍 모드) ===")
+        prev_end = 0.0
+        for i, segment in enumerate(transcribe_streaming(audio_file_path, window_seconds, preset, batch_size)):
+            if segment['text']:
+                text_parts.append(segment['text'])
+                duration = segment['end'] - segment['start']
+                print(f"세그먼트 {i}: {segment['start']:.1f}s - {segment['end']:.1f}s ({duration:.1f}s)")
+                print(f"  텍스트: {segment['text']}")
+                
+                if segment['avg_logprob'] is not None:
+                    confidence_scores.append(segment['avg_logprob'])
+                    print(f"  신뢰도: {segment['avg_logprob']:.3f}")
+            
+            # 세그먼트 간격이 큰 경우 경고 출력
+            gap = segment['start'] - prev_end
+            if i > 0 and gap > 5.0:  # 5초 이상 간격
+                print(f"⚠️  세그먼트 간격이 큽니다: {gap:.1f}초 (무음으로 인식된 부분)")
+            prev_end = segment['end']
+        
+        avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0
+        print(f"\n총 {len(text_parts)}개 세그먼트 인식됨")
+        print(f"평균 신뢰도: {avg_confidence:.3f}")
+        
+        return " ".join(text_parts)
+        
+    except Exception as e:
+        print(f"음성 인식 중 오류 발생: {str(e)}")
+        return None
+
+def convert_audio_to_text_improved(audio_file_path, streaming=False, preset="accurate", batch_size=0):
     """
     개선된 오디오 파일을 텍스트로 변환하는 함수 (노이즈 제거 및 음량 최적화)
+    
+    Args:
+        audio_file_path (str): 입력 오디오 파일 경로
+        streaming (bool): True 면 윈도우 단위 스트리밍 디코딩 (30분 제한 없음)
+        preset (str): 디코딩 프리셋 - accurate(빔 5), balanced(빔 2), fast(greedy)
+        batch_size (int): 1 이상이면 VAD 구간을 배치 추론 파이프라인으로 디코딩
     """
     # 오디오 파일 확장자 확인
     file_extension = os.path.splitext(audio_file_path)[1].lower()
@@ -91,8 +323,36 @@ def convert_audio_to_text_improved(audio_file_path):
         print(f"지원하지 않는 파일 형식입니다: {file_extension}")
         return None
     
-    # 임시 WAV 파일 경로
-    temp_wav_path = "/tmp/temp_audio_optimized.wav"
+    # 변환 결과 캐시 조회 (같은 내용 + 같은 모델/옵션이면 디코딩 생략)
+    cache = get_cache()
+    if cache is None:
+        return _convert_audio_to_text(audio_file_path, streaming, preset, batch_size)
+    
+    # 모델 로딩과 같은 기준의 device/compute_type (로딩 규칙이 바뀌어도 키가 따라감)
+    device, compute_type = get_device_and_compute_type()
+    cache_key = cache.make_key(
+        content_hash(audio_file_path), TRANSCRIBE_OPTIONS["language"],
+        f"faster-whisper:{WHISPER_MODEL_NAME}:{device}:{compute_type}",
+        options=TRANSCRIBE_OPTIONS, preset=preset, batch_size=batch_size, streaming=streaming,
+    )
+    cached = cache.get(cache_key)
+    if cached is not None:
+        print("캐시된 변환 결과 사용 (전처리/디코딩 생략)")
+        return cached['text']
+    
+    text = _convert_audio_to_text(audio_file_path, streaming, preset, batch_size)
+    if text is not None:
+        cache.put(cache_key, {'text': text})
+    return text
+
+def _convert_audio_to_text(audio_file_path, streaming, preset, batch_size):
+    """convert_audio_to_text_improved 의 실제 변환 (캐시 미스 시)"""
+    if streaming:
+        return convert_audio_to_text_streaming(audio_file_path, preset=preset, batch_size=batch_size)
+    
+    # 임시 WAV 파일 경로 (동시 실행 시 충돌하지 않도록 호출마다 고유 경로)
+    temp_fd, temp_wav_path = tempfile.mkstemp(prefix="temp_audio_optimized_", suffix=".wav")
+    os.close(temp_fd)
     
     try:
         print("오디오 파일 로딩 중...")
@@ -107,9 +367,9 @@ def convert_audio_to_text_improved(audio_file_path):
         print(f"  - 샘플레이트: {audio.frame_rate}Hz")
         
         # 30분 제한 확인
-        if total_minutes > 30:
-            print(f"경고: 파일이 30분을 초과 ({total_minutes:.1f}분).")
-            audio = audio[:30 * 60 * 1000]  # 30분으로 자르기
+        if total_duration > MAX_FILE_MODE_SECONDS * 1000:
+            print(f"경고: 파일이 30분을 초과 ({total_minutes:.1f}분). 전체 변환은 streaming=True 를 사용하세요.")
+            audio = audio[:MAX_FILE_MODE_SECONDS * 1000]  # 30분으로 자르기
         
         # 오디오 전처리
         audio = preprocess_audio(audio)
@@ -123,37 +383,10 @@ def convert_audio_to_text_improved(audio_file_path):
         print("WAV 파일로 변환 중...")
         audio.export(temp_wav_path, format="wav", parameters=["-ar", "16000"])
         
-        # 모델 가져오기 (재사용)
-        model = get_whisper_model()
-        
-        # 최적화된 음성 인식 옵션
-        print("음성 인식 실행 중... (노이즈 제거 및 음량 최적화 적용)")
-        segments, info = model.transcribe(
-            temp_wav_path, 
-            language="ko",
-            # 정확한 인식을 위한 최적화된 파라미터들
-            beam_size=5,  # 더 정확한 인식을 위해 증가
-            best_of=5,    # 더 많은 후보 검토
-            temperature=0.0,  # 결정적 결과 유지
-            condition_on_previous_text=True,  # 이전 텍스트 고려
-            initial_prompt="",  # 초기 프롬프트 추가
-            word_timestamps=False,  # 단어별 타임스탬프 비활성화
-            vad_filter=True,  # VAD 필터 활성화
-            vad_parameters=dict(
-                min_silence_duration_ms=1000,  # 1초로 증가 (노래 중간 휴식 허용)
-                speech_pad_ms=300  # 0.3초로 감소
-            ),
-            # 노이즈 제거를 위한 임계값 조정
-            compression_ratio_threshold=2.4,  # 압축 비율 임계값
-            no_speech_threshold=0.3,  # 무음 임계값 낮춤 (0.6 → 0.3)
-            # 반복 패널티 완화
-            repetition_penalty=0.8,  # 반복 패널티 완화 (1.0 → 0.8)
-            length_penalty=1.0,  # 길이 패널티 유지
-            # 추가 옵션
-            suppress_tokens=[-1],  # EOT 토큰 억제
-            without_timestamps=False,  # 타임스탬프 유지
-            max_initial_timestamp=1.0,  # 초기 타임스탬프 최대값
-        )
+        # 최적화된 음성 인식 옵션 (모델은 재사용)
+        mode = f"배치 {batch_size}" if batch_size else "순차"
+        print(f"음성 인식 실행 중... (노이즈 제거 및 음량 최적화 적용, 프리셋: {preset}, {mode} 디코딩)")
+        segments, info = run_transcribe(temp_wav_path, preset, batch_size)
         
         # 결과 텍스트 수집
         text = ""
@@ -204,22 +437,118 @@ def convert_audio_to_text_improved(audio_file_path):
             os.remove(temp_wav_path)
         return None
 
-def process_multiple_files(file_paths):
+def save_transcript(audio_file_path, transcribed_text, output_dir):
     """
-    여러 파일을 순차적으로 처리하는 함수
+    인식 결과를 '<원본 파일명>_<타임스탬프>.txt' 로 저장
+    
+    Returns:
+        str: 저장된 파일 경로
+    """
+    # 현재 시간을 포함한 파일명 생성
+    current_time = datetime.now()
+    timestamp = current_time.strftime("%Y%m%d%H%M%S%f")[:-3]  # 나노초까지 포함 (마이크로초 단위)
+    
+    # 원본 파일명에서 확장자 제거하고 타임스탬프와 .txt 확장자 추가
+    base_name = os.path.splitext(os.path.basename(audio_file_path))[0]
+    output_file = os.path.join(output_dir, f"{base_name}_{timestamp}.txt")
+    
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(f"=== {os.path.basename(audio_file_path)} 음성 인식 결과 ===\n")
+        f.write(f"처리 시간: {current_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"적용된 최적화: Low-pass filter (3000Hz), 음량 +5dB\n\n")
+        f.write(transcribed_text)
+    
+    return output_file
+
+def _init_batch_worker(cpu_threads):
+    """배치 워커 프로세스 초기화 - 프로세스당 모델을 한 번만 로딩"""
+    get_whisper_model(cpu_threads=cpu_threads)
+
+def _transcribe_file_job(file_path, streaming):
+    """배치 워커에서 파일 하나 처리 후 결과, 처리 시간, 실제로 변환한 길이 반환"""
+    start = time.time()
+    text = convert_audio_to_text_improved(file_path, streaming=streaming)
+    elapsed = time.time() - start
+    duration = probe_duration(file_path)
+    if not streaming:
+        # 파일 모드는 앞 30분만 변환하므로 RTF 도 그 길이 기준
+        duration = min(duration, MAX_FILE_MODE_SECONDS)
+    return {
+        'file_path': file_path,
+        'text': text,
+        'elapsed': elapsed,
+        'duration': duration,
+    }
+
+def process_multiple_files(file_paths, workers=1, cpu_threads=None, output_dir=None, streaming=False):
+    """
+    여러 파일을 처리하는 함수
+    
+    workers 가 2 이상이면 파일들을 워커 프로세스에 나눠 동시에 처리한다.
+    각 워커는 get_whisper_model 로 자기 모델을 한 번만 로딩하고 cpu_threads 만큼의 스레드를 쓴다.
+    
+    Args:
+        file_paths (list): 입력 파일 경로 목록
+        workers (int): 워커 프로세스 수 (1이면 현재 프로세스에서 순차 처리)
+        cpu_threads (int): 워커당 CPU 스레드 수 (기본값: CPU 코어 수 / workers)
+        output_dir (str): 지정하면 파일이 끝날 때마다 결과 텍스트를 저장
+        streaming (bool): 스트리밍 디코딩 사용 여부
+    
+    Returns:
+        dict: 파일 경로 -> 변환된 텍스트
     """
     results = {}
+    stats = []
     
-    for i, file_path in enumerate(file_paths, 1):
-        print(f"\n=== 파일 {i}/{len(file_paths)} 처리 중 ===")
-        print(f"파일: {os.path.basename(file_path)}")
-        
-        result = convert_audio_to_text_improved(file_path)
-        if result:
-            results[file_path] = result
-            print(f"✓ 파일 {i} 처리 완료")
+    if cpu_threads is None:
+        cpu_threads = max(1, (os.cpu_count() or 1) // max(1, workers))
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    
+    def handle_result(i, job):
+        file_path = job['file_path']
+        if job['text']:
+            results[file_path] = job['text']
+            rtf = job['elapsed'] / job['duration'] if job['duration'] > 0 else 0.0
+            stats.append((file_path, job['duration'], job['elapsed'], rtf))
+            print(f"✓ 파일 {i}/{len(file_paths)} 처리 완료: {os.path.basename(file_path)} "
+                  f"({job['elapsed']:.1f}초, RTF {rtf:.3f})")
+            if output_dir:
+                output_file = save_transcript(file_path, job['text'], output_dir)
+                print(f"  저장 위치: {output_file}")
         else:
-            print(f"✗ 파일 {i} 처리 실패")
+            print(f"✗ 파일 {i}/{len(file_paths)} 처리 실패: {os.path.basename(file_path)}")
+    
+    wall_start = time.time()
+    
+    if workers <= 1:
+        get_whisper_model(cpu_threads=cpu_threads)
+        for i, file_path in enumerate(file_paths, 1):
+            print(f"\n=== 파일 {i}/{len(file_paths)} 처리 중 ===")
+            print(f"파일: {os.path.basename(file_path)}")
+            handle_result(i, _transcribe_file_job(file_path, streaming))
+    else:
+        print(f"\n=== 배치 처리: 파일 {len(file_paths)}개, 워커 {workers}개 x {cpu_threads}스레드 ===")
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_batch_worker, initargs=(cpu_threads,)) as executor:
+            futures = [executor.submit(_transcribe_file_job, file_path, streaming) for file_path in file_paths]
+            for i, future in enumerate(as_completed(futures), 1):
+                try:
+                    handle_result(i, future.result())
+                except Exception as e:
+                    print(f"✗ 파일 {i}/{len(file_paths)} 워커 오류: {e}")
+    
+    wall_time = time.time() - wall_start
+    
+    # 처리량 보고
+    print("\n=== 배치 처리 결과 ===")
+    for file_path, duration, elapsed, rtf in stats:
+        print(f"{os.path.basename(file_path)}: 길이 {duration:.1f}초, 처리 {elapsed:.1f}초, RTF {rtf:.3f}")
+    files_per_hour = len(results) / (wall_time / 3600) if wall_time > 0 else 0.0
+    total_audio = sum(duration for _, duration, _, _ in stats)
+    print(f"성공 {len(results)}/{len(file_paths)}개, 전체 {wall_time:.1f}초")
+    print(f"처리량: {files_per_hour:.1f} files/hour, 전체 RTF {wall_time / total_audio if total_audio > 0 else 0.0:.3f}")
     
     return results
 
@@ -251,21 +580,9 @@ def main():
         print(f"✗ {os.path.basename(target_mp3_file)} 음성 인식 결과가 비어있음")
         return
     
-    # 현재 시간을 포함한 파일명 생성
-    current_time = datetime.now()
-    timestamp = current_time.strftime("%Y%m%d%H%M%S%f")[:-3]  # 나노초까지 포함 (마이크로초 단위)
-    
-    # 원본 파일명에서 확장자 제거하고 타임스탬프와 .txt 확장자 추가
-    base_name = os.path.splitext(os.path.basename(target_mp3_file))[0]
-    output_file = os.path.join(output_dir, f"{base_name}_{timestamp}.txt")
-    
     # 결과를 파일로 저장
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(f"=== {os.path.basename(target_mp3_file)} 음성 인식 결과 ===\n")
-            f.write(f"처리 시간: {current_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"적용된 최적화: Low-pass filter (3000Hz), 음량 +5dB\n\n")
-            f.write(transcribed_text)
+        output_file = save_transcript(target_mp3_file, transcribed_text, output_dir)
         
         print(f"✓ {os.path.basename(target_mp3_file)} → {os.path.basename(output_file)}")
         print(f"  저장 위치: {output_file}")
@@ -276,6 +593,10 @@ def main():
     
     print(f"\n=== 파일 처리 완료 ===")
     print(f"결과 저장 폴더: {output_dir}")
+    
+    if get_cache() is not None:
+        get_cache().print_report()
+    get_registry().print_report()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,37 +1,45 @@
 import os
-import subprocess
+import sys
+import time
+import queue
+import threading
 import argparse
-import tempfile
-from pydub import AudioSegment
 from datetime import datetime
 import numpy as np
-import webrtcvad
 import sounddevice as sd
 import soundfile as sf
 
+# 공용 모듈(stt/whisper) 경로 추가
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from transcript_cache import get_cache, content_hash, model_fingerprint
+from audio_preprocess import TARGET_SAMPLE_RATE, load_audio, preprocess
+from realtime_capture import UtteranceSegmenter, WavReplayStream
+from transcribe_scheduler import percentile
+from whisper_backend import BACKENDS, DEFAULT_BACKEND, backend_from_env, create_backend, format_segment_line, segments_to_text
+from vad import VoiceActivityDetector, rms
+
+# 파일 모드 전처리/디코딩 설정 (캐시 키에 포함)
+FILE_DECODE_PARAMS = dict(cutoff=3000, gain_db=5.0)
+
+# 실시간 모드 설정
+REALTIME_BLOCK_SECONDS = 0.3        # 입력 콜백 블록 길이 (VAD 판정 단위)
+REALTIME_END_SILENCE_SECONDS = 0.6  # 이만큼 무음이면 발화 종료
+REALTIME_MAX_UTTERANCE_SECONDS = 15.0
+
+# 재사용하는 음성 구간 검출기 (호출마다 webrtcvad.Vad 를 만들지 않음)
+_vad_detectors = {}
+
+def get_vad(sample_rate=16000):
+    """샘플링 레이트별 VoiceActivityDetector (민감도 2)"""
+    if sample_rate not in _vad_detectors:
+        _vad_detectors[sample_rate] = VoiceActivityDetector(aggressiveness=2, sample_rate=sample_rate)
+    return _vad_detectors[sample_rate]
+
 def has_speech(audio_data, sample_rate=16000):
     """
-    음성이 있는지 확인하는 함수
+    음성이 있는지 확인하는 함수 (30ms 프레임의 50% 이상이 음성이면 True)
     """
-    vad = webrtcvad.Vad(2)  # 민감도 설정 (0-3)
-    
-    # 30ms 프레임으로 분할
-    frame_duration = 30  # ms
-    frame_size = int(sample_rate * frame_duration / 1000)
-    
-    has_speech_frames = 0
-    total_frames = 0
-    
-    for i in range(0, len(audio_data) - frame_size, frame_size):
-        frame = audio_data[i:i + frame_size]
-        if len(frame) == frame_size:
-            is_speech = vad.is_speech(frame.tobytes(), sample_rate)
-            if is_speech:
-                has_speech_frames += 1
-            total_frames += 1
-    
-    # 50% 이상의 프레임에서 음성이 감지되면 True
-    return (has_speech_frames / total_frames) > 0.5 if total_frames > 0 else False
+    return get_vad(sample_rate).has_speech(audio_data)
 
 def record_audio_with_vad(duration=5, sample_rate=16000):
     """
@@ -87,13 +95,14 @@ def save_audio_to_wav(audio_data, file_path, sample_rate=16000):
     """
     sf.write(file_path, audio_data, sample_rate)
 
-def process_audio_file(input_file_path, output_dir=None):
+def process_audio_file(input_file_path, output_dir=None, backend_kind=None):
     """
     오디오 파일을 처리하여 텍스트로 변환하는 함수
     
     Args:
         input_file_path (str): 입력 오디오 파일 경로
         output_dir (str): 출력 디렉토리 (기본값: 입력 파일과 같은 디렉토리)
+        backend_kind (str): whisper 백엔드 (cli | server | resident, 기본값: backend_from_env())
     """
     
     # 파일 존재 확인
@@ -112,12 +121,16 @@ def process_audio_file(input_file_path, output_dir=None):
     current_dir = os.path.dirname(os.path.abspath(__file__))
     
     # whisper.cpp 경로 설정
-    whisper_cli_path = os.path.join(current_dir, "..", "pyannote", "whisper.cpp_local", "whisper-cli")
-    model_path = os.path.join(current_dir, "..", "pyannote", "whisper.cpp_local", "model", "ggml-large-v2-q8_0.bin")
-    
-    # whisper.cpp 실행 파일 존재 확인
-    if not os.path.exists(whisper_cli_path):
-        print(f"오류: whisper-cli를 찾을 수 없습니다: {whisper_cli_path}")
+    whisper_dir = os.path.join(current_dir, "..", "pyannote", "whisper.cpp_local")
+    whisper_cli_path = os.path.join(whisper_dir, "whisper-cli")
+    whisper_server_path = os.path.join(whisper_dir, "whisper-server")
+    model_path = os.path.join(whisper_dir, "model", "ggml-large-v2-q8_0.bin")
+    backend_kind = backend_kind or backend_from_env()
+    
+    # whisper.cpp 실행 파일 존재 확인 (resident 백엔드는 실행 파일 없이 모델만 사용)
+    executable_path = {"cli": whisper_cli_path, "server": whisper_server_path}.get(backend_kind)
+    if executable_path and not os.path.exists(executable_path):
+        print(f"오류: {os.path.basename(executable_path)}를 찾을 수 없습니다: {executable_path}")
         print("whisper.cpp가 설치되어 있는지 확인해주세요.")
         return None
     
@@ -127,99 +140,128 @@ def process_audio_file(input_file_path, output_dir=None):
         print("whisper.cpp 모델이 다운로드되어 있는지 확인해주세요.")
         return None
     
+    input_filename = os.path.splitext(os.path.basename(input_file_path))[0]
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    
     try:
+        # 0. 변환 결과 캐시 조회 (같은 내용 + 같은 모델/설정이면 디코딩 생략)
+        cache = get_cache()
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(content_hash(input_file_path), "ko",
+                                       model_fingerprint(model_path), vad_trim=True, **FILE_DECODE_PARAMS)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                print("캐시된 변환 결과 사용 (전처리/디코딩 생략)")
+                return write_transcript_file(input_file_path, output_dir, input_filename, timestamp, cached['text'])
+        
         print(f"오디오 파일 처리 중: {input_file_path}")
         
-        # 1. 오디오 파일 로드
+        # 1. 오디오 파일 로드 (16kHz 모노 float32)
         print("오디오 파일 로드 중...")
-        audio = AudioSegment.from_file(input_file_path)
-        print(f"오디오 정보 - 길이: {len(audio)}ms, 샘플링 레이트: {audio.frame_rate}Hz")
+        audio = load_audio(input_file_path, TARGET_SAMPLE_RATE)
+        print(f"오디오 정보 - 길이: {audio.size / TARGET_SAMPLE_RATE * 1000:.0f}ms, 샘플링 레이트: {TARGET_SAMPLE_RATE}Hz")
         
-        # 2. 노이즈 제거 (Low-pass filter 3000Hz)
-        print("노이즈 제거 중 (Low-pass filter 3000Hz)...")
-        audio = audio.low_pass_filter(3000)
-        print("노이즈 제거 완료")
+        # 1-1. 음성 구간 검출 - 음성이 없으면 whisper.cpp 를 호출하지 않고, 끝부분 무음은 잘라냄
+        #      (앞부분은 자르지 않아 출력 타임스탬프가 원본 기준으로 유지됨)
+        speech_bounds = get_vad(TARGET_SAMPLE_RATE).speech_bounds(audio)
+        if speech_bounds is None:
+            print("음성이 감지되지 않아 변환을 건너뜁니다.")
+            if cache is not None:
+                cache.put(cache_key, {'text': "", 'segments': []})
+            return write_transcript_file(input_file_path, output_dir, input_filename, timestamp, "")
+        if speech_bounds[1] < audio.size:
+            print(f"끝부분 무음 {(audio.size - speech_bounds[1]) / TARGET_SAMPLE_RATE:.1f}초 제거")
+            audio = audio[:speech_bounds[1]]
         
-        # 3. 볼륨 높이기 (+5 dB)
-        print("볼륨을 5dB 증폭 중...")
-        audio = audio + 5
-        print("볼륨 증폭 완료")
+        # 2. 노이즈 제거 (Low-pass filter 3000Hz) + 3. 볼륨 높이기 (+5 dB)
+        print(f"노이즈 제거 (Low-pass filter {FILE_DECODE_PARAMS['cutoff']}Hz) 및 "
+              f"볼륨 {FILE_DECODE_PARAMS['gain_db']:g}dB 증폭 중...")
+        audio = preprocess(audio, TARGET_SAMPLE_RATE, **FILE_DECODE_PARAMS)
+        print("전처리 완료")
         
-        # 4. 처리된 오디오를 임시 WAV 파일로 저장
-        input_filename = os.path.splitext(os.path.basename(input_file_path))[0]
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        temp_wav_file = os.path.join(output_dir, f"{input_filename}_processed_{timestamp}.wav")
+        # 4. whisper.cpp로 텍스트 변환 (임시 WAV 파일 없이 메모리 버퍼 전달)
+        print(f"whisper.cpp로 텍스트 변환 중... (백엔드: {backend_kind})")
+        with create_backend(backend_kind, model_path=model_path, cli_path=whisper_cli_path,
+                            server_path=whisper_server_path, cwd=whisper_dir) as backend:
+            segments = backend.transcribe(audio)
+        transcribed_text = "\n".join(format_segment_line(segment) for segment in segments)
         
-        print(f"처리된 오디오를 임시 파일로 저장 중: {temp_wav_file}")
-        audio.export(temp_wav_file, format="wav")
-        print("임시 파일 저장 완료")
+        if cache is not None:
+            cache.put(cache_key, {'text': transcribed_text, 'segments': segments})
         
-        # 5. whisper.cpp로 텍스트 변환
-        print("whisper.cpp로 텍스트 변환 중...")
-        whisper_cmd = [
-            whisper_cli_path,
-            "-l", "ko",
-            "-m", model_path,
-            temp_wav_file
-        ]
+        # 5. 결과를 텍스트 파일로 저장
+        return write_transcript_file(input_file_path, output_dir, input_filename, timestamp, transcribed_text)
         
-        result = subprocess.run(whisper_cmd, 
-                              capture_output=True, 
-                              text=True, 
-                              cwd=os.path.dirname(whisper_cli_path))
-        
-        if result.returncode == 0:
-            transcribed_text = result.stdout.strip()
-            
-            # 6. 결과를 텍스트 파일로 저장
-            output_text_file = os.path.join(output_dir, f"{input_filename}_transcript_{timestamp}.txt")
-            
-            with open(output_text_file, 'w', encoding='utf-8') as f:
-                f.write(f"=== 오디오 파일: {input_file_path} ===\n")
-                f.write(f"=== 처리 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ===\n\n")
-                f.write("=== 변환된 텍스트 ===\n")
-                f.write(transcribed_text)
-                f.write("\n")
-            
-            print(f"\n=== 변환 완료 ===")
-            print(f"입력 파일: {input_file_path}")
-            print(f"출력 텍스트 파일: {output_text_file}")
-            print(f"변환된 텍스트:\n{transcribed_text}")
-            
-            # 7. 임시 WAV 파일 삭제
-            os.remove(temp_wav_file)
-            print(f"임시 파일 삭제 완료: {temp_wav_file}")
-            
-            return output_text_file
-            
-        else:
-            print(f"whisper.cpp 실행 실패:")
-            print(f"오류 메시지: {result.stderr}")
-            return None
-            
     except Exception as e:
         print(f"오류 발생: {e}")
         return None
 
-def process_realtime_audio():
+def write_transcript_file(input_file_path, output_dir, input_filename, timestamp, transcribed_text):
     """
-    실시간 마이크 입력을 처리하는 함수 (볼륨 임계값 낮춤)
+    변환 결과를 텍스트 파일로 저장하고 경로 반환
+    
+    Args:
+        input_file_path (str): 입력 오디오 파일 경로
+        output_dir (str): 출력 디렉토리
+        input_filename (str): 확장자를 뺀 입력 파일명
+        timestamp (str): 파일명에 붙일 타임스탬프
+        transcribed_text (str): 변환된 텍스트
+    
+    Returns:
+        str: 저장된 텍스트 파일 경로
+    """
+    output_text_file = os.path.join(output_dir, f"{input_filename}_transcript_{timestamp}.txt")
+    
+    with open(output_text_file, 'w', encoding='utf-8') as f:
+        f.write(f"=== 오디오 파일: {input_file_path} ===\n")
+        f.write(f"=== 처리 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ===\n\n")
+        f.write("=== 변환된 텍스트 ===\n")
+        f.write(transcribed_text)
+        f.write("\n")
+    
+    print(f"\n=== 변환 완료 ===")
+    print(f"입력 파일: {input_file_path}")
+    print(f"출력 텍스트 파일: {output_text_file}")
+    print(f"변환된 텍스트:\n{transcribed_text}")
+    
+    return output_text_file
+
+def process_realtime_audio(replay_path=None, replay_speed=1.0, backend_kind=None):
+    """
+    실시간 마이크 입력을 처리하는 함수 (연속 캡처 + VAD 발화 분리 + 상주 인식기)
+    
+    입력 콜백은 블록을 큐에 넣기만 하므로 변환 중에도 캡처가 끊기지 않는다.
+    has_speech 로 블록마다 음성 여부를 판정해 무음에서 발화를 자르고,
+    모델을 한 번만 로딩한 whisper-server 가 별도 스레드에서 발화를 변환한다.
+    
+    Args:
+        replay_path (str): 지정하면 마이크 대신 이 파일을 실시간 속도로 재생 (테스트/지연 측정용)
+        replay_speed (float): 재생 속도 배수 (0 이면 대기 없이 최대 속도)
+        backend_kind (str): whisper 백엔드 (기본값: backend_from_env(), 실시간 모드는 server 또는 resident 권장)
     """
     print("=== 실시간 음성 인식 모드 ===")
     print("종료하려면 'quit' 또는 'exit'를 말씀하세요.")
-    print("볼륨 임계값: 100 (작은 소리도 인식)")
+    print(f"발화 종료 기준: 무음 {REALTIME_END_SILENCE_SECONDS}초")
     print()
     
     # 현재 스크립트의 디렉토리 경로
     current_dir = os.path.dirname(os.path.abspath(__file__))
     
     # whisper.cpp 경로 설정
-    whisper_cli_path = os.path.join(current_dir, "..", "pyannote", "whisper.cpp_local", "whisper-cli")
-    model_path = os.path.join(current_dir, "..", "pyannote", "whisper.cpp_local", "model", "ggml-large-v2-q8_0.bin")
-    
-    # whisper.cpp 실행 파일 존재 확인
-    if not os.path.exists(whisper_cli_path):
-        print(f"오류: whisper-cli를 찾을 수 없습니다: {whisper_cli_path}")
+    whisper_dir = os.path.join(current_dir, "..", "pyannote", "whisper.cpp_local")
+    whisper_cli_path = os.path.join(whisper_dir, "whisper-cli")
+    whisper_server_path = os.path.join(whisper_dir, "whisper-server")
+    model_path = os.path.join(whisper_dir, "model", "ggml-large-v2-q8_0.bin")
+    backend_kind = backend_kind or backend_from_env()
+    if backend_kind == "cli":
+        print("⚠️ cli 백엔드는 발화마다 whisper-cli 를 실행해 모델을 다시 로딩합니다. "
+              "지연 시간을 줄이려면 --backend server 또는 WHISPER_BACKEND=server 를 사용하세요.")
+    
+    # whisper.cpp 실행 파일 존재 확인 (resident 백엔드는 실행 파일 없이 모델만 사용)
+    executable_path = {"cli": whisper_cli_path, "server": whisper_server_path}.get(backend_kind)
+    if executable_path and not os.path.exists(executable_path):
+        print(f"오류: {os.path.basename(executable_path)}를 찾을 수 없습니다: {executable_path}")
         return
     
     # 모델 파일 존재 확인
@@ -227,75 +269,104 @@ def process_realtime_audio():
         print(f"오류: 모델 파일을 찾을 수 없습니다: {model_path}")
         return
     
+    # 상주 인식기 (모델 1회 로딩, 발화마다 server 는 HTTP, resident 는 배열을 바로 전달)
     try:
+        recognizer = create_backend(backend_kind, model_path=model_path, cli_path=whisper_cli_path,
+                                    server_path=whisper_server_path, pool_size=1,
+                                    threads=os.cpu_count() or 4, cwd=whisper_dir)
+    except Exception as e:
+        print(f"오류 발생: {e}")
+        return
+    
+    blocks = queue.Queue()      # 입력 콜백 -> 발화 분리
+    utterances = queue.Queue()  # 발화 분리 -> 인식기
+    stop_event = threading.Event()
+    latencies = []              # 발화 끝(마지막 음성 블록) -> 텍스트 출력까지 (초)
+    decode_times = []
+    
+    def recognize_loop():
         while True:
-            # 녹음 시간 설정
-            duration = 5  # 5초씩 녹음
-            
-            # 볼륨 체크를 포함한 마이크에서 오디오 녹음 (임계값: 100)
-            audio_data = record_audio_with_volume_check(duration=duration, threshold=100)
-            
-            if audio_data is None:
-                print("다시 시도해주세요...")
+            utterance = utterances.get()
+            if utterance is None:
+                break
+            try:
+                audio = preprocess(utterance['audio'].astype(np.float32) / 32768, TARGET_SAMPLE_RATE,
+                                   **FILE_DECODE_PARAMS)
+                decode_start = time.monotonic()
+                transcribed_text = segments_to_text(recognizer.transcribe(audio))
+                now = time.monotonic()
+            except Exception as e:
+                print(f"❌ 텍스트 변환 실패: {e}")
                 continue
             
-            # 임시 WAV 파일 생성
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_wav_path = temp_file.name
-            
-            # 오디오 데이터를 WAV 파일로 저장
-            save_audio_to_wav(audio_data, temp_wav_path)
-            
-            # pydub로 오디오 처리
-            print("오디오 전처리 중...")
-            audio = AudioSegment.from_wav(temp_wav_path)
-            
-            # 노이즈 제거 (Low-pass filter 3000Hz)
-            audio = audio.low_pass_filter(3000)
+            decode_times.append(now - decode_start)
+            latency = now - utterance['speech_end_time']
+            latencies.append(latency)
             
-            # 볼륨 높이기 (+5 dB)
-            audio = audio + 5
-            
-            # 처리된 오디오를 다시 저장
-            audio.export(temp_wav_path, format="wav")
-            
-            # whisper.cpp로 텍스트 변환
-            print("텍스트 변환 중...")
-            whisper_cmd = [
-                whisper_cli_path,
-                "-l", "ko",
-                "-m", model_path,
-                temp_wav_path
-            ]
-            
-            result = subprocess.run(whisper_cmd, 
-                                  capture_output=True, 
-                                  text=True, 
-                                  cwd=os.path.dirname(whisper_cli_path))
-            
-            # 임시 파일 삭제
-            os.unlink(temp_wav_path)
-            
-            if result.returncode == 0:
-                transcribed_text = result.stdout.strip()
-                if transcribed_text:
-                    print(f"🎯 인식 결과: {transcribed_text}")
-                    
-                    # 종료 명령 확인
-                    if transcribed_text.lower() in ['quit', 'exit', '종료', '끝']:
-                        print("실시간 음성 인식을 종료합니다.")
-                        break
-                else:
-                    print("음성이 인식되지 않았습니다.")
+            if transcribed_text:
+                print(f"🎯 [{utterance['start']:.1f}s - {utterance['end']:.1f}s] {transcribed_text} "
+                      f"(지연 {latency:.2f}초, 디코딩 {now - decode_start:.2f}초)")
+                
+                # 종료 명령 확인
+                if transcribed_text.strip(" .!?").lower() in ['quit', 'exit', '종료', '끝']:
+                    print("실시간 음성 인식을 종료합니다.")
+                    stop_event.set()
             else:
-                print("❌ 텍스트 변환 실패")
-            
-            print("-" * 50)
-            
+                print("음성이 인식되지 않았습니다.")
+    
+    def audio_callback(indata, frames, time_info, status):
+        # 오디오 스레드에서는 복사해서 큐에 넣기만 함 (블로킹 금지)
+        if status:
+            print(f"입력 상태: {status}")
+        blocks.put((indata[:, 0].copy(), time.monotonic()))
+    
+    block_size = int(REALTIME_BLOCK_SECONDS * TARGET_SAMPLE_RATE)
+    if replay_path:
+        print(f"파일 재생 입력 사용: {replay_path} (속도 x{replay_speed})")
+        stream = WavReplayStream(replay_path, samplerate=TARGET_SAMPLE_RATE, blocksize=block_size,
+                                 callback=audio_callback, speed=replay_speed)
+    else:
+        stream = sd.InputStream(samplerate=TARGET_SAMPLE_RATE, channels=1, dtype='int16',
+                                blocksize=block_size, callback=audio_callback)
+    
+    segmenter = UtteranceSegmenter(has_speech, TARGET_SAMPLE_RATE,
+                                   end_silence_seconds=REALTIME_END_SILENCE_SECONDS,
+                                   max_utterance_seconds=REALTIME_MAX_UTTERANCE_SECONDS)
+    recognizer_thread = threading.Thread(target=recognize_loop, daemon=True)
+    recognizer_thread.start()
+    
+    try:
+        with stream:
+            print("🎤 듣는 중... (말씀해주세요)")
+            while not stop_event.is_set():
+                try:
+                    block, arrival_time = blocks.get(timeout=0.5)
+                except queue.Empty:
+                    if replay_path and stream.finished.is_set():
+                        break
+                    continue
+                for utterance in segmenter.feed(block, arrival_time):
+                    utterances.put(utterance)
+        for utterance in segmenter.flush():
+            utterances.put(utterance)
     except KeyboardInterrupt:
         print("\n실시간 음성 인식을 종료합니다.")
     except Exception as e:
         print(f"오류 발생: {e}")
+    finally:
+        utterances.put(None)
+        recognizer_thread.join()
+        recognizer.close()
+    
+    # 지연 시간 보고
+    if latencies:
+        sorted_latencies = sorted(latencies)
+        print("\n=== 실시간 인식 지연 시간 (발화 끝 → 텍스트) ===")
+        print(f"발화 {len(latencies)}개, 평균 {sum(latencies) / len(latencies):.2f}초, "
+              f"p50 {percentile(sorted_latencies, 0.5):.2f}초, p95 {percentile(sorted_latencies, 0.95):.2f}초, "
+              f"최대 {sorted_latencies[-1]:.2f}초")
+        print(f"평균 디코딩 시간: {sum(decode_times) / len(decode_times):.2f}초 "
+              f"(나머지는 발화 종료 판정 대기 {REALTIME_END_SILENCE_SECONDS}초 + 전처리)")
 
 def is_audio_loud_enough(audio_data, threshold=100):  # 1000 → 100으로 낮춤
     """
@@ -308,9 +379,10 @@ def is_audio_loud_enough(audio_data, threshold=100):  # 1000 → 100으로 낮
     Returns:
         bool: 볼륨이 충분한지 여부
     """
-    rms = np.sqrt(np.mean(audio_data**2))
-    print(f"현재 볼륨 레벨: {rms:.2f} (임계값: {threshold})")
-    return rms > threshold
+    # int16 을 그대로 제곱하면 넘치므로 float64 로 계산
+    level = rms(audio_data)
+    print(f"현재 볼륨 레벨: {level:.2f} (임계값: {threshold})")
+    return level > threshold
 
 def record_audio_with_volume_check(duration=5, sample_rate=16000, threshold=100):
     """
@@ -345,22 +417,28 @@ def main():
     parser.add_argument('input_file', nargs='?', help='변환할 오디오 파일 경로')
     parser.add_argument('-o', '--output', help='출력 디렉토리 (기본값: 입력 파일과 같은 디렉토리)')
     parser.add_argument('--realtime', action='store_true', help='실시간 마이크 입력 모드')
+    parser.add_argument('--replay', help='실시간 모드에서 마이크 대신 재생할 오디오 파일 (지연 시간 측정용)')
+    parser.add_argument('--replay-speed', type=float, default=1.0, help='재생 속도 배수 (0 = 대기 없이 최대 속도)')
+    parser.add_argument('--backend', choices=BACKENDS,
+                        help=f'whisper 백엔드 (기본값: WHISPER_BACKEND 환경 변수, 없으면 {DEFAULT_BACKEND}. 실시간 모드는 server 권장)')
     parser.add_argument('--threshold', type=int, default=100, help='볼륨 임계값 (기본값: 100)')
     
     args = parser.parse_args()
     
     # 실시간 모드가 요청된 경우
-    if args.realtime:
-        process_realtime_audio()
+    if args.realtime or args.replay:
+        process_realtime_audio(args.replay, args.replay_speed, args.backend)
         return
     
     # 입력 파일이 제공된 경우 파일 처리
     if args.input_file:
-        result_file = process_audio_file(args.input_file, args.output)
+        result_file = process_audio_file(args.input_file, args.output, args.backend)
         if result_file:
             print(f"\n✅ 변환 성공! 결과 파일: {result_file}")
         else:
             print("\n❌ 변환 실패!")
+        if get_cache() is not None:
+            get_cache().print_report()
         return
     
     # 대화형 모드
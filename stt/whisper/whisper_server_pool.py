@@ -0,0 +1,269 @@
+# whisper.cpp 상주 서버(whisper-server) 워커 풀
+#
+# whisper-cli를 세그먼트마다 새로 띄우면 매번 ggml 모델을 다시 로딩하게 된다.
+# 여기서는 whisper-server 프로세스를 N개 띄워두고(각각 모델 1회 로딩),
+# 세그먼트 오디오를 큐를 통해 유휴 워커에게 HTTP로 넘긴다.
+
+import os
+import queue
+import socket
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# 서버가 바로 종료되면 (포트를 고른 뒤 다른 프로세스가 먼저 가져간 경우 등) 새 포트로 다시 띄우는 횟수
+START_ATTEMPTS = 3
+
+
+def default_pool_size(threads_per_worker=4):
+    """
+    CPU 코어 수 기준 기본 풀 크기 계산
+
+    Args:
+        threads_per_worker (int): 워커 하나가 사용할 스레드 수
+
+    Returns:
+        int: 워커 수 (최소 1)
+    """
+    cpu_count = os.cpu_count() or 1
+    return max(1, cpu_count // max(1, threads_per_worker))
+
+
+def find_free_port(host="127.0.0.1"):
+    """
+    비어 있는 TCP 포트 (OS 가 고르도록 0번 포트에 바인딩)
+
+    run.py 여러 개, 웹 서비스와 일괄 처리처럼 풀을 동시에 여러 개 띄워도 포트가 겹치지 않는다.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class WhisperServerWorker:
+    """
+    whisper-server 프로세스 하나 (모델을 메모리에 유지)
+
+    port 가 None 이면 시작할 때마다 비어 있는 포트를 고른다.
+    """
+
+    def __init__(self, server_path, model_path, port=None, language="ko", threads=4,
+                 host="127.0.0.1", extra_args=None, cwd=None):
+        self.server_path = server_path
+        self.model_path = model_path
+        self.auto_port = port is None
+        self.port = port
+        self.language = language
+        self.threads = threads
+        self.host = host
+        self.extra_args = list(extra_args or [])
+        self.cwd = cwd
+        self.process = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        if self.auto_port:
+            self.port = find_free_port(self.host)
+        cmd = [
+            self.server_path,
+            "-m", self.model_path,
+            "-l", self.language,
+            "-t", str(self.threads),
+            "--host", self.host,
+            "--port", str(self.port),
+        ] + self.extra_args
+        self.process = subprocess.Popen(cmd,
+                                        stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.DEVNULL,
+                                        cwd=self.cwd)
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def wait_ready(self, timeout=300):
+        """
+        모델 로딩이 끝나 요청을 받을 수 있을 때까지 대기
+
+        whisper-server 의 /health 는 로딩 중 503, 준비되면 200 을 반환한다. 같은 포트를 쓰는 다른 프로세스의
+        응답(404 등)을 준비 완료로 착각하지 않도록 200 만 인정한다 (/health 가 있는 whisper.cpp 서버 필요).
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if not self.is_alive():
+                raise RuntimeError(f"whisper-server 실행 실패 (port {self.port})")
+            try:
+                response = requests.get(f"{self.base_url}/health", timeout=2)
+                if response.status_code == 200:
+                    return
+            except requests.RequestException:
+                # 아직 포트를 열지 않았거나 (ConnectionError) 모델 로딩 중이라 응답이 늦음 (ReadTimeout)
+                pass
+            time.sleep(0.5)
+        raise TimeoutError(f"whisper-server 준비 시간 초과 (port {self.port})")
+
+    def transcribe(self, audio, timeout=600, language=None):
+        """
+        WAV 오디오 하나를 상주 서버로 변환
+
+        Args:
+            audio (str | bytes): 16kHz WAV 파일 경로 또는 메모리상의 WAV 바이트
+            timeout (int): 요청 타임아웃 (초)
+            language (str): 이번 요청의 인식 언어 (None 이면 서버 시작 시 언어)
+
+        Returns:
+            str: 변환된 텍스트
+        """
+        return self._inference(audio, "json", timeout, language).get("text", "").strip()
+
+    def transcribe_segments(self, audio, timeout=600, language=None):
+        """
+        WAV 오디오 하나를 변환하고 타임스탬프가 있는 세그먼트 목록 반환
+
+        Returns:
+            list: {'start', 'end', 'text', 'words', 'avg_logprob'} dict 목록 (시간 단위: 초)
+        """
+        result = self._inference(audio, "verbose_json", timeout, language)
+        segments = []
+        for segment in result.get("segments", []):
+            segments.append({
+                'start': float(segment.get("start", 0.0)),
+                'end': float(segment.get("end", 0.0)),
+                'text': segment.get("text", "").strip(),
+                'words': segment.get("words") or [],
+                'avg_logprob': segment.get("avg_logprob"),
+            })
+        return segments
+
+    def _inference(self, audio, response_format, timeout, language=None):
+        if isinstance(audio, (bytes, bytearray)):
+            file_field = ("segment.wav", bytes(audio), "audio/wav")
+            response = self._post_inference(file_field, response_format, timeout, language)
+        else:
+            with open(audio, "rb") as f:
+                file_field = (os.path.basename(audio), f, "audio/wav")
+                response = self._post_inference(file_field, response_format, timeout, language)
+        response.raise_for_status()
+        return response.json()
+
+    def _post_inference(self, file_field, response_format, timeout, language=None):
+        data = {"response_format": response_format, "temperature": "0.0"}
+        if language:
+            data["language"] = language
+        return requests.post(
+            f"{self.base_url}/inference",
+            files={"file": file_field},
+            data=data,
+            timeout=timeout,
+        )
+
+    def stop(self):
+        if self.is_alive():
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+
+class WhisperServerPool:
+    """
+    whisper-server 워커 풀
+
+    모델은 워커별로 한 번만 로딩되고, 세그먼트는 유휴 워커 큐를 통해 분배된다.
+
+    사용 예:
+        with WhisperServerPool(server_path, model_path, pool_size=4) as pool:
+            text = pool.transcribe("segment.wav")
+            futures = [pool.submit(wav_bytes) for wav_bytes in segments]
+    """
+
+    def __init__(self, server_path, model_path, language="ko", pool_size=None,
+                 threads_per_worker=4, host="127.0.0.1", base_port=None,
+                 extra_args=None, cwd=None, request_timeout=600):
+        self.pool_size = pool_size or default_pool_size(threads_per_worker)
+        self.threads_per_worker = threads_per_worker
+        self.request_timeout = request_timeout
+        self.workers = [
+            # base_port 를 주지 않으면 워커마다 비어 있는 포트 사용
+            WhisperServerWorker(server_path, model_path, None if base_port is None else base_port + i,
+                                language=language, threads=threads_per_worker,
+                                host=host, extra_args=extra_args, cwd=cwd)
+            for i in range(self.pool_size)
+        ]
+        self._idle = queue.Queue()
+        self._executor = None
+
+    def start(self, timeout=300):
+        print(f"whisper-server 워커 {self.pool_size}개 시작 중... "
+              f"(워커당 스레드: {self.threads_per_worker})")
+        start = time.time()
+        for worker in self.workers:
+            worker.start()
+        try:
+            for worker in self.workers:
+                self._wait_worker(worker, timeout)
+                self._idle.put(worker)
+        except Exception:
+            self.close()
+            raise
+        self._executor = ThreadPoolExecutor(max_workers=self.pool_size)
+        print(f"whisper-server 준비 완료 ({time.time() - start:.1f}초)")
+        return self
+
+    def transcribe(self, audio, language=None):
+        """유휴 워커 하나를 빌려 세그먼트(WAV 경로 또는 바이트)를 변환 (블로킹)"""
+        return self._with_worker(
+            lambda worker: worker.transcribe(audio, timeout=self.request_timeout, language=language))
+
+    def transcribe_segments(self, audio, language=None):
+        """유휴 워커 하나를 빌려 타임스탬프 세그먼트 목록으로 변환 (블로킹)"""
+        return self._with_worker(
+            lambda worker: worker.transcribe_segments(audio, timeout=self.request_timeout, language=language))
+
+    def _with_worker(self, fn):
+        worker = self._idle.get()
+        try:
+            if not worker.is_alive():
+                # 워커가 죽었으면 다시 띄운다 (모델 재로딩)
+                print(f"whisper-server 재시작 (port {worker.port})")
+                worker.start()
+                self._wait_worker(worker)
+            return fn(worker)
+        finally:
+            self._idle.put(worker)
+
+    def _wait_worker(self, worker, timeout=300):
+        """준비될 때까지 대기 (고른 포트를 다른 프로세스가 먼저 가져가 서버가 종료되면 새 포트로 재시작)"""
+        for attempt in range(START_ATTEMPTS):
+            try:
+                worker.wait_ready(timeout)
+                return
+            except RuntimeError:
+                if not worker.auto_port or attempt == START_ATTEMPTS - 1:
+                    raise
+                print(f"whisper-server 재시작 (port {worker.port} 사용 불가)")
+                worker.stop()
+                worker.start()
+
+    def submit(self, audio):
+        """세그먼트를 큐에 넣고 Future 반환"""
+        return self._executor.submit(self.transcribe, audio)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for worker in self.workers:
+            worker.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()